@@ -0,0 +1,248 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from langchain.agents import create_agent
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.config import get_config
+
+# 自适应模型路由（对比 ModelChoice_wrap_model_call.py 的固定关键词 + 长度规则）：
+# - 关键词在初始化时编译成一个忽略大小写的正则，每次请求只扫描一遍文本，不再逐个 lower() 比较
+# - 复杂度打分函数可替换（classifier），默认是关键词权重 + 文本长度 + 对话轮数的启发式
+# - 按模型维护 EWMA 延迟、错误率和单次调用费用；延迟超标时提高升级到强模型的门槛，错误率过高时改用另一个模型
+#   被避开的模型收不到新样本，所以延迟和错误率会随时间衰减（half_life），过一段时间后重新尝试
+# - 同一个 thread 粘在同一个模型上（只有分数越过 threshold ± margin 才切换），让服务商的前缀缓存保持命中
+# - 每个 thread 有费用 / 延迟预算，超出后固定使用最便宜的模型
+
+# 每百万 token 价格（元）：(输入, 输出)，按服务商最新价格修改
+PRICES = {
+    "deepseek-chat": (2.0, 3.0),
+    "deepseek-reasoner": (2.0, 3.0),
+}
+
+# 复杂任务关键词及权重（可按需扩充）
+HARD_KEYWORDS = {
+    "证明": 0.5, "推导": 0.5, "严谨": 0.3, "规划": 0.3, "多步骤": 0.4, "数学": 0.3,
+    "逻辑证明": 0.6, "约束求解": 0.6, "chain of thought": 0.5, "step-by-step": 0.4, "reason step by step": 0.5,
+}
+
+
+class KeywordMatcher:
+    """把关键词编译成单个正则（长词优先），一次扫描得到命中关键词的权重之和"""
+
+    def __init__(self, weights: dict[str, float]):
+        self.weights = {k.lower(): w for k, w in weights.items()}
+        alternation = "|".join(re.escape(k) for k in sorted(self.weights, key=len, reverse=True))
+        self.pattern = re.compile(alternation, re.IGNORECASE)
+
+    def score(self, text: str) -> float:
+        hits = {m.group(0).lower() for m in self.pattern.finditer(text)}
+        return sum(self.weights[h] for h in hits)
+
+
+def last_user_text(messages: list[AnyMessage]) -> str:
+    """从消息列表中取最近一条用户消息文本（无则返回空串）"""
+    for m in reversed(messages):
+        if isinstance(m, HumanMessage):
+            return m.content if isinstance(m.content, str) else ""
+    return ""
+
+
+def heuristic_classifier(matcher: KeywordMatcher) -> Callable[[list[AnyMessage]], float]:
+    """默认打分：关键词权重 + 最近用户输入长度 + 对话轮数，截断到 [0, 1]"""
+    def classify(messages: list[AnyMessage]) -> float:
+        text = last_user_text(messages)
+        score = matcher.score(text) + min(len(text) / 400, 0.4) + min(len(messages) / 40, 0.3)
+        return min(score, 1.0)
+    return classify
+
+
+def model_name(model) -> str:
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+
+@dataclass
+class ModelStats:
+    """
+    按模型的指数滑动平均统计，alpha 越大越看重最近的调用。
+    延迟和错误率距离上次调用每过 half_life 秒减半，没有新样本时不会一直停留在出问题时的值
+    """
+    alpha: float = 0.2
+    half_life: float | None = 300.0
+    calls: int = 0
+    latency: float = 0.0       # 秒
+    error_rate: float = 0.0
+    cost: float = 0.0          # 元 / 次
+    updated: float = 0.0       # 上次记录的时间（time.monotonic()）
+
+    def _ewma(self, old: float, new: float) -> float:
+        return new if self.calls == 0 else (1 - self.alpha) * old + self.alpha * new
+
+    def current(self) -> tuple[float, float]:
+        """按时间衰减后的 (延迟, 错误率)"""
+        if not self.half_life or not self.calls:
+            return self.latency, self.error_rate
+        factor = 0.5 ** ((time.monotonic() - self.updated) / self.half_life)
+        return self.latency * factor, self.error_rate * factor
+
+    def record(self, latency: float, error: bool, cost: float = 0.0):
+        old_latency, old_error_rate = self.current()
+        self.latency = self._ewma(old_latency, latency)
+        self.error_rate = self._ewma(old_error_rate, 1.0 if error else 0.0)
+        self.updated = time.monotonic()
+        if not error:
+            self.cost = self._ewma(self.cost, cost)
+        self.calls += 1
+
+
+@dataclass
+class ThreadBudget:
+    model: str | None = None   # 当前粘住的模型
+    cost: float = 0.0
+    latency: float = 0.0
+    calls: int = 0
+
+
+class AdaptiveRouterMiddleware(AgentMiddleware):
+    """
+    basic_model / strong_model：便宜快速的模型与推理能力更强的模型
+    threshold / margin：分数 >= threshold + margin 升级到强模型，<= threshold - margin 降回基础模型，中间保持原模型
+    latency_slo：强模型 EWMA 延迟超过该值（秒）时按比例提高升级门槛
+    max_error_rate：模型错误率 EWMA 超过该值时暂时改用另一个模型
+    stats_half_life：延迟和错误率的衰减半衰期（秒），被避开的模型过一段时间后会重新尝试；None 表示不衰减
+    budget_cost / budget_latency：单个 thread 累计费用（元）/ 模型耗时（秒）上限，超出后只用基础模型
+    max_threads：最多保留多少个 thread 的预算，超出时丢弃最久未使用的
+    """
+
+    def __init__(self, basic_model, strong_model, classifier: Callable[[list[AnyMessage]], float] | None = None,
+                 keywords: dict[str, float] = HARD_KEYWORDS, prices: dict[str, tuple[float, float]] = PRICES,
+                 threshold: float = 0.5, margin: float = 0.1, latency_slo: float = 20.0, max_error_rate: float = 0.3,
+                 stats_half_life: float | None = 300.0, budget_cost: float | None = None,
+                 budget_latency: float | None = None, max_threads: int = 10000):
+        super().__init__()
+        self.models = {"basic": basic_model, "strong": strong_model}
+        self.classifier = classifier or heuristic_classifier(KeywordMatcher(keywords))
+        self.prices = prices
+        self.threshold = threshold
+        self.margin = margin
+        self.latency_slo = latency_slo
+        self.max_error_rate = max_error_rate
+        self.budget_cost = budget_cost
+        self.budget_latency = budget_latency
+        self.stats = {tier: ModelStats(half_life=stats_half_life) for tier in self.models}
+        self.max_threads = max_threads
+        self.threads: OrderedDict[object, ThreadBudget] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cost_of(self, tier: str, message: AIMessage) -> float:
+        usage = getattr(message, "usage_metadata", None) or {}
+        price_in, price_out = self.prices.get(model_name(self.models[tier]), (0.0, 0.0))
+        return (usage.get("input_tokens", 0) * price_in + usage.get("output_tokens", 0) * price_out) / 1_000_000
+
+    @staticmethod
+    def thread_id():
+        try:
+            return get_config().get("configurable", {}).get("thread_id")
+        except RuntimeError:
+            return None
+
+    def choose(self, messages: list[AnyMessage], budget: ThreadBudget) -> tuple[str, str]:
+        """返回 (tier, 原因)"""
+        if (self.budget_cost is not None and budget.cost >= self.budget_cost) or (
+                self.budget_latency is not None and budget.latency >= self.budget_latency):
+            return "basic", "budget"
+        score = self.classifier(messages)
+        strong_latency, _ = self.stats["strong"].current()
+        threshold = self.threshold
+        if strong_latency > self.latency_slo:
+            threshold += self.margin * (strong_latency / self.latency_slo - 1)
+        if budget.model == "strong":
+            tier = "basic" if score <= threshold - self.margin else "strong"
+        elif budget.model == "basic":
+            tier = "strong" if score >= threshold + self.margin else "basic"
+        else:
+            tier = "strong" if score >= threshold else "basic"
+        other = "basic" if tier == "strong" else "strong"
+        error_rate, other_error_rate = self.stats[tier].current()[1], self.stats[other].current()[1]
+        if error_rate > self.max_error_rate >= other_error_rate:
+            return other, f"{tier} error rate {error_rate:.2f}"
+        return tier, f"score {score:.2f}"
+
+    def _before(self, request: ModelRequest) -> tuple[ThreadBudget, str]:
+        with self._lock:
+            thread_id = self.thread_id()
+            budget = self.threads.get(thread_id)
+            if budget is None:
+                budget = self.threads[thread_id] = ThreadBudget()
+                if len(self.threads) > self.max_threads:
+                    self.threads.popitem(last=False)
+            else:
+                self.threads.move_to_end(thread_id)
+            tier, reason = self.choose(request.messages, budget)
+        if tier != budget.model:
+            print(f"🔀 {model_name(self.models[tier])}（{reason}）")
+        return budget, tier
+
+    def _after(self, budget: ThreadBudget, tier: str, started: float, response: ModelResponse | None):
+        elapsed = time.perf_counter() - started
+        message = next((m for m in response.result if isinstance(m, AIMessage)), None) if response else None
+        cost = self.cost_of(tier, message) if message is not None else 0.0
+        with self._lock:
+            self.stats[tier].record(elapsed, response is None, cost)
+            if response is not None:
+                budget.model = tier
+                budget.cost += cost
+                budget.latency += elapsed
+                budget.calls += 1
+
+    def wrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        budget, tier = self._before(request)
+        started = time.perf_counter()
+        try:
+            response = handler(request.override(model=self.models[tier]))
+        except Exception:
+            self._after(budget, tier, started, None)
+            raise
+        self._after(budget, tier, started, response)
+        return response
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        budget, tier = self._before(request)
+        started = time.perf_counter()
+        try:
+            response = await handler(request.override(model=self.models[tier]))
+        except Exception:
+            self._after(budget, tier, started, None)
+            raise
+        self._after(budget, tier, started, response)
+        return response
+
+    def report(self) -> dict:
+        return {model_name(self.models[tier]): vars(stats) for tier, stats in self.stats.items()}
+
+
+if __name__ == "__main__":
+    from langchain_deepseek import ChatDeepSeek
+
+    # ① 准备两种 DeepSeek 模型
+    basic_model = ChatDeepSeek(model="deepseek-chat")        # 简单问题：快速、经济
+    reasoner_model = ChatDeepSeek(model="deepseek-reasoner") # 复杂问题：推理更强
+    router = AdaptiveRouterMiddleware(basic_model, reasoner_model, budget_cost=0.05)
+
+    # ② 创建 Agent（默认用 chat，但运行时会被中间件按需替换）
+    agent = create_agent(
+        model=basic_model,
+        tools=[],
+        middleware=[router],
+        checkpointer=InMemorySaver(),
+    )
+    config = {"configurable": {"thread_id": "1"}}
+    for question in ["你好", "请严谨地证明根号 2 是无理数", "谢谢"]:
+        result = agent.invoke({"messages": [{"role": "user", "content": question}]}, config)
+        print(result["messages"][-1].content[:100])
+    print(router.report())
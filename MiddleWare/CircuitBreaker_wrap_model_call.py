@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from langchain.agents import create_agent
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langgraph.checkpoint.memory import InMemorySaver
+
+# 按模型的熔断器 + 快速故障转移：
+# - closed：正常调用，记录最近 window 次调用的结果；失败（异常或耗时超过 slow_seconds）比例达到 failure_rate 时熔断
+# - open：熔断期间不再调用该模型，请求立即转给备用模型，不用每次都等满超时
+# - half_open：熔断 open_seconds 秒后放行一个探测请求，成功则恢复 closed，失败则重新 open
+# 可以和 ModelChoice_wrap_model_call.py / AdaptiveRouter_wrap_model_call.py 组合使用：
+# 路由中间件放在前面决定 request.model，熔断中间件放在后面决定这个模型能不能用
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def model_name(model) -> str:
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+
+def is_client_error(error: Exception) -> bool:
+    """
+    请求本身有问题（openai.BadRequestError 等 4xx，429 限流和 408 超时除外）：换模型也没用，
+    也不说明模型不可用，不计入熔断器
+    """
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+
+class CircuitBreaker:
+    def __init__(self, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_seconds: float | None = 30.0, open_seconds: float = 30.0):
+        self.window = deque(maxlen=window)   # True 表示失败
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.counters = {"calls": 0, "failures": 0, "slow_calls": 0, "opened": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """是否允许本次调用；half_open 时同一时间只放行一个探测请求"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self.probing):
+                self.probing = self.state == HALF_OPEN
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def record(self, elapsed: float, error: bool):
+        slow = self.slow_seconds is not None and elapsed > self.slow_seconds
+        failed = error or slow
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["failures"] += error
+            self.counters["slow_calls"] += slow
+            if self.state == HALF_OPEN:
+                self.probing = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self.window.clear()
+                return
+            self.window.append(failed)
+            if len(self.window) >= self.min_calls and sum(self.window) / len(self.window) >= self.failure_rate:
+                self._open()
+
+    def release(self):
+        """调用被取消（CancelledError、KeyboardInterrupt 等）或请求本身有问题时不计入结果，只释放探测名额，否则 half_open 会一直拒绝"""
+        with self._lock:
+            self.probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.counters["opened"] += 1
+        self.window.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sum(self.window) / len(self.window) if self.window else 0.0
+            return {"state": self.state, "recent_failure_rate": round(recent, 3), **self.counters}
+
+
+class CircuitBreakerMiddleware(AgentMiddleware):
+    """
+    models：按优先级排列的可用模型；请求的 request.model 不在列表中时，按列表顺序尝试
+    breaker_kwargs：传给每个模型的 CircuitBreaker 的参数
+    """
+
+    def __init__(self, models: list, verbose: bool = True, **breaker_kwargs):
+        super().__init__()
+        if not models:
+            raise ValueError("至少需要一个模型")
+        self.models = {model_name(m): m for m in models}
+        self.breakers = {name: CircuitBreaker(**breaker_kwargs) for name in self.models}
+        self.verbose = verbose
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def candidates(self, request: ModelRequest) -> list[str]:
+        """请求指定的模型排第一，其余按优先级排在后面作为备用"""
+        wanted = model_name(request.model)
+        return ([wanted] if wanted in self.models else []) + [name for name in self.models if name != wanted]
+
+    def _failover(self, name: str, reason: str, last: bool):
+        """后面还有备用模型时才计为一次故障转移；最后一个候选失败时只记录原因"""
+        if not last:
+            with self._lock:
+                self.failovers += 1
+        if self.verbose:
+            print(f"⚡ {name} {reason}，{'没有可用的备用模型' if last else '转用备用模型'}")
+
+    def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+        error = None
+        candidates = self.candidates(request)
+        for i, name in enumerate(candidates):
+            breaker = self.breakers[name]
+            last = i == len(candidates) - 1
+            if not breaker.allow():
+                self._failover(name, "已熔断", last)
+                continue
+            start = time.monotonic()
+            try:
+                response = handler(request.override(model=self.models[name]))
+            except Exception as e:
+                if is_client_error(e):
+                    breaker.release()
+                    raise
+                breaker.record(time.monotonic() - start, True)
+                self._failover(name, f"调用失败（{e!r}）", last)
+                error = e
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.record(time.monotonic() - start, False)
+            return response
+        raise error or RuntimeError("所有模型都处于熔断状态")
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        error = None
+        candidates = self.candidates(request)
+        for i, name in enumerate(candidates):
+            breaker = self.breakers[name]
+            last = i == len(candidates) - 1
+            if not breaker.allow():
+                self._failover(name, "已熔断", last)
+                continue
+            start = time.monotonic()
+            try:
+                response = await handler(request.override(model=self.models[name]))
+            except Exception as e:
+                if is_client_error(e):
+                    breaker.release()
+                    raise
+                breaker.record(time.monotonic() - start, True)
+                self._failover(name, f"调用失败（{e!r}）", last)
+                error = e
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.record(time.monotonic() - start, False)
+            return response
+        raise error or RuntimeError("所有模型都处于熔断状态")
+
+    def snapshot(self) -> dict:
+        """熔断器状态与故障转移次数，可以定期打印或上报到监控"""
+        return {"failovers": self.failovers, "breakers": {name: b.snapshot() for name, b in self.breakers.items()}}
+
+
+if __name__ == "__main__":
+    from langchain_deepseek import ChatDeepSeek
+
+    # 超时设短一些，reasoner 变慢时尽快计为失败
+    reasoner_model = ChatDeepSeek(model="deepseek-reasoner", timeout=60, max_retries=0)
+    basic_model = ChatDeepSeek(model="deepseek-chat", timeout=30, max_retries=0)
+    breaker = CircuitBreakerMiddleware([reasoner_model, basic_model], slow_seconds=45, open_seconds=60)
+
+    agent = create_agent(
+        model=reasoner_model,
+        tools=[],
+        middleware=[breaker],
+        checkpointer=InMemorySaver(),
+    )
+    config = {"configurable": {"thread_id": "1"}}
+    result = agent.invoke({"messages": [{"role": "user", "content": "证明根号 2 是无理数"}]}, config)
+    print(result["messages"][-1].content[:200])
+    print(breaker.snapshot())
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+from langchain.agents import create_agent
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.config import get_config
+
+# 保持请求前缀稳定，提高服务商前缀缓存（DeepSeek 的 prompt_cache_hit_tokens）命中率：
+# - 工具按名称排序，系统提示去掉行尾空白等无意义差异，保证相同内容序列化后逐字节相同
+# - 系统提示里随时间 / 请求变化的内容（当前时间、日期、请求 id 等）移到最后一条用户消息的末尾，
+#   前面的 系统提示 + 工具 + 历史消息 就是一个稳定前缀（历史里的用户消息不会被改写，下一轮前缀仍然不变）
+# - 记录每次调用的 输入 token / 缓存命中 token 和前缀指纹，按 agent 统计命中率和前缀变化次数
+# 应放在 middleware 列表的最后（最内层），这样看到的是其他中间件（裁剪、SkillMiddleware 过滤工具等）改写后的最终请求
+
+# 默认视为易变内容的行：包含具体的日期、时刻或 uuid 值的行。
+# 只匹配值本身，不匹配“当前时间”“today is”这类字样，否则“不要假设今天是节假日”之类的指令也会被移走
+VOLATILE_PATTERNS = (
+    r"\b\d{4}-\d{2}-\d{2}\b",
+    r"\d{4}年\d{1,2}月\d{1,2}日",
+    r"\b\d{1,2}:\d{2}:\d{2}\b",
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b",
+)
+PLACEMENTS = ("human", "system")
+VOLATILE_HEADER = "【本次请求的动态信息】\n"
+
+
+def cache_hit_tokens(message: AIMessage) -> int:
+    """优先读 usage_metadata 的 cache_read，其次读 DeepSeek 原始 usage 里的 prompt_cache_hit_tokens"""
+    usage = message.usage_metadata or {}
+    hit = (usage.get("input_token_details") or {}).get("cache_read")
+    if hit is None:
+        token_usage = message.response_metadata.get("token_usage") or {}
+        hit = token_usage.get("prompt_cache_hit_tokens") or (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    return hit or 0
+
+
+@dataclass
+class PrefixStats:
+    calls: int = 0
+    input_tokens: int = 0
+    cache_hit_tokens: int = 0
+    prefix_changes: int = 0
+    last_fingerprint: str | None = None
+    history: list[dict] = field(default_factory=list)
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.cache_hit_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+class PrefixCacheMiddleware(AgentMiddleware):
+    """
+    agent_name：统计时使用的默认名称；create_agent(name=...) 指定了名称时按运行时的 agent 名称分别统计，
+        多个 agent 共用同一实例也能区分
+    volatile_patterns：匹配到的系统提示行会被移出系统提示；传空元组则不移动
+    volatile_placement：移出的内容放在哪里
+        - "human"（默认）：追加到最后一条用户消息的末尾；没有用户消息时不移动
+        - "system"：作为一条系统消息放在所有消息之后。部分服务商不接受用户消息之后的系统消息，确认支持时再用
+    history_size：每个 agent 保留最近多少次调用的明细
+    """
+
+    def __init__(self, agent_name: str = "agent", volatile_patterns=VOLATILE_PATTERNS, volatile_placement: str = "human",
+                 history_size: int = 100, verbose: bool = False):
+        super().__init__()
+        if volatile_placement not in PLACEMENTS:
+            raise ValueError(f"volatile_placement 只能是 {PLACEMENTS} 之一")
+        self.agent_name = agent_name
+        self.volatile = re.compile("|".join(volatile_patterns), re.IGNORECASE) if volatile_patterns else None
+        self.volatile_placement = volatile_placement
+        self.history_size = history_size
+        self.verbose = verbose
+        self.stats: dict[str, PrefixStats] = {}
+        self._schemas: dict[int, tuple[object, str]] = {}   # id(tool) -> (tool, 规范化后的 schema JSON)
+        self._lock = threading.Lock()
+
+    def tool_schema(self, tool) -> str:
+        """工具 schema 按 id 缓存，序列化时 key 排序"""
+        cached = self._schemas.get(id(tool))
+        if cached is None or cached[0] is not tool:
+            schema = tool if isinstance(tool, dict) else convert_to_openai_tool(tool)
+            cached = self._schemas[id(tool)] = (tool, json.dumps(schema, ensure_ascii=False, sort_keys=True))
+        return cached[1]
+
+    @staticmethod
+    def tool_name(tool) -> str:
+        if isinstance(tool, dict):
+            return tool.get("name") or tool.get("function", {}).get("name", "")
+        return tool.name
+
+    def split_system(self, text: str) -> tuple[str, str]:
+        """返回 (稳定部分, 易变部分)"""
+        lines = [line.rstrip() for line in text.strip().splitlines()]
+        if self.volatile is None:
+            return "\n".join(lines), ""
+        stable = [line for line in lines if not self.volatile.search(line)]
+        volatile = [line for line in lines if self.volatile.search(line)]
+        return "\n".join(stable), "\n".join(volatile)
+
+    def place_volatile(self, messages: list, volatile: str) -> list | None:
+        """把易变内容放到消息里，返回新的消息列表；放不下（没有用户消息）时返回 None"""
+        if self.volatile_placement == "system":
+            return [*messages, SystemMessage(content=VOLATILE_HEADER + volatile)]
+        index = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), None)
+        if index is None:
+            return None
+        message = messages[index]
+        text = "\n\n" + VOLATILE_HEADER + volatile
+        if isinstance(message.content, str):
+            content = message.content + text
+        else:
+            content = [*message.content, {"type": "text", "text": text}]
+        return [*messages[:index], message.model_copy(update={"content": content}), *messages[index + 1:]]
+
+    def canonicalize(self, request: ModelRequest) -> tuple[ModelRequest, str]:
+        """返回改写后的请求和前缀指纹（系统提示 + 工具 schema 的哈希）"""
+        tools = sorted(request.tools or [], key=self.tool_name)
+        system = request.system_message
+        system_text = system.text if system is not None else ""
+        stable, volatile = self.split_system(system_text)
+        overrides = {"tools": tools}
+        messages = self.place_volatile(request.messages, volatile) if volatile else None
+        if volatile and messages is None:   # 没有用户消息可以承载，系统提示保持原样
+            stable = "\n".join(line.rstrip() for line in system_text.strip().splitlines())
+        if messages is not None:
+            overrides["messages"] = messages
+        if system is not None:
+            overrides["system_message"] = SystemMessage(content=stable) if stable else None
+        digest = hashlib.sha1(stable.encode("utf-8"))
+        for tool in tools:
+            digest.update(self.tool_schema(tool).encode("utf-8"))
+        return request.override(**overrides), digest.hexdigest()[:12]
+
+    def current_agent(self) -> str:
+        """运行时的 agent 名称（create_agent 写在 config metadata 的 lc_agent_name），没有时用 agent_name"""
+        try:
+            return get_config().get("metadata", {}).get("lc_agent_name") or self.agent_name
+        except RuntimeError:
+            return self.agent_name
+
+    def record(self, fingerprint: str, response: ModelResponse, agent_name: str | None = None):
+        message = next((m for m in response.result if isinstance(m, AIMessage)), None)
+        if message is None:
+            return
+        input_tokens = (message.usage_metadata or {}).get("input_tokens", 0)
+        hit = cache_hit_tokens(message)
+        agent_name = agent_name or self.agent_name
+        with self._lock:
+            stats = self.stats.setdefault(agent_name, PrefixStats())
+            stats.calls += 1
+            stats.input_tokens += input_tokens
+            stats.cache_hit_tokens += hit
+            if stats.last_fingerprint is not None and stats.last_fingerprint != fingerprint:
+                stats.prefix_changes += 1
+            stats.last_fingerprint = fingerprint
+            stats.history.append({"fingerprint": fingerprint, "input_tokens": input_tokens, "cache_hit_tokens": hit})
+            del stats.history[:-self.history_size]
+        if self.verbose:
+            print(f"[PrefixCache] {agent_name} 前缀 {fingerprint}：命中 {hit}/{input_tokens} tokens，"
+                  f"累计命中率 {stats.hit_ratio:.1%}")
+
+    def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+        request, fingerprint = self.canonicalize(request)
+        agent_name = self.current_agent()
+        response = handler(request)
+        self.record(fingerprint, response, agent_name)
+        return response
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        request, fingerprint = self.canonicalize(request)
+        agent_name = self.current_agent()
+        response = await handler(request)
+        self.record(fingerprint, response, agent_name)
+        return response
+
+    def report(self) -> dict:
+        return {name: {"calls": s.calls, "input_tokens": s.input_tokens, "cache_hit_tokens": s.cache_hit_tokens,
+                       "hit_ratio": round(s.hit_ratio, 4), "prefix_changes": s.prefix_changes}
+                for name, s in self.stats.items()}
+
+
+if __name__ == "__main__":
+    import time
+    from langchain_deepseek import ChatDeepSeek
+
+    # 初始化模型
+    model = ChatDeepSeek(model="deepseek-chat")
+    prefix_cache = PrefixCacheMiddleware("demo", verbose=True)
+
+    agent = create_agent(
+        model=model,
+        tools=[],
+        middleware=[prefix_cache],
+        system_prompt="你是一个简洁的中文助手。\n" + "回答时先给结论，再给理由。\n" * 200
+                      + f"当前时间：{time.strftime('%Y-%m-%d %H:%M:%S')}",
+        checkpointer=InMemorySaver(),
+    )
+    config = {"configurable": {"thread_id": "1"}}
+    for question in ["1+1 等于几？", "2+2 呢？", "3+3 呢？"]:
+        agent.invoke({"messages": [{"role": "user", "content": question}]}, config)
+    print(prefix_cache.report())
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from langchain.agents import create_agent, AgentState
+from langchain.agents.middleware import AgentMiddleware
+from langchain.messages import RemoveMessage
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage, get_buffer_string
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.config import get_config
+from langgraph.runtime import Runtime
+
+from TokenTrim_before_model import TokenBudgetTrimMiddleware, approximate_tokens
+
+# 滚动摘要压缩：历史变长时把旧消息总结成一条摘要，而不是像 trim_messages 那样直接丢掉
+# - 超过软阈值 soft_tokens：在后台线程里开始总结“将被挤出”的那段旧消息，本轮照常调用模型，不增加延迟
+# - 之后某一轮摘要已经完成：用摘要替换那段消息（摘要沿用那段第一条消息的 id，原位替换，其余按 id 删除）
+# - 超过硬阈值 hard_tokens：只有这时才会等待摘要完成；摘要失败则退化为直接删除那段消息
+# 上一次的摘要本身也在“旧消息”里，会被下一次摘要吸收，所以始终只有一条滚动摘要
+
+SUMMARY_PROMPT = """你负责压缩对话历史。请把下面的对话总结成一段简洁的中文摘要，
+保留用户的身份信息、偏好、已确认的事实、做出的决定和尚未完成的任务，省略寒暄和重复内容。
+如果对话中已经有“之前对话的摘要”，把它和新内容合并成一份摘要。只输出摘要本身。"""
+SUMMARY_PREFIX = "以下是之前对话的摘要：\n"
+
+
+@dataclass
+class PendingSummary:
+    ids: list[str]            # 被总结的那段消息的 id
+    future: Future
+    started: float
+
+
+class RollingSummaryMiddleware(AgentMiddleware):
+    """
+    summary_model：用于总结的模型，建议用便宜、快速的模型
+    soft_tokens：超过后在后台开始总结
+    hard_tokens：超过后必须等摘要完成再调用模型
+    keep_tokens：总结时保留最近多少 token 的消息不动（工具调用与结果成对保留）
+    """
+
+    def __init__(self, summary_model, soft_tokens: int = 8_000, hard_tokens: int = 16_000,
+                 keep_tokens: int = 3_000, token_counter=approximate_tokens, max_workers: int = 2):
+        super().__init__()
+        if not keep_tokens < soft_tokens <= hard_tokens:
+            raise ValueError("需要 keep_tokens < soft_tokens <= hard_tokens")
+        self.summary_model = summary_model
+        self.soft_tokens = soft_tokens
+        self.hard_tokens = hard_tokens
+        # 复用按 token 预算裁剪的逻辑（含 token 计数缓存、工具调用分组）来确定要总结的那段消息
+        self.window = TokenBudgetTrimMiddleware(max_tokens=keep_tokens, keep_first=False, token_counter=token_counter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary")
+        self._pending: dict[Any, PendingSummary] = {}   # thread_id -> 后台摘要任务
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0    # 硬阈值处累计等待的时间
+
+    def summarize(self, messages: list[AnyMessage]) -> str:
+        response = self.summary_model.invoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=get_buffer_string(messages)),
+        ])
+        return response.content
+
+    @staticmethod
+    def thread_id():
+        try:
+            return get_config().get("configurable", {}).get("thread_id")
+        except RuntimeError:
+            return None
+
+    def _apply(self, messages: list[AnyMessage], pending: PendingSummary) -> dict[str, Any] | None:
+        """用摘要替换那段消息；期间消息已被别的逻辑删除时只处理仍然存在的部分"""
+        present = {m.id for m in messages}
+        ids = [i for i in pending.ids if i in present]
+        if not ids:
+            return None
+        try:
+            summary = pending.future.result()
+        except Exception as e:
+            print(f"⚠️ 摘要失败：{e}")
+            return None
+        self.window.forget(ids)
+        print(f"🗜️ 用摘要替换 {len(ids)} 条旧消息（后台耗时 {time.perf_counter() - pending.started:.1f}s）")
+        head = HumanMessage(content=SUMMARY_PREFIX + summary, id=ids[0], additional_kwargs={"summary": True})
+        return {"messages": [head, *[RemoveMessage(id=i) for i in ids[1:]]]}
+
+    def _start(self, messages: list[AnyMessage]) -> PendingSummary | None:
+        evicted = [m for m in self.window.select(messages) if m.id is not None]
+        if not evicted:
+            return None
+        return PendingSummary([m.id for m in evicted], self.executor.submit(self.summarize, evicted), time.perf_counter())
+
+    def _pending_for(self, messages: list[AnyMessage], thread) -> tuple[PendingSummary | None, int]:
+        total = sum(self.window.count(m) for m in messages)
+        with self._lock:
+            pending = self._pending.get(thread)
+            if pending is None and total > self.soft_tokens:
+                pending = self._pending[thread] = self._start(messages)
+        return pending, total
+
+    def before_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        messages, thread = state["messages"], self.thread_id()
+        pending, total = self._pending_for(messages, thread)
+        if pending is None:
+            return None
+        if not pending.future.done():
+            if total <= self.hard_tokens:
+                return None
+            start = time.perf_counter()
+            pending.future.exception()    # 阻塞等待完成，异常在 _apply 中处理
+            self.waited_seconds += time.perf_counter() - start
+        with self._lock:
+            self._pending.pop(thread, None)
+        update = self._apply(messages, pending)
+        if update is None and total > self.hard_tokens:
+            # 摘要失败，只能直接删除这段消息来保证不超出上下文
+            return {"messages": [RemoveMessage(id=i) for i in pending.ids if i in {m.id for m in messages}]}
+        return update
+
+    async def abefore_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        messages, thread = state["messages"], self.thread_id()
+        pending, total = self._pending_for(messages, thread)
+        if pending is not None and not pending.future.done() and total > self.hard_tokens:
+            start = time.perf_counter()
+            await asyncio.wait([asyncio.wrap_future(pending.future)])
+            self.waited_seconds += time.perf_counter() - start
+        return self.before_model(state, runtime)
+
+
+if __name__ == "__main__":
+    from langchain_deepseek import ChatDeepSeek
+
+    # 初始化模型
+    model = ChatDeepSeek(model="deepseek-chat")
+
+    agent = create_agent(
+        model=model,
+        tools=[],
+        middleware=[RollingSummaryMiddleware(model, soft_tokens=400, hard_tokens=800, keep_tokens=200)],
+        checkpointer=InMemorySaver(),
+    )
+    config = {"configurable": {"thread_id": "1"}}
+    for question in ["你好，我叫小明，住在杭州", "推荐三本科幻小说并简单介绍", "再推荐三部科幻电影", "我叫什么名字，住在哪里？"]:
+        result = agent.invoke({"messages": [{"role": "user", "content": question}]}, config)
+        print(result["messages"][-1].content)
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from typing import Any, Callable
+
+from langchain.agents import create_agent, AgentState
+from langchain.agents.middleware import AgentMiddleware
+from langchain.messages import RemoveMessage
+from langchain_core.messages import AnyMessage, AIMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.runtime import Runtime
+
+# 按 token 预算裁剪消息历史（对比 InfoCompress_before_model.py 按条数裁剪）：
+# - 每条消息的 token 数按消息 id 缓存，每轮只需要统计新增的消息
+# - 只对真正滑出窗口的消息发 RemoveMessage(id)，不再 REMOVE_ALL_MESSAGES 后整段重写，检查点里只多几条删除记录
+# - 带 tool_calls 的 AIMessage 和它对应的 ToolMessage 作为一个整体保留或删除，避免出现孤立的工具结果
+
+# 各模型的上下文窗口（token），未列出的模型使用 DEFAULT_CONTEXT_WINDOW
+MODEL_CONTEXT_WINDOWS = {
+    "deepseek-chat": 64_000,
+    "deepseek-reasoner": 64_000,
+    "qwen-plus": 128_000,
+    "qwen-max": 32_000,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+}
+DEFAULT_CONTEXT_WINDOW = 32_000
+CHARS_PER_TOKEN = 2.0        # 估算用：中文大约 1~2 个字一个 token，英文大约 4 个字符一个 token
+CACHE_SIZE = 10_000          # 最多缓存多少条消息的 token 数
+
+
+def approximate_tokens(message: AnyMessage) -> int:
+    """不依赖分词器的估算，偏保守（中文按每 2 个字 1 个 token）"""
+    return count_tokens_approximately([message], chars_per_token=CHARS_PER_TOKEN)
+
+
+def context_window(model) -> int:
+    """model 可以是模型名或聊天模型实例"""
+    name = model if isinstance(model, str) else getattr(model, "model_name", None) or getattr(model, "model", "")
+    return MODEL_CONTEXT_WINDOWS.get(name, DEFAULT_CONTEXT_WINDOW)
+
+
+class TokenBudgetTrimMiddleware(AgentMiddleware):
+    """
+    在模型调用前把消息历史裁剪到 token 预算以内：保留首条消息（通常是系统提示）+ 尽可能多的最近消息
+
+    max_tokens：预算；不指定时为 模型上下文窗口 - reserve_tokens（留给回复）
+    token_counter：单条消息计数函数，默认 approximate_tokens；
+                   可以换成 lambda m: model.get_num_tokens_from_messages([m]) 得到精确值
+    """
+
+    def __init__(self, model=None, max_tokens: int | None = None, reserve_tokens: int = 4_000,
+                 keep_first: bool = True, token_counter: Callable[[AnyMessage], int] = approximate_tokens):
+        super().__init__()
+        if max_tokens is None:
+            max_tokens = context_window(model) - reserve_tokens
+        self.max_tokens = max_tokens
+        self.keep_first = keep_first
+        self.token_counter = token_counter
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self.counted = 0      # 实际调用 token_counter 的次数，便于观察缓存效果
+
+    def count(self, message: AnyMessage) -> int:
+        """按消息 id 缓存 token 数；没有 id 的消息每次重新计算"""
+        if message.id is None:
+            self.counted += 1
+            return self.token_counter(message)
+        tokens = self._cache.get(message.id)
+        if tokens is None:
+            self.counted += 1
+            tokens = self._cache[message.id] = self.token_counter(message)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(message.id)
+        return tokens
+
+    def forget(self, ids):
+        """消息被删除或原位替换后，丢弃其缓存的 token 数"""
+        for message_id in ids:
+            self._cache.pop(message_id, None)
+
+    @staticmethod
+    def group_messages(messages: list[AnyMessage]) -> list[list[AnyMessage]]:
+        """把 AIMessage(tool_calls) 与紧随其后的 ToolMessage 分成一组，其余消息各自一组"""
+        groups: list[list[AnyMessage]] = []
+        for message in messages:
+            if isinstance(message, ToolMessage) and groups and (
+                    isinstance(groups[-1][0], AIMessage) and groups[-1][0].tool_calls):
+                groups[-1].append(message)
+            else:
+                groups.append([message])
+        return groups
+
+    def select(self, messages: list[AnyMessage]) -> list[AnyMessage]:
+        """返回需要删除的消息；不需要裁剪时返回空列表"""
+        head = messages[:1] if self.keep_first else []
+        budget = self.max_tokens - sum(self.count(m) for m in head)
+        groups = self.group_messages(messages[len(head):])
+
+        # 从最近的一组往前累加，超出预算就停；最近一组无论多大都保留
+        start = len(groups)
+        for i in range(len(groups) - 1, -1, -1):
+            tokens = sum(self.count(m) for m in groups[i])
+            if budget - tokens < 0 and start < len(groups):
+                break
+            budget -= tokens
+            start = i
+        return [m for group in groups[:start] for m in group]
+
+    def before_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        removed = self.select(state["messages"])
+        if not removed:
+            return None
+        self.forget(m.id for m in removed)
+        print(f"✂️ 按 token 预算 {self.max_tokens} 修剪消息：删除最早的 {len(removed)} 条")
+        return {"messages": [RemoveMessage(id=m.id) for m in removed if m.id is not None]}
+
+    async def abefore_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        return self.before_model(state, runtime)
+
+
+if __name__ == "__main__":
+    from langchain_deepseek import ChatDeepSeek
+
+    # 初始化模型
+    model = ChatDeepSeek(model="deepseek-chat")
+
+    agent = create_agent(
+        model=model,
+        tools=[],
+        middleware=[TokenBudgetTrimMiddleware(model)],
+        checkpointer=InMemorySaver(),
+    )
+    config = {"configurable": {"thread_id": "1"}}
+    for question in ["你好，我叫小明", "给我讲一个笑话", "我叫什么名字？"]:
+        result = agent.invoke({"messages": [{"role": "user", "content": question}]}, config)
+        print(result["messages"][-1].content)
@@ -0,0 +1,75 @@
+from typing import Any
+
+from langchain.agents import create_agent, AgentState
+from langchain.agents.middleware import AgentMiddleware
+from langchain.messages import RemoveMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.runtime import Runtime
+
+from TokenTrim_before_model import TokenBudgetTrimMiddleware, approximate_tokens
+
+# 带高低水位的滑动窗口清理（对比 InfoDel_after_model.py 每轮删两条）：
+# 历史超过高水位 high 时，一次性删到低水位 low 以下；在 low ~ high 之间不做任何事。
+# 每次删除都会产生一次状态更新和检查点写入，批量删除把“每轮一次”降到“每 (high-low) 轮左右一次”。
+# 大小可以按消息条数（unit="messages"）或 token 数（unit="tokens"）计算，工具调用与结果成对删除。
+
+
+class WatermarkCleanupMiddleware(AgentMiddleware):
+    """
+    high / low：高、低水位，单位由 unit 决定
+    stats：calls 为 after_model 调用次数，cleanups 为实际删除次数，
+           writes_saved 为“超过低水位就删”的逐轮策略会多出的删除（状态写入）次数
+    """
+
+    def __init__(self, high: int = 12, low: int = 4, unit: str = "messages", token_counter=approximate_tokens):
+        super().__init__()
+        if unit not in ("messages", "tokens"):
+            raise ValueError("unit 必须是 messages 或 tokens")
+        if not 0 < low < high:
+            raise ValueError("需要 0 < low < high")
+        self.high = high
+        self.low = low
+        self.unit = unit
+        counter = token_counter if unit == "tokens" else (lambda message: 1)
+        self.window = TokenBudgetTrimMiddleware(max_tokens=low, keep_first=False, token_counter=counter)
+        self.stats = {"calls": 0, "cleanups": 0, "removed": 0, "writes_saved": 0}
+
+    def after_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        messages = state["messages"]
+        size = sum(self.window.count(m) for m in messages)
+        self.stats["calls"] += 1
+        if size <= self.high:
+            if size > self.low:
+                self.stats["writes_saved"] += 1
+            return None
+        removed = [m for m in self.window.select(messages) if m.id is not None]
+        if not removed:
+            return None
+        self.window.forget(m.id for m in removed)
+        self.stats["cleanups"] += 1
+        self.stats["removed"] += len(removed)
+        print(f"🧹 超过高水位 {self.high} {self.unit}（当前 {size}），删除最早的 {len(removed)} 条消息；"
+              f"累计节省 {self.stats['writes_saved']} 次状态写入")
+        return {"messages": [RemoveMessage(id=m.id) for m in removed]}
+
+    async def aafter_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        return self.after_model(state, runtime)
+
+
+if __name__ == "__main__":
+    from langchain_deepseek import ChatDeepSeek
+
+    # 初始化模型
+    model = ChatDeepSeek(model="deepseek-chat")
+    cleanup = WatermarkCleanupMiddleware(high=8, low=4)
+
+    agent = create_agent(
+        model,
+        tools=[],
+        middleware=[cleanup],
+        checkpointer=InMemorySaver(),
+    )
+    config = {"configurable": {"thread_id": "1"}}
+    for i in range(8):
+        agent.invoke({"messages": [{"role": "user", "content": f"第 {i} 个问题：1+{i} 等于几？"}]}, config)
+    print(cleanup.stats)
@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+from psycopg import sql
+
+# couplet collection 的 pgvector ANN 索引管理与查询调优
+#
+# langchain_pg_embedding.embedding 列没有固定维度，不能直接建 HNSW / IVFFlat 索引，
+# 这里在表达式 embedding::vector(dim)（float16 时为 halfvec(dim)）上建只覆盖本 collection 的部分索引；
+# 查询必须使用同样的表达式和 collection_id 条件才会走索引，所以检索统一走 search()，
+# 而不是 PGVector.similarity_search（它按未转换的 embedding 排序，只能全表扫描）
+
+collection_name="couplet"
+TUNING_PATH="MulitAgent/couplet_index_tuning.json"
+METHODS=("hnsw","ivfflat")
+PRECISIONS=("float32","float16")     # float16 对应 pgvector >= 0.7 的 halfvec
+RERANK_FACTOR=4                      # float16 索引粗排候选数 = k * RERANK_FACTOR，再用原始 vector 精排
+
+def index_name(collection:str=collection_name)->str:
+    return f"{collection}_ann_idx"
+
+def vector_type(precision:str,dim:int)->str:
+    return f"halfvec({dim})" if precision=="float16" else f"vector({dim})"
+
+def get_dimension(conn,collection_id)->int:
+    dim=conn.execute("SELECT vector_dims(embedding) FROM langchain_pg_embedding WHERE collection_id = %s LIMIT 1",
+                     (collection_id,)).fetchone()
+    if dim is None:
+        raise ValueError("collection 中没有向量，无法确定维度")
+    return dim[0]
+
+def index_info(conn,collection:str=collection_name)->dict|None:
+    """返回当前索引的定义与大小，不存在时返回 None"""
+    row=conn.execute("""
+        SELECT i.indexdef, pg_relation_size(c.oid), pg_size_pretty(pg_relation_size(c.oid))
+        FROM pg_indexes i JOIN pg_class c ON c.relname = i.indexname
+        WHERE i.indexname = %s
+    """,(index_name(collection),)).fetchone()
+    if row is None:
+        return None
+    indexdef,size,pretty=row
+    method="hnsw" if "USING hnsw" in indexdef else "ivfflat"
+    return {"name":index_name(collection),"method":method,"precision":"float16" if "halfvec" in indexdef else "float32",
+            "definition":indexdef,"bytes":size,"size":pretty}
+
+def default_lists(rows:int)->int:
+    """pgvector 建议：100 万行以内 rows/1000，以上 sqrt(rows)"""
+    return max(1,rows//1000) if rows<=1_000_000 else int(rows**0.5)
+
+def create_index(conn,collection_id,method:str="hnsw",precision:str="float32",m:int=16,ef_construction:int=64,
+                 lists:int|None=None,maintenance_work_mem:str|None="1GB",concurrently:bool=True)->dict:
+    """
+    在 couplet collection 上创建 ANN 索引（已存在时先删除）
+    - hnsw：m / ef_construction 越大召回越高，建索引越慢、索引越大
+    - ivfflat：lists 默认按行数估算；需要在数据导入后再建，聚类中心才有代表性
+    concurrently=True 时建索引不阻塞写入（不能放在事务里执行，要求 autocommit 连接）
+    """
+    if method not in METHODS:
+        raise ValueError(f"method 必须是 {METHODS} 之一")
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision 必须是 {PRECISIONS} 之一")
+    dim=get_dimension(conn,collection_id)
+    rows=conn.execute("SELECT count(*) FROM langchain_pg_embedding WHERE collection_id = %s",(collection_id,)).fetchone()[0]
+    opclass=("halfvec" if precision=="float16" else "vector")+"_cosine_ops"
+    if method=="hnsw":
+        with_clause=sql.SQL("WITH (m = {}, ef_construction = {})").format(sql.Literal(m),sql.Literal(ef_construction))
+    else:
+        with_clause=sql.SQL("WITH (lists = {})").format(sql.Literal(lists or default_lists(rows)))
+
+    drop_index(conn,concurrently=concurrently)
+    if maintenance_work_mem:
+        conn.execute(sql.SQL("SET maintenance_work_mem = {}").format(sql.Literal(maintenance_work_mem)))
+    start=time.perf_counter()
+    conn.execute(sql.SQL("""
+        CREATE INDEX {concurrently} {name} ON langchain_pg_embedding
+        USING {method} ((embedding::{vtype}) {opclass}) {with_clause}
+        WHERE collection_id = {collection_id}
+    """).format(
+        concurrently=sql.SQL("CONCURRENTLY" if concurrently else ""),
+        name=sql.Identifier(index_name()),
+        method=sql.SQL(method),
+        vtype=sql.SQL(vector_type(precision,dim)),
+        opclass=sql.SQL(opclass),
+        with_clause=with_clause,
+        collection_id=sql.Literal(str(collection_id)),
+    ))
+    if not conn.autocommit:
+        conn.commit()
+    info=index_info(conn)
+    info["build_seconds"]=time.perf_counter()-start
+    print(f"已创建 {method}/{precision} 索引 {info['name']}（{rows} 行，{info['size']}），耗时 {info['build_seconds']:.1f}s")
+    return info
+
+def drop_index(conn,concurrently:bool=True):
+    conn.execute(sql.SQL("DROP INDEX {} IF EXISTS {}").format(
+        sql.SQL("CONCURRENTLY" if concurrently else ""),sql.Identifier(index_name())))
+    if not conn.autocommit:
+        conn.commit()
+
+def rebuild_index(conn,concurrently:bool=True):
+    """大量写入 / 删除之后重建，IVFFlat 的聚类中心也会按当前数据重新计算"""
+    if index_info(conn) is None:
+        raise ValueError("索引不存在，请先 create")
+    start=time.perf_counter()
+    conn.execute(sql.SQL("REINDEX INDEX {} {}").format(
+        sql.SQL("CONCURRENTLY" if concurrently else ""),sql.Identifier(index_name())))
+    if not conn.autocommit:
+        conn.commit()
+    print(f"索引已重建，耗时 {time.perf_counter()-start:.1f}s")
+
+def load_tuning(path:str=TUNING_PATH)->dict:
+    """sweep 选出的查询参数，例如 {"ef_search": 40} 或 {"probes": 8}"""
+    if os.path.exists(path):
+        with open(path,"r",encoding="utf-8") as f:
+            return json.load(f).get("selected",{})
+    return {}
+
+def search(conn,collection_id,query,k:int=5,ef_search:int|None=None,probes:int|None=None,
+           precision:str|None=None,exact:bool=False,rerank:int=RERANK_FACTOR)->list[tuple[str,str,float]]:
+    """
+    按余弦相似度检索，返回 [(id, 文本, 相似度), ...]
+    ef_search / probes 只对本次查询生效（SET LOCAL）；precision 不指定时跟随当前索引；float16 时先粗排 k*rerank 个候选再精排
+    exact=True 时按原始 embedding 排序，不走索引，用作召回率的真值
+    """
+    literal="["+",".join(map(str,query))+"]"
+    dim=len(query)
+    with conn.transaction():
+        if exact:
+            rows=conn.execute("""
+                SELECT id, document, 1 - (embedding <=> %(q)s::vector) FROM langchain_pg_embedding
+                WHERE collection_id = %(c)s ORDER BY embedding <=> %(q)s::vector LIMIT %(k)s
+            """,{"q":literal,"c":collection_id,"k":k}).fetchall()
+            return [(doc_id,document,float(similarity)) for doc_id,document,similarity in rows]
+        if ef_search is not None:
+            conn.execute(sql.SQL("SET LOCAL hnsw.ef_search = {}").format(sql.Literal(ef_search)))
+        if probes is not None:
+            conn.execute(sql.SQL("SET LOCAL ivfflat.probes = {}").format(sql.Literal(probes)))
+        if precision is None:
+            info=index_info(conn)
+            precision=info["precision"] if info else "float32"
+        vtype=sql.SQL(vector_type(precision,dim))
+        # collection_id 以字面量写入，规划器才能匹配部分索引的 WHERE 条件
+        if precision=="float16":
+            query_sql=sql.SQL("""
+                SELECT id, document, 1 - (embedding <=> %(q)s::vector) AS similarity FROM (
+                    SELECT id, document, embedding FROM langchain_pg_embedding
+                    WHERE collection_id = {c}
+                    ORDER BY embedding::{vtype} <=> %(q)s::{vtype} LIMIT %(n)s
+                ) candidates ORDER BY similarity DESC LIMIT %(k)s
+            """)
+        else:
+            query_sql=sql.SQL("""
+                SELECT id, document, 1 - (embedding::{vtype} <=> %(q)s::{vtype}) FROM langchain_pg_embedding
+                WHERE collection_id = {c}
+                ORDER BY embedding::{vtype} <=> %(q)s::{vtype} LIMIT %(k)s
+            """)
+        rows=conn.execute(query_sql.format(c=sql.Literal(str(collection_id)),vtype=vtype),
+                          {"q":literal,"n":k*max(rerank,1),"k":k}).fetchall()
+    return [(doc_id,document,float(similarity)) for doc_id,document,similarity in rows]
+
+def sample_queries(conn,collection_id,n:int=100,noise:float=0.05,seed:int=0)->list[list[float]]:
+    """从库中随机取 n 条向量并加噪声作为查询，避免“查自己”让召回率虚高"""
+    from pgvector.psycopg import register_vector
+    register_vector(conn)
+    rows=conn.execute("""
+        SELECT embedding FROM langchain_pg_embedding WHERE collection_id = %s ORDER BY random() LIMIT %s
+    """,(collection_id,n)).fetchall()
+    rng=np.random.default_rng(seed)
+    queries=[]
+    for (vector,) in rows:
+        vector=np.asarray(vector,dtype=np.float32)
+        vector=vector+noise*np.linalg.norm(vector)/np.sqrt(len(vector))*rng.standard_normal(len(vector)).astype(np.float32)
+        queries.append([float(x) for x in vector])
+    return queries
+
+def sweep(conn,collection_id,queries:list[list[float]],k:int=5,target_recall:float=0.95,
+          values:list[int]|None=None,path:str|None=TUNING_PATH)->dict:
+    """
+    召回率 / 延迟扫描：对当前索引依次尝试 ef_search（HNSW）或 probes（IVFFlat），
+    以不走索引的精确检索为真值，选出满足 target_recall 的最快设置并写入 path
+    """
+    info=index_info(conn)
+    if info is None:
+        raise ValueError("索引不存在，请先 create")
+    param="ef_search" if info["method"]=="hnsw" else "probes"
+    if values is None:
+        values=[10,20,40,80,160,320] if param=="ef_search" else [1,2,4,8,16,32,64]
+    values=[v for v in values if param=="probes" or v>=k]
+    truth=[{doc_id for doc_id,_,_ in search(conn,collection_id,q,k,exact=True)} for q in queries]
+
+    results=[]
+    for value in values:
+        latencies,hits=[],0
+        for q,expected in zip(queries,truth):
+            start=time.perf_counter()
+            found=search(conn,collection_id,q,k,precision=info["precision"],**{param:value})
+            latencies.append(time.perf_counter()-start)
+            hits+=len({doc_id for doc_id,_,_ in found}&expected)
+        latencies.sort()
+        result={param:value,"recall":hits/(k*len(queries)),
+                "mean_ms":1000*sum(latencies)/len(latencies),
+                "p95_ms":1000*latencies[int(0.95*(len(latencies)-1))]}
+        results.append(result)
+        print(f"  {param}={value:<4} recall@{k}={result['recall']:.3f}  mean={result['mean_ms']:.2f}ms  p95={result['p95_ms']:.2f}ms")
+
+    passing=[r for r in results if r["recall"]>=target_recall]
+    best=min(passing,key=lambda r:r["mean_ms"]) if passing else max(results,key=lambda r:r["recall"])
+    report={"index":info["definition"],"k":k,"target_recall":target_recall,"queries":len(queries),
+            "results":results,"selected":{param:best[param]}}
+    if not passing:
+        print(f"没有设置达到 recall {target_recall}，选用召回最高的 {param}={best[param]}")
+    else:
+        print(f"选用 {param}={best[param]}（recall {best['recall']:.3f}，平均 {best['mean_ms']:.2f}ms）")
+    if path:
+        with open(path,"w",encoding="utf-8") as f:
+            json.dump(report,f,ensure_ascii=False,indent=2)
+    return report
+
+if __name__ == "__main__":
+    import psycopg
+    from CoupletLoader import connection,get_collection_id
+
+    parser=argparse.ArgumentParser(description="couplet collection 的 pgvector ANN 索引管理")
+    sub=parser.add_subparsers(dest="command",required=True)
+    create=sub.add_parser("create",help="创建（或替换）索引")
+    create.add_argument("--method",choices=METHODS,default="hnsw")
+    create.add_argument("--precision",choices=PRECISIONS,default="float32")
+    create.add_argument("--m",type=int,default=16)
+    create.add_argument("--ef-construction",type=int,default=64)
+    create.add_argument("--lists",type=int,default=None)
+    sub.add_parser("rebuild",help="重建索引")
+    sub.add_parser("drop",help="删除索引")
+    sub.add_parser("info",help="查看索引")
+    tune=sub.add_parser("sweep",help="扫描 ef_search / probes，自动选择查询参数")
+    tune.add_argument("--queries",type=int,default=100)
+    tune.add_argument("--k",type=int,default=5)
+    tune.add_argument("--target-recall",type=float,default=0.95)
+    tune.add_argument("--values",type=int,nargs="+",default=None)
+    tune.add_argument("--output",default=TUNING_PATH)
+    args=parser.parse_args()
+
+    # CREATE / DROP / REINDEX CONCURRENTLY 不能在事务中执行
+    with psycopg.connect(connection.replace("+psycopg",""),autocommit=True) as conn:
+        collection_id=get_collection_id(conn)
+        if args.command=="create":
+            create_index(conn,collection_id,args.method,args.precision,args.m,args.ef_construction,args.lists)
+        elif args.command=="rebuild":
+            rebuild_index(conn)
+        elif args.command=="drop":
+            drop_index(conn)
+            print("索引已删除")
+        elif args.command=="info":
+            print(json.dumps(index_info(conn),ensure_ascii=False,indent=2))
+        else:
+            sweep(conn,collection_id,sample_queries(conn,collection_id,args.queries),args.k,
+                  args.target_recall,args.values,args.output)
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+
+# 对联向量的低精度存储与检索
+# - float16：直接降精度，内存减半
+# - int8：按维度做标量量化（每一维独立的 min / scale），内存为 float32 的 1/4
+# 先用低精度向量粗排出 k*RERANK_FACTOR 个候选，再用磁盘上（内存映射）的 float32 原始向量精排，
+# 常驻内存的只有低精度向量，float32 只读取候选所在的几行
+
+PRECISIONS=("float32","float16","int8")
+INDEX_DIR="MulitAgent/couplet_index"
+RERANK_FACTOR=4       # 粗排候选数 = k * RERANK_FACTOR
+BLOCK_ROWS=1024       # 低精度向量分块转 float32 打分：块小到能留在 CPU 缓存里，转换和乘法都更快
+
+def normalize(matrix:np.ndarray)->np.ndarray:
+    """按行归一化，之后点积即余弦相似度"""
+    norms=np.linalg.norm(matrix,axis=1,keepdims=True)
+    norms[norms==0]=1.0
+    return (matrix/norms).astype(np.float32)
+
+def quantize_int8(vectors:np.ndarray,block_rows:int=65536)->tuple[np.ndarray,np.ndarray,np.ndarray]:
+    """
+    标量量化：x ≈ (code + 128) * scale + lo，code 为 int8
+    统计量与编码都按块计算，vectors 可以是磁盘上的内存映射数组
+    """
+    lo=np.full(vectors.shape[1],np.inf,dtype=np.float32)
+    hi=np.full(vectors.shape[1],-np.inf,dtype=np.float32)
+    for start in range(0,len(vectors),block_rows):
+        block=np.asarray(vectors[start:start+block_rows],dtype=np.float32)
+        lo=np.minimum(lo,block.min(axis=0))
+        hi=np.maximum(hi,block.max(axis=0))
+    scale=np.maximum((hi-lo)/255.0,1e-12).astype(np.float32)
+    codes=np.empty(vectors.shape,dtype=np.int8)
+    for start in range(0,len(vectors),block_rows):
+        block=np.asarray(vectors[start:start+block_rows],dtype=np.float32)
+        codes[start:start+block_rows]=(np.rint((block-lo)/scale)-128).astype(np.int8)
+    return codes,lo,scale
+
+class QuantizedIndex:
+    """
+    低精度粗排 + float32 精排的本地向量索引
+
+    codes：常驻内存的向量（float32 / float16 / int8）
+    full：归一化后的 float32 向量，通常是 np.load(mmap_mode="r") 得到的内存映射数组
+    """
+
+    def __init__(self,precision:str,codes:np.ndarray,full:np.ndarray,ids:list[str],documents:list[str],
+                 lo:np.ndarray|None=None,scale:np.ndarray|None=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision 必须是 {PRECISIONS} 之一")
+        self.precision=precision
+        self.codes=codes
+        self.full=full
+        self.ids=ids
+        self.documents=documents
+        self.lo=lo
+        self.scale=scale
+
+    @classmethod
+    def build(cls,vectors:np.ndarray,ids:list[str],documents:list[str],precision:str="int8")->"QuantizedIndex":
+        """vectors 需已归一化（见 normalize）"""
+        if precision=="float32":
+            return cls(precision,np.asarray(vectors,dtype=np.float32),vectors,ids,documents)
+        if precision=="float16":
+            return cls(precision,np.asarray(vectors,dtype=np.float16),vectors,ids,documents)
+        codes,lo,scale=quantize_int8(vectors)
+        return cls(precision,codes,vectors,ids,documents,lo,scale)
+
+    @property
+    def nbytes(self)->int:
+        """常驻内存的向量字节数（不含磁盘上的 float32 原始向量）"""
+        extra=self.lo.nbytes+self.scale.nbytes if self.lo is not None else 0
+        return self.codes.nbytes+extra
+
+    def approx_scores(self,query:np.ndarray)->np.ndarray:
+        """用低精度向量计算与 query 的近似余弦相似度"""
+        if self.precision=="float32":
+            return self.codes@query
+        if self.precision=="float16":
+            weights,bias=query,0.0
+        else:
+            # x·q = (code+128)·(scale*q) + lo·q
+            weights=(self.scale*query).astype(np.float32)
+            bias=float(128.0*weights.sum()+self.lo@query)
+        # numpy 的 float16 / int8 矩阵乘没有 BLAS 加速，分块转成 float32 再乘，复用同一块缓冲区
+        scores=np.empty(len(self.codes),dtype=np.float32)
+        buffer=np.empty((min(BLOCK_ROWS,len(self.codes)),self.codes.shape[1]),dtype=np.float32)
+        for start in range(0,len(self.codes),BLOCK_ROWS):
+            block=self.codes[start:start+BLOCK_ROWS]
+            np.copyto(buffer[:len(block)],block,casting="unsafe")
+            scores[start:start+len(block)]=buffer[:len(block)]@weights
+        return scores+bias
+
+    def search(self,query,k:int=5,rerank:int=RERANK_FACTOR)->list[tuple[str,str,float]]:
+        """
+        返回 [(id, 文本, 余弦相似度), ...]
+        rerank<=1 或 float32 精度时不做精排，直接按近似分数返回
+        """
+        query=normalize(np.asarray(query,dtype=np.float32).reshape(1,-1))[0]
+        scores=self.approx_scores(query)
+        n=min(len(scores),k*max(rerank,1) if self.precision!="float32" else k)
+        candidates=np.argpartition(-scores,n-1)[:n]
+        if self.precision!="float32" and rerank>1:
+            rows=np.sort(candidates)   # 按行号顺序读内存映射，减少随机 I/O
+            exact=np.asarray(self.full[rows],dtype=np.float32)@query
+            order=np.argsort(-exact)[:k]
+            return [(self.ids[rows[i]],self.documents[rows[i]],float(exact[i])) for i in order]
+        order=candidates[np.argsort(-scores[candidates])][:k]
+        return [(self.ids[i],self.documents[i],float(scores[i])) for i in order]
+
+    def save(self,index_dir:str=INDEX_DIR):
+        """float32 原始向量、id、文本是各精度共用的；低精度编码按精度分别保存"""
+        os.makedirs(index_dir,exist_ok=True)
+        full_path=os.path.join(index_dir,"vectors.float32.npy")
+        if not (isinstance(self.full,np.memmap) and os.path.abspath(self.full.filename)==os.path.abspath(full_path)):
+            np.save(full_path,np.asarray(self.full,dtype=np.float32))
+        with open(os.path.join(index_dir,"ids.json"),"w",encoding="utf-8") as f:
+            json.dump(self.ids,f,ensure_ascii=False)
+        with open(os.path.join(index_dir,"documents.json"),"w",encoding="utf-8") as f:
+            json.dump(self.documents,f,ensure_ascii=False)
+        if self.precision!="float32":
+            np.save(os.path.join(index_dir,f"codes.{self.precision}.npy"),self.codes)
+        if self.precision=="int8":
+            np.savez(os.path.join(index_dir,"int8_params.npz"),lo=self.lo,scale=self.scale)
+
+    @classmethod
+    def load(cls,index_dir:str=INDEX_DIR,precision:str="int8")->"QuantizedIndex":
+        full=np.load(os.path.join(index_dir,"vectors.float32.npy"),mmap_mode="r")
+        with open(os.path.join(index_dir,"ids.json"),"r",encoding="utf-8") as f:
+            ids=json.load(f)
+        with open(os.path.join(index_dir,"documents.json"),"r",encoding="utf-8") as f:
+            documents=json.load(f)
+        if precision=="float32":
+            return cls(precision,np.load(os.path.join(index_dir,"vectors.float32.npy")),full,ids,documents)
+        codes=np.load(os.path.join(index_dir,f"codes.{precision}.npy"))
+        if precision=="int8":
+            params=np.load(os.path.join(index_dir,"int8_params.npz"))
+            return cls(precision,codes,full,ids,documents,params["lo"],params["scale"])
+        return cls(precision,codes,full,ids,documents)
+
+def export_from_postgres(conn,collection_id,index_dir:str=INDEX_DIR,precisions=("float16","int8"),fetch_rows:int=10000):
+    """
+    用服务端游标把 collection 的向量流式导出为磁盘上的 float32 数组，再生成各精度的编码
+    conn 为 psycopg 连接
+    """
+    from pgvector.psycopg import register_vector
+    register_vector(conn)
+    total,dim=conn.execute("""
+        SELECT count(*), max(vector_dims(embedding)) FROM langchain_pg_embedding WHERE collection_id = %s
+    """,(collection_id,)).fetchone()
+    if not total:
+        raise ValueError("collection 中没有向量")
+    os.makedirs(index_dir,exist_ok=True)
+    full=np.lib.format.open_memmap(os.path.join(index_dir,"vectors.float32.npy"),mode="w+",dtype=np.float32,shape=(total,dim))
+    ids,documents=[],[]
+    with conn.cursor(name="couplet_export") as cur:
+        cur.itersize=fetch_rows
+        cur.execute("SELECT id, document, embedding FROM langchain_pg_embedding WHERE collection_id = %s ORDER BY id",(collection_id,))
+        row=0
+        while True:
+            rows=cur.fetchmany(fetch_rows)
+            if not rows:
+                break
+            full[row:row+len(rows)]=normalize(np.stack([np.asarray(r[2],dtype=np.float32) for r in rows]))
+            ids.extend(r[0] for r in rows)
+            documents.extend(r[1] for r in rows)
+            row+=len(rows)
+    full.flush()
+    full=np.load(os.path.join(index_dir,"vectors.float32.npy"),mmap_mode="r")
+    for precision in precisions:
+        QuantizedIndex.build(full,ids,documents,precision).save(index_dir)
+    print(f"已导出 {total} 条 {dim} 维向量到 {index_dir}，精度：{', '.join(precisions)}")
+
+def pg_search(conn,collection_id,query,k:int=5,precision:str="float16",rerank:int=RERANK_FACTOR)->list[tuple[str,str,float]]:
+    """
+    在 Postgres 中检索：float16 时先按 embedding::halfvec 粗排 k*rerank 个候选，再用原始 vector 精排
+    需要 pgvector >= 0.7；用 CoupletIndex create --precision float16 建好表达式索引才能避免全表扫描
+    pgvector 没有 int8 向量类型，int8 只用于本地索引
+    返回 [(id, 文本, 余弦相似度), ...]
+    """
+    import CoupletIndex
+    if precision not in CoupletIndex.PRECISIONS:
+        raise ValueError("Postgres 只支持 float32 / float16，int8 请使用本地 QuantizedIndex")
+    return CoupletIndex.search(conn,collection_id,query,k,precision=precision,rerank=rerank)
+
+if __name__ == "__main__":
+    import psycopg
+    from CoupletLoader import connection,get_collection_id
+
+    parser=argparse.ArgumentParser(description="从 PGVector 导出对联向量并生成 float16 / int8 本地索引")
+    parser.add_argument("--index-dir",default=INDEX_DIR)
+    parser.add_argument("--precision",nargs="+",default=["float16","int8"],choices=PRECISIONS)
+    args=parser.parse_args()
+    start=time.perf_counter()
+    with psycopg.connect(connection.replace("+psycopg","")) as conn:
+        export_from_postgres(conn,get_collection_id(conn),args.index_dir,args.precision)
+    print(f"耗时 {time.perf_counter()-start:.1f}s")
@@ -1,6 +1,6 @@
 import random
 import gradio as gr
-from MultiAgent import graph
+from MultiAgent import get_graph, warmup_in_background
 import asyncio
 
 async def process_input_async(text):
@@ -9,7 +9,7 @@ async def process_input_async(text):
             "thread_id":random.randint(0,1000000)
         }
     }
-    result=await graph.ainvoke({"messages":[text]},config=config)
+    result=await get_graph().ainvoke({"messages":[text]},config=config)
     return result["messages"][-1].content
 def process_input(text):
     # 在同步函数中运行异步代码
@@ -24,6 +24,9 @@ with gr.Blocks() as demo:
             submit_btn=gr.Button("提交",variant="primary")
         with gr.Column():
             output_text=gr.Textbox(label="输出")
-    submit_btn.click(process_input,inputs=[input_text],outputs=[output_text])
+    submit_btn.click(process_input,inputs=[input_text],outputs=[output_text],api_name="process_input")
 
-demo.launch(server_name="0.0.0.0", server_port=7999)
\ No newline at end of file
+# 先打开端口，再在后台预热重量级依赖和模型客户端，最后阻塞主线程
+demo.launch(server_name="0.0.0.0", server_port=7999, prevent_thread_lock=True)
+warmup_in_background()
+demo.block_thread()
\ No newline at end of file
@@ -85,157 +85,31 @@ class SkillState(MessagesState):
     Skill 状态 Schema
     """
     skills_loaded: Annotated[List[str], skill_list_accumulator] = []  # 改为累积模式
-# ==================== Loader 工具 ====================
-# 这些工具始终可见，用于加载其他技能
+# ==================== 技能注册表 ====================
+# 每个技能是 skills/<技能名>/ 下的一个目录，SKILL.md 的 YAML 头部声明
+# name / description / tools（工具入口 "模块:属性"），正文是加载技能后返回给模型的使用说明。
+# 启动时只读取清单、生成 Loader 工具；模型第一次调用 skill_* 时才导入该技能的工具模块。
 
-from langgraph.types import Command
-from langchain_core.messages import ToolMessage
+from skill_registry import SkillRegistry
 
-@tool
-def skill_data_analysis(runtime) -> Command:
-    """
-    加载数据分析技能。
-    """
-    instructions = """数据分析技能已成功加载！
-    
-现在你可以使用以下工具：
-• calculate_statistics(numbers): 计算一组数字的统计信息
-• generate_chart(data, chart_type): 生成数据图表
-
-请继续使用这些工具完成用户的数据分析任务。"""
-    
-    return Command(
-        update={
-            "messages": [ToolMessage(
-                content=instructions,
-                tool_call_id=runtime.tool_call_id
-            )],
-            "skills_loaded": ["data_analysis"]  # 关键：直接更新状态
-        }
-    )
-
-
-@tool
-def skill_text_processing(runtime) -> Command:
-    """
-    加载文本处理技能。
-    
-    调用此工具后，你将获得以下文本处理相关的工具：
-    - summarize_text: 生成文本摘要
-    - extract_keywords: 提取关键词
-    
-    使用场景：当用户需要处理文本、生成摘要或提取关键信息时，
-    请先调用此工具加载文本处理技能。
-    """
-    instructions = """文本处理技能已成功加载！
-    
-现在你可以使用以下工具：
-• summarize_text(text, max_length): 生成文本摘要
-• extract_keywords(text, num_keywords): 提取关键词
-
-请继续使用这些工具完成用户的文本处理任务。"""
-    
-    return Command(
-        update={
-            "messages": [ToolMessage(
-                content=instructions,
-                tool_call_id=runtime.tool_call_id
-            )],
-            "skills_loaded": ["text_processing"]  # 关键：直接更新状态
-        }
-    )
-
-
-# ==================== 数据分析工具 ====================
-# 这些工具只有在加载了 data_analysis 技能后才可见
-@tool
-def calculate_statistics(numbers: List[float]) -> str:
-    """
-    计算一组数字的统计信息，包括平均值、最大值、最小值、标准差等。
-    
-    Args:
-        numbers: 要分析的数字列表
-    """
-    import statistics
-    
-    if not numbers:
-        return "错误: 数字列表为空"
-    
-    result = {
-        "count": len(numbers),
-        "sum": sum(numbers),
-        "mean": statistics.mean(numbers),
-        "median": statistics.median(numbers),
-        "min": min(numbers),
-        "max": max(numbers),
-    }
-    
-    if len(numbers) > 1:
-        result["stdev"] = statistics.stdev(numbers)
-    
-    return f"统计结果: {result}"
+SKILL_REGISTRY = SkillRegistry(PROJECT_ROOT / "skills")
 
+# Loader 工具始终可见，用于加载其他技能
+LOADER_TOOLS = SKILL_REGISTRY.loader_tools
+# 只需要把 Loader 注册到 create_agent；技能工具由 SkillMiddleware.wrap_tool_call 按需找到并执行
+ALL_TOOLS = LOADER_TOOLS
 
-@tool
-def generate_chart(data: List[float], chart_type: str = "bar") -> str:
-    """
-    根据数据生成图表（模拟）。
-    
-    Args:
-        data: 数据列表
-        chart_type: 图表类型 (bar, line, pie)
-    """
-    return f"已生成 {chart_type} 图表，包含 {len(data)} 个数据点"
-
-
-# ==================== 文本处理工具 ====================
-# 这些工具只有在加载了 text_processing 技能后才可见
-
-@tool
-def summarize_text(text: str, max_length: int = 100) -> str:
-    """
-    生成文本摘要。
-    
-    Args:
-        text: 要摘要的文本
-        max_length: 摘要最大长度
-    """
-    if len(text) <= max_length:
-        return f"摘要: {text}"
-    return f"摘要: {text[:max_length]}..."
-
-
-@tool
-def extract_keywords(text: str, num_keywords: int = 5) -> str:
-    """
-    从文本中提取关键词。
-    
-    Args:
-        text: 要分析的文本
-        num_keywords: 要提取的关键词数量
-    """
-    # 简单模拟：取前几个单词
-    words = text.split()[:num_keywords]
-    return f"关键词: {', '.join(words)}"
-
-
-# 组织工具
-LOADER_TOOLS = [skill_data_analysis, skill_text_processing]
-DATA_ANALYSIS_TOOLS = [calculate_statistics, generate_chart]
-TEXT_PROCESSING_TOOLS = [summarize_text, extract_keywords]
-ALL_TOOLS = LOADER_TOOLS + DATA_ANALYSIS_TOOLS + TEXT_PROCESSING_TOOLS
-
-print("工具定义完成")
+print("技能发现完成")
 print(f"   Loader 工具 ({len(LOADER_TOOLS)}): {[t.name for t in LOADER_TOOLS]}")
-print(f"   数据分析工具 ({len(DATA_ANALYSIS_TOOLS)}): {[t.name for t in DATA_ANALYSIS_TOOLS]}")
-print(f"   文本处理工具 ({len(TEXT_PROCESSING_TOOLS)}): {[t.name for t in TEXT_PROCESSING_TOOLS]}")
-print(f"   总计: {len(ALL_TOOLS)} 个工具")
+print(f"   已导入的技能: {SKILL_REGISTRY.imported_skills}（首次加载时才导入）")
+
+def register_skill(skill_name: str, skill_tools: List[BaseTool]) -> None:
+    """在代码中注册（或替换）一个技能的工具列表；SKILL_REGISTRY.version 随之变化，SkillMiddleware 的缓存失效"""
+    SKILL_REGISTRY.register(skill_name, skill_tools)
 
-# 技能到工具的映射
-SKILL_TOOL_MAPPING = {
-    "data_analysis": DATA_ANALYSIS_TOOLS,
-    "text_processing": TEXT_PROCESSING_TOOLS,
-}
+def unregister_skill(skill_name: str) -> None:
+    """移除一个技能"""
+    SKILL_REGISTRY.unregister(skill_name)
 
 def get_tools_for_skills(skills_loaded: List[str]) -> List[BaseTool]:
     """
@@ -243,7 +117,7 @@ def get_tools_for_skills(skills_loaded: List[str]) -> List[BaseTool]:
     
     核心逻辑：
     1. Loader 工具始终包含
-    2. 根据 skills_loaded 添加对应的技能工具
+    2. 根据 skills_loaded 添加对应的技能工具（第一次用到时导入）
     
     Args:
         skills_loaded: 已加载的技能名称列表
@@ -251,15 +125,7 @@ def get_tools_for_skills(skills_loaded: List[str]) -> List[BaseTool]:
     Returns:
         过滤后的工具列表
     """
-    # 始终包含 Loader 工具
-    tools = list(LOADER_TOOLS)
-    
-    # 根据已加载的技能添加对应工具
-    for skill_name in skills_loaded:
-        if skill_name in SKILL_TOOL_MAPPING:
-            tools.extend(SKILL_TOOL_MAPPING[skill_name])
-    
-    return tools
+    return SKILL_REGISTRY.get_tools_for_skills(skills_loaded)
 
 
 # 测试工具过滤函数
@@ -1,46 +1,251 @@
+import atexit
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+
+# 字段名（转小写、- 换成 _ 后）包含这些片段时，值一律替换为 ***，例如 DEEPSEEK_API_KEY、x-api-key、client_secret
+REDACT_KEYS = {"api_key", "apikey", "authorization", "password", "passwd", "secret", "cookie", "credential",
+               "private_key"}
+# 按 _ 切分后出现这些完整片段时也替换，例如 access_token、x-auth；input_tokens 这类计数字段不受影响
+REDACT_TOKENS = {"token", "auth", "session"}
+
+
+def is_secret_key(key) -> bool:
+    name = str(key).lower().replace("-", "_")
+    return any(s in name for s in REDACT_KEYS) or not REDACT_TOKENS.isdisjoint(name.split("_"))
+
+
+def redact(value, max_chars: int = 500, max_items: int = 50, _depth: int = 0):
+    """
+    脱敏并截断大字段，返回可以直接 json.dumps 的结构：
+    长字符串只保留前 max_chars 个字符并注明截掉的长度，长列表只保留前 max_items 项，敏感字段名的值替换为 ***
+    """
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else f"{value[:max_chars]}...[+{len(value) - max_chars} chars]"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if _depth >= 6:
+        return redact(repr(value), max_chars)
+    if isinstance(value, dict):
+        return {str(k): "***" if is_secret_key(k) else redact(v, max_chars, max_items, _depth + 1)
+                for k, v in itertools.islice(value.items(), max_items)}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [redact(v, max_chars, max_items, _depth + 1) for v in itertools.islice(value, max_items)]
+        if len(value) > max_items:
+            items.append(f"...[+{len(value) - max_items} items]")
+        return items
+    return redact(repr(value), max_chars)
+
+
+def message_to_dict(message, max_chars: int = 500) -> dict:
+    """消息的调试快照：类型、id、截断后的内容和工具调用"""
+    data = {"type": getattr(message, "type", type(message).__name__), "id": getattr(message, "id", None),
+            "content": redact(getattr(message, "content", message), max_chars)}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        data["tool_calls"] = [{"name": tc.get("name"), "id": tc.get("id"), "args": redact(tc.get("args"), max_chars)}
+                              for tc in tool_calls]
+    reasoning = (getattr(message, "additional_kwargs", None) or {}).get("reasoning_content")
+    if reasoning:
+        data["reasoning_content"] = redact(reasoning, max_chars)
+    return data
+
+
+class _JsonQueueListener(QueueListener):
+    """
+    后台线程：队列里是调用线程放进来的原始 dict，在这里才序列化成一行 JSON，再交给 RotatingFileHandler 写入
+    """
+
+    def enqueue_sentinel(self):
+        # 默认的 put_nowait 在队列满时会抛异常，关闭时宁可等队列腾出位置
+        self.queue.put(self._sentinel)
+
+    def prepare(self, payload):
+        return logging.makeLogRecord({"msg": json.dumps(payload, ensure_ascii=False, default=str),
+                                      "levelno": logging.INFO, "levelname": "INFO"})
+
+
 class LoggingMiddleware(AgentMiddleware):
     """
-    日志中间件 - 记录每次模型调用的信息
-    
-    这是一个最简单的 Middleware 示例，用于理解基本工作流程
+    日志中间件 - 每次模型调用写一条结构化 JSON 日志
+
+    旧版本在每次调用时 print 整个 request.state，格式化开销随对话历史线性增长，而且阻塞在 stdout 上。
+    现在调用线程只做三件事：计时、按采样率决定是否记录、把一个小 dict 放进队列；
+    JSON 序列化和写文件都在后台线程里完成，日志文件按大小轮转。
+
+    每条日志包含：call_id、模型、工具名列表、消息数、token 用量（来自 AIMessage.usage_metadata）、耗时、状态，
+    以及 state_keys 指定的少量状态字段（默认只有 skills_loaded，大字段会被截断）。
+
+    参数：
+        log_path: 日志文件路径（JSON Lines）
+        sample_rate: 采样率，0~1；出错的调用总是记录
+        max_bytes / backup_count: 单个日志文件的大小上限和保留的轮转文件数
+        queue_size: 队列容量，写不过来时丢弃新日志并计入 dropped，不阻塞调用线程
+        ring_size: 保留最近 ring_size 次调用的完整请求（消息、工具、响应），用于排查问题；0 表示关闭
+        state_keys: 写入日志的状态字段
+        max_field_chars: 日志和快照中字符串字段的最大长度
     """
-    
-    def __init__(self, name: str = "Logger"):
+
+    def __init__(self, name: str = "Logger", log_path: str = "logs/model_calls.jsonl", sample_rate: float = 1.0,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, queue_size: int = 10000,
+                 ring_size: int = 20, state_keys=("skills_loaded",), max_field_chars: int = 500):
         super().__init__()
-        self.name = name
+        self._name = name
+        self.sample_rate = sample_rate
+        self.state_keys = tuple(state_keys)
+        self.max_field_chars = max_field_chars
         self.call_count = 0
-    
+        self._ids = itertools.count(1)
+        self._prefix = uuid.uuid4().hex[:8]
+        self._recent = deque(maxlen=ring_size) if ring_size > 0 else None
+
+        Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+        self.log_path = log_path
+        file_handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                           encoding="utf-8", delay=True)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._listener = _JsonQueueListener(self._queue, file_handler)
+        self.dropped = 0
+        self._listener.start()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        atexit.register(self.close)
+
+    @property
+    def name(self) -> str:
+        # AgentMiddleware.name 是只读属性（默认为类名），create_agent 要求中间件名称唯一
+        return self._name
+
+    # ==================== 拦截模型调用 ====================
+
     def wrap_model_call(
         self,
         request: ModelRequest,
         handler: Callable[[ModelRequest], ModelResponse]
     ) -> ModelResponse:
-        """
-        拦截模型调用，打印日志信息
-        """
-        self.call_count += 1
-        
-        # 1. 调用前：记录请求信息
-        print(f"\n{'='*60}")
-        print(f"[{self.name}] 第 {self.call_count} 次模型调用")
-        print(f"{'='*60}")
-        
-        # 打印工具信息
-        if hasattr(request, 'tools') and request.tools:
-            tool_names = [t.name for t in request.tools]
-            print(f"可用工具 ({len(tool_names)}个): {tool_names}")
-        
-        # 打印状态信息
-        if hasattr(request, 'state') and request.state:
-            print(f"当前状态: {request.state}")
-        
-        # 2. 调用下一个处理器（这里是实际的模型调用）
-        response = handler(request)
-        
-        # 3. 调用后：可以处理响应（这里只是打印）
-        print(f"模型调用完成")
-        print(f"{'='*60}\n")
-        
+        call_id, sampled, start = self._begin()
+        try:
+            response = handler(request)
+        except BaseException as exc:
+            self._end(call_id, request, None, start, True, exc)
+            raise
+        self._end(call_id, request, response, start, sampled)
+        return response
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        call_id, sampled, start = self._begin()
+        try:
+            response = await handler(request)
+        except BaseException as exc:
+            self._end(call_id, request, None, start, True, exc)
+            raise
+        self._end(call_id, request, response, start, sampled)
         return response
 
-print("LoggingMiddleware 类已定义")
\ No newline at end of file
+    def _begin(self):
+        self.call_count += 1
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        return f"{self._prefix}-{next(self._ids)}", sampled, time.perf_counter()
+
+    def _end(self, call_id: str, request: ModelRequest, response, start: float, sampled: bool, error=None):
+        latency_ms = (time.perf_counter() - start) * 1000
+        if self._recent is not None:
+            # 只保存引用和消息列表的浅拷贝，序列化推迟到 recent_requests() 被调用时
+            self._recent.append((call_id, time.time(), latency_ms, list(request.messages), request.tools,
+                                 request.state, response, error))
+        if not sampled or self._closed:
+            return
+        record = {
+            "ts": round(time.time(), 3),
+            "call_id": call_id,
+            "logger": self.name,
+            "model": getattr(request.model, "model_name", None) or type(request.model).__name__,
+            "tools": [_tool_name(t) for t in request.tools],
+            "message_count": len(request.messages),
+            "latency_ms": round(latency_ms, 2),
+            "status": "error" if error is not None else "ok",
+        }
+        state = request.state or {}
+        for key in self.state_keys:
+            if key in state:
+                record[key] = redact(state[key], self.max_field_chars)
+        if error is not None:
+            record["error"] = redact(f"{type(error).__name__}: {error}", self.max_field_chars)
+        usage = _usage(response)
+        if usage:
+            record.update(usage)
+        try:
+            # 队列满时丢弃并计数，调用线程永远不会阻塞在日志上
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # ==================== 调试与关闭 ====================
+
+    def recent_requests(self) -> list:
+        """最近 ring_size 次调用的完整请求快照（已脱敏、截断）"""
+        snapshots = []
+        for call_id, ts, latency_ms, messages, tools, state, response, error in list(self._recent or ()):
+            result = getattr(response, "result", [response] if response is not None else [])
+            snapshots.append({
+                "call_id": call_id,
+                "ts": round(ts, 3),
+                "latency_ms": round(latency_ms, 2),
+                "tools": [_tool_name(t) for t in tools],
+                "state": {k: redact(v, self.max_field_chars) for k, v in (state or {}).items() if k != "messages"},
+                "messages": [message_to_dict(m, self.max_field_chars) for m in messages],
+                "response": [message_to_dict(m, self.max_field_chars) for m in result],
+                "error": f"{type(error).__name__}: {error}" if error is not None else None,
+            })
+        return snapshots
+
+    def dump_recent(self, path: str) -> int:
+        """把最近的完整请求写到 JSON 文件，返回条数"""
+        snapshots = self.recent_requests()
+        Path(path).write_text(json.dumps(snapshots, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+        return len(snapshots)
+
+    def close(self):
+        """等待队列中的日志写完并关闭文件；之后的调用不再写日志"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        # 旧版本 Python 的 QueueListener.stop() 不能重复调用（会再放一个哨兵），后台线程已经退出时跳过
+        if getattr(self._listener, "_thread", None) is not None:
+            self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+
+def _tool_name(tool) -> str:
+    return tool.get("name", "") if isinstance(tool, dict) else getattr(tool, "name", type(tool).__name__)
+
+
+def _usage(response) -> dict:
+    """从响应中的 AIMessage.usage_metadata 取 token 用量"""
+    messages = getattr(response, "result", None) or ([response] if response is not None else [])
+    for message in reversed(messages):
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            data = {"input_tokens": usage.get("input_tokens"), "output_tokens": usage.get("output_tokens"),
+                    "total_tokens": usage.get("total_tokens")}
+            reasoning = (usage.get("output_token_details") or {}).get("reasoning")
+            cache_read = (usage.get("input_token_details") or {}).get("cache_read")
+            if reasoning is not None:
+                data["reasoning_tokens"] = reasoning
+            if cache_read is not None:
+                data["cache_read_tokens"] = cache_read
+            return data
+    return {}
+
+
+print("LoggingMiddleware 类已定义")
@@ -12,18 +12,37 @@ class SkillMiddleware(AgentMiddleware):
     5. 传递给下一个 handler
     
     这样，模型在每次调用时只会看到相关的工具！
+
+    过滤结果按 frozenset(skills_loaded) 缓存：同一组技能复用同一个工具列表（同一批工具对象），
+    下游 DeepSeekReasonerChatModel.bind_tools 按工具身份命中它自己的缓存，不会重复绑定；
+    request.model 保持原来的模型，create_agent 仍能按模型类型选择结构化输出策略。
+    技能注册表变化（SKILL_REGISTRY.version 改变）时整个缓存失效。
+
+    技能工具是按需导入的，没有注册到 create_agent：wrap_tool_call 从 SKILL_REGISTRY 中找到工具再交给 ToolNode 执行。
+
+    传入 retriever（tool_retrieval.ToolRetriever）时，在过滤结果上再按最近一轮对话做向量检索，
+    只暴露 top-k 个、总 token 不超过预算的工具 schema；retriever.report() 给出节省的 prompt token。
     """
     
-    def __init__(self, verbose: bool = True):
+    def __init__(self, verbose: bool = True, cache: bool = True, retriever=None, max_cache_entries: int = 128):
         """
         初始化 SkillMiddleware
         
         Args:
             verbose: 是否打印详细日志（用于调试和演示）
+            cache: 是否缓存过滤结果（关闭后每次调用都重新过滤，便于对比）
+            retriever: 可选的 ToolRetriever，按对话内容只保留最相关的工具
+            max_cache_entries: 缓存的技能组合数上限
         """
         super().__init__()
         self.verbose = verbose
+        self.cache = cache
+        self.retriever = retriever
         self.call_count = 0
+        self.cache_hits = 0
+        self.max_cache_entries = max_cache_entries
+        self._cache = {}
+        self._cache_version = None
     
     def _get_skills_from_state(self, request: ModelRequest) -> List[str]:
         """
@@ -43,26 +62,38 @@ class SkillMiddleware(AgentMiddleware):
                 skills_loaded = getattr(request.state, "skills_loaded", [])
         
         return skills_loaded
-    
-    def wrap_model_call(
-        self,
-        request: ModelRequest,
-        handler: Callable[[ModelRequest], ModelResponse]
-    ) -> ModelResponse:
+
+    def _filter_request(self, request: ModelRequest) -> ModelRequest:
         """
-        【核心方法】拦截模型调用，动态过滤工具
-        
-        这是整个 Claude Skills 系统最关键的方法！
+        返回替换了工具列表的新请求（request.model 不变）
+
+        缓存键：frozenset(skills_loaded)
         """
         self.call_count += 1
-        
-        # Step 1: 从状态中获取已加载的 Skills
         skills_loaded = self._get_skills_from_state(request)
-        
-        # Step 2: 获取过滤后的工具
-        filtered_tools = get_tools_for_skills(skills_loaded)
-        
-        # Step 3: 打印日志
+
+        if not self.cache:
+            filtered_tools = get_tools_for_skills(skills_loaded)
+            if self.retriever is not None:
+                filtered_tools = self.retriever.select(request.messages, filtered_tools)
+            filtered_request = request.override(tools=filtered_tools)
+        else:
+            if self._cache_version != SKILL_REGISTRY.version:
+                self._cache.clear()
+                self._cache_version = SKILL_REGISTRY.version
+            key = frozenset(skills_loaded)
+            filtered_tools = self._cache.get(key)
+            if filtered_tools is not None:
+                self.cache_hits += 1
+            else:
+                # 超过上限时整体清空
+                if len(self._cache) >= self.max_cache_entries:
+                    self._cache.clear()
+                filtered_tools = self._cache[key] = get_tools_for_skills(skills_loaded)
+            if self.retriever is not None:
+                filtered_tools = self.retriever.select(request.messages, filtered_tools)
+            filtered_request = request.override(tools=filtered_tools)
+
         if self.verbose:
             print(f"\n{'─'*60}")
             print(f"[SkillMiddleware] 第 {self.call_count} 次模型调用")
@@ -74,17 +105,23 @@ class SkillMiddleware(AgentMiddleware):
             if hasattr(request, 'tools') and request.tools:
                 original_count = len(request.tools)
                 print(f"工具数量变化: {original_count} → {len(filtered_tools)}")
-        
-        # Step 4: 【关键】使用 request.override() 替换工具列表
-        # 这会创建一个新的 ModelRequest，其中 tools 被替换为过滤后的列表
-        filtered_request = request.override(tools=filtered_tools)
-        
-        if self.verbose:
-            print(f"已将过滤后的工具传递给模型")
+            print(f"缓存命中: {self.cache_hits}/{self.call_count}")
             print(f"{'─'*60}\n")
+
+        return filtered_request
+    
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        """
+        【核心方法】拦截模型调用，动态过滤工具
         
-        # Step 5: 调用下一个 handler（实际的模型调用）
-        return handler(filtered_request)
+        这是整个 Claude Skills 系统最关键的方法！
+        """
+        # 【关键】使用 request.override() 替换工具列表（同一组技能直接复用缓存）
+        return handler(self._filter_request(request))
     
     async def awrap_model_call(
         self,
@@ -96,27 +133,31 @@ class SkillMiddleware(AgentMiddleware):
         
         LangChain 可能使用异步调用，所以需要同时实现两个版本
         """
-        self.call_count += 1
-        
-        skills_loaded = self._get_skills_from_state(request)
-        filtered_tools = get_tools_for_skills(skills_loaded)
-        
-        if self.verbose:
-            print(f"\n{'─'*60}")
-            print(f"[SkillMiddleware] (async) 第 {self.call_count} 次模型调用")
-            print(f"skills_loaded: {skills_loaded}")
-            print(f"过滤后工具: {[t.name for t in filtered_tools]}")
-            print(f"{'─'*60}\n")
-        
-        filtered_request = request.override(tools=filtered_tools)
-        return await handler(filtered_request)
+        return await handler(self._filter_request(request))
+
+    def _resolve_tool(self, request):
+        """ToolNode 不认识的工具（request.tool 为 None）到已加载技能中查找，找到后交给 ToolNode 执行"""
+        if request.tool is not None:
+            return request
+        skills_loaded = request.state.get("skills_loaded", []) if isinstance(request.state, dict) else []
+        tool = SKILL_REGISTRY.find_tool(request.tool_call["name"], skills_loaded)
+        return request.override(tool=tool) if tool is not None else request
+
+    def wrap_tool_call(self, request, handler):
+        """执行按需导入的技能工具（找不到时原样交给 ToolNode，由它返回工具不存在的错误）"""
+        return handler(self._resolve_tool(request))
+
+    async def awrap_tool_call(self, request, handler):
+        return await handler(self._resolve_tool(request))
 
 
 print("SkillMiddleware 类已定义")
 print("\n关键方法说明:")
 print("  • wrap_model_call(): 同步拦截模型调用")
 print("  • awrap_model_call(): 异步拦截模型调用")
+print("  • wrap_tool_call(): 执行按需导入的技能工具")
 print("  • request.override(): 创建修改后的请求对象")
+print("  • 过滤缓存: 同一组技能复用同一个工具列表，模型的 bind_tools 按工具身份命中缓存")
 
 #创建Agent
 # 创建 SkillMiddleware 实例
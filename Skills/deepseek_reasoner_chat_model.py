@@ -5,9 +5,16 @@
 """
 
 import os
+import re
 import json
-from typing import Any, List, Optional, Iterator, Dict
-from openai import OpenAI
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, List, Optional, Iterator, AsyncIterator, Dict
+import httpx
+from openai import OpenAI, AsyncOpenAI
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
@@ -18,11 +25,247 @@ from langchain_core.messages import (
     ToolMessage,
     AIMessageChunk
 )
-from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk, LLMResult
+from langchain_core.callbacks import BaseCallbackHandler, CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
 from langchain_core.tools import BaseTool
 from pydantic import Field
 
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2（pip install httpx[http2]）
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 进程内共享的 OpenAI 客户端：同一 (base_url, api_key) 的所有模型实例（包括 bind_tools 产生的新实例）
+# 共用一个 httpx 连接池，连接保持长连接复用，不再每次绑定工具都新建客户端、重新握手
+_SHARED_CLIENTS: Dict[tuple, OpenAI] = {}
+_SHARED_ASYNC_CLIENTS: Dict[tuple, tuple] = {}   # (base_url, api_key, id(loop)) -> (loop, AsyncOpenAI)
+_SHARED_CLIENTS_LOCK = threading.Lock()
+
+# 工具 schema 缓存：id(tool) -> (tool, OpenAI 格式的工具定义)，同一个工具对象只序列化一次
+_TOOL_SCHEMAS: Dict[int, tuple] = {}
+
+
+# reasoning_content 保留策略：
+# - all：所有历史 assistant 消息都带回 reasoning_content（旧行为）
+# - current_turn：只保留最后一条用户消息之后（当前工具调用循环内）的 reasoning_content
+# - last_n：只保留最近 reasoning_keep_last 条 assistant 消息的 reasoning_content
+# - none：全部丢弃
+REASONING_RETENTION_POLICIES = ("all", "current_turn", "last_n", "none")
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """按 DeepSeek 文档的经验比例估算 token 数：中文字符约 0.6 token，其他字符约 0.3 token"""
+    cjk = len(_CJK_RE.findall(text))
+    return round(cjk * 0.6 + (len(text) - cjk) * 0.3)
+
+
+class LRUCache:
+    """线程安全的简单 LRU 缓存"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: list) -> list:
+        """批量查询（只加一次锁），key 为 None 或未命中时对应位置返回 None"""
+        data = self._data
+        with self._lock:
+            values = []
+            for key in keys:
+                value = data.get(key) if key is not None else None
+                if value is None:
+                    self.misses += 1
+                else:
+                    data.move_to_end(key)
+                    self.hits += 1
+                values.append(value)
+            return values
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+# 已转换消息的缓存，容量可通过 DEEPSEEK_MESSAGE_CACHE_SIZE 配置
+_MESSAGE_CACHE = LRUCache(int(os.environ.get("DEEPSEEK_MESSAGE_CACHE_SIZE", "4096")))
+
+
+class RequestTiming:
+    """
+    一次模型请求的耗时：建立连接、首 token、总耗时（毫秒）
+    连接阶段的时间点来自 httpx 的 trace 扩展（由共享客户端的请求钩子挂上），复用长连接时没有连接事件
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.events: Dict[str, float] = {}
+
+    def mark(self, name: str):
+        """只记录第一次出现的时间（SDK 重试时以第一次为准）"""
+        self.events.setdefault(name, time.perf_counter())
+
+    def trace(self, event_name: str, info: dict):
+        self.mark(event_name)
+
+    async def atrace(self, event_name: str, info: dict):
+        self.mark(event_name)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        非流式请求的完整回复随响应头一起返回，首 token 时间取收到响应头的时间；
+        流式请求取第一个有内容的分块到达的时间
+        """
+        events = self.events
+        end = events.get("end", time.perf_counter())
+        connect_start = events.get("connection.connect_tcp.started")
+        connect_end = events.get("connection.start_tls.complete") or events.get("connection.connect_tcp.complete")
+        first_token = (events.get("first_token") or events.get("http11.receive_response_headers.complete")
+                       or events.get("http2.receive_response_headers.complete") or end)
+        return {
+            "connection_reused": connect_start is None,
+            "connect_ms": round((connect_end - connect_start) * 1000, 1) if connect_start and connect_end else 0.0,
+            "time_to_first_token_ms": round((first_token - self.start) * 1000, 1),
+            "total_ms": round((end - self.start) * 1000, 1),
+        }
+
+
+_CURRENT_TIMING: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar("deepseek_timing", default=None)
+
+
+@contextmanager
+def _track_timing(timing: RequestTiming):
+    """在发送请求期间把 timing 放进上下文，共享客户端的请求钩子据此挂上 trace 回调"""
+    token = _CURRENT_TIMING.set(timing)
+    try:
+        yield timing
+    finally:
+        _CURRENT_TIMING.reset(token)
+
+
+def _attach_trace(request: httpx.Request):
+    timing = _CURRENT_TIMING.get()
+    if timing is not None:
+        request.extensions["trace"] = timing.trace
+
+
+async def _aattach_trace(request: httpx.Request):
+    timing = _CURRENT_TIMING.get()
+    if timing is not None:
+        request.extensions["trace"] = timing.atrace
+
+
+def usage_to_metadata(usage) -> Dict[str, Any]:
+    """
+    把 OpenAI / DeepSeek 的 usage 转换为 LangChain 的 usage_metadata
+    DeepSeek 的缓存命中 token 在 prompt_cache_hit_tokens，OpenAI 的在 prompt_tokens_details.cached_tokens
+    """
+    raw = usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+    cache_read = raw.get("prompt_cache_hit_tokens")
+    if cache_read is None:
+        cache_read = (raw.get("prompt_tokens_details") or {}).get("cached_tokens")
+    reasoning = (raw.get("completion_tokens_details") or {}).get("reasoning_tokens")
+    metadata = {
+        "input_tokens": raw.get("prompt_tokens") or 0,
+        "output_tokens": raw.get("completion_tokens") or 0,
+        "total_tokens": raw.get("total_tokens") or 0,
+    }
+    if cache_read is not None:
+        metadata["input_token_details"] = {"cache_read": cache_read}
+    if reasoning is not None:
+        metadata["output_token_details"] = {"reasoning": reasoning}
+    return metadata
+
+
+def get_shared_client(base_url: str, api_key: str, max_connections: int = 20, http2: bool = True) -> OpenAI:
+    """
+    获取 (base_url, api_key) 对应的共享客户端，不存在时创建
+    连接池大小由第一次创建时的 max_connections 决定；超时在每次请求时单独传入
+    """
+    key = (base_url, api_key)
+    client = _SHARED_CLIENTS.get(key)
+    if client is None:
+        with _SHARED_CLIENTS_LOCK:
+            client = _SHARED_CLIENTS.get(key)
+            if client is None:
+                http_client = httpx.Client(
+                    http2=http2 and HTTP2_AVAILABLE,
+                    event_hooks={"request": [_attach_trace]},
+                    limits=httpx.Limits(max_connections=max_connections,
+                                        max_keepalive_connections=max_connections,
+                                        keepalive_expiry=60.0),
+                )
+                client = _SHARED_CLIENTS[key] = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+    return client
+
+
+def get_shared_async_client(base_url: str, api_key: str, max_connections: int = 20, http2: bool = True) -> AsyncOpenAI:
+    """
+    异步版本的共享客户端：httpx.AsyncClient 的连接绑定在创建它的事件循环上，
+    所以按 (base_url, api_key, 事件循环) 缓存，事件循环关闭后的客户端会被清理
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    key = (base_url, api_key, id(loop))
+    cached = _SHARED_ASYNC_CLIENTS.get(key)
+    if cached is not None and cached[0] is loop:
+        return cached[1]
+    with _SHARED_CLIENTS_LOCK:
+        for stale in [k for k, (l, _) in _SHARED_ASYNC_CLIENTS.items() if l.is_closed()]:
+            del _SHARED_ASYNC_CLIENTS[stale]
+        http_client = httpx.AsyncClient(
+            http2=http2 and HTTP2_AVAILABLE,
+            event_hooks={"request": [_aattach_trace]},
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=60.0),
+        )
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+        _SHARED_ASYNC_CLIENTS[key] = (loop, client)
+    return client
+
+
+def tool_to_openai_schema(tool: BaseTool) -> Dict:
+    """把 LangChain 工具转换为 OpenAI 格式，结果按工具对象身份缓存"""
+    cached = _TOOL_SCHEMAS.get(id(tool))
+    if cached is not None and cached[0] is tool:
+        return cached[1]
+
+    tool_def = {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": tool.description,
+        }
+    }
+
+    # 添加参数 schema（tool_call_schema 不含 ToolRuntime 等由框架注入的参数）
+    if hasattr(tool, 'args_schema') and tool.args_schema:
+        schema = tool.tool_call_schema
+        tool_def["function"]["parameters"] = schema if isinstance(schema, dict) else schema.model_json_schema()
+    else:
+        tool_def["function"]["parameters"] = {
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+
+    _TOOL_SCHEMAS[id(tool)] = (tool, tool_def)
+    return tool_def
+
 
 class DeepSeekReasonerChatModel(BaseChatModel):
     """
@@ -31,31 +274,50 @@ class DeepSeekReasonerChatModel(BaseChatModel):
     关键特性：
     1. 在工具调用循环中保留 reasoning_content
     2. 将 reasoning_content 存储在 AIMessage.additional_kwargs 中
-    3. 发送请求时从 additional_kwargs 恢复 reasoning_content
+    3. 发送请求时从 additional_kwargs 恢复 reasoning_content，按 reasoning_retention 策略决定带回哪些，
+       节省的字节数和 token 数写在返回消息的 response_metadata["reasoning_retention"] 中
+    4. 支持流式输出（_stream / _astream）：推理过程和回答边生成边返回
+    5. 原生异步（_agenerate / _astream）：ainvoke 不经过线程池
+    6. 每条回复都带 usage_metadata（含缓存命中、推理 token）和 response_metadata（模型、结束原因、
+       连接 / 首 token / 总耗时），可用 DeepSeekUsageCallbackHandler 汇总用量、费用和延迟
     """
 
     api_key: str = Field(default=None)
-    base_url: str = Field(default="https://api.deepseek.com")
+    # 可通过 DEEPSEEK_BASE_URL 指向本地模拟服务（benchmarks/mock_openai_server.py）
+    base_url: str = Field(default_factory=lambda: os.environ.get("DEEPSEEK_BASE_URL", "https://api.deepseek.com"))
     model_name: str = Field(default="deepseek-reasoner")
     temperature: float = Field(default=0.7)
     timeout: float = Field(default=60.0)
+    # 共享连接池大小，可通过 DEEPSEEK_MAX_CONNECTIONS 配置
+    max_connections: int = Field(default_factory=lambda: int(os.environ.get("DEEPSEEK_MAX_CONNECTIONS", "20")))
+    http2: bool = Field(default=True)
     bound_tools: Optional[List[Dict]] = Field(default=None)
+    # reasoning_content 保留策略（见 REASONING_RETENTION_POLICIES），可通过 DEEPSEEK_REASONING_RETENTION 配置
+    reasoning_retention: str = Field(
+        default_factory=lambda: os.environ.get("DEEPSEEK_REASONING_RETENTION", "current_turn"))
+    # last_n 策略保留的 assistant 消息条数
+    reasoning_keep_last: int = Field(default=1)
+    # bind_tools 结果缓存的条目数，0 表示不缓存
+    bind_cache_size: int = Field(default=32)
 
     # OpenAI 客户端（不序列化）
     _client: Optional[OpenAI] = None
+    # (工具 id 元组, 绑定参数) -> (工具元组, 绑定后的模型)
+    _bind_cache: Optional[LRUCache] = None
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        if self.reasoning_retention not in REASONING_RETENTION_POLICIES:
+            raise ValueError(f"reasoning_retention 必须是 {REASONING_RETENTION_POLICIES} 之一，"
+                             f"收到 {self.reasoning_retention!r}")
 
         # 初始化 OpenAI 客户端
         if not self.api_key:
             self.api_key = os.environ.get("DEEPSEEK_API_KEY")
 
-        self._client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            timeout=self.timeout
-        )
+        # 同一 (base_url, api_key) 共用一个客户端和连接池
+        self._client = get_shared_client(self.base_url, self.api_key, self.max_connections, self.http2)
+        self._bind_cache = LRUCache(self.bind_cache_size) if self.bind_cache_size > 0 else None
 
     @property
     def _llm_type(self) -> str:
@@ -69,63 +331,136 @@ class DeepSeekReasonerChatModel(BaseChatModel):
             "temperature": self.temperature,
         }
 
-    def _convert_messages_to_openai_format(self, messages: List[BaseMessage]) -> List[Dict]:
+    @staticmethod
+    def _convert_message(msg: BaseMessage) -> Optional[Dict]:
         """
-        将 LangChain 消息转换为 OpenAI 格式
-
-        关键：从 additional_kwargs 中恢复 reasoning_content
+        将单条 LangChain 消息转换为 OpenAI 格式（不含 reasoning_content，由调用方加上）
+        不支持的消息类型返回 None
         """
-        openai_messages = []
+        if isinstance(msg, HumanMessage):
+            return {
+                "role": "user",
+                "content": msg.content
+            }
 
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                openai_messages.append({
-                    "role": "user",
-                    "content": msg.content
-                })
+        if isinstance(msg, SystemMessage):
+            return {
+                "role": "system",
+                "content": msg.content
+            }
 
-            elif isinstance(msg, SystemMessage):
-                openai_messages.append({
-                    "role": "system",
-                    "content": msg.content
-                })
+        if isinstance(msg, AIMessage):
+            msg_dict = {
+                "role": "assistant",
+                "content": msg.content or "",
+            }
 
-            elif isinstance(msg, AIMessage):
-                msg_dict = {
-                    "role": "assistant",
-                    "content": msg.content or "",
-                }
+            # 处理 tool_calls
+            if hasattr(msg, 'tool_calls') and msg.tool_calls:
+                tool_calls = []
+                for tc in msg.tool_calls:
+                    # LangChain 1.0 的 tool_call 格式
+                    tool_calls.append({
+                        "id": tc.get("id") if isinstance(tc, dict) else tc.id,
+                        "type": "function",
+                        "function": {
+                            "name": tc.get("name") if isinstance(tc, dict) else tc.name,
+                            "arguments": json.dumps(tc.get("args") if isinstance(tc, dict) else tc.args)
+                        }
+                    })
+                msg_dict["tool_calls"] = tool_calls
+            return msg_dict
+
+        if isinstance(msg, ToolMessage):
+            return {
+                "role": "tool",
+                "tool_call_id": msg.tool_call_id,
+                "name": msg.name,
+                "content": msg.content
+            }
+        return None
 
-                # 处理 tool_calls
-                if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                    tool_calls = []
-                    for tc in msg.tool_calls:
-                        # LangChain 1.0 的 tool_call 格式
-                        tool_calls.append({
-                            "id": tc.get("id") if isinstance(tc, dict) else tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.get("name") if isinstance(tc, dict) else tc.name,
-                                "arguments": json.dumps(tc.get("args") if isinstance(tc, dict) else tc.args)
-                            }
-                        })
-                    msg_dict["tool_calls"] = tool_calls
-
-                # 【关键】恢复 reasoning_content
-                if hasattr(msg, 'additional_kwargs') and msg.additional_kwargs:
-                    if 'reasoning_content' in msg.additional_kwargs:
-                        msg_dict["reasoning_content"] = msg.additional_kwargs['reasoning_content']
-
-                openai_messages.append(msg_dict)
-
-            elif isinstance(msg, ToolMessage):
-                openai_messages.append({
-                    "role": "tool",
-                    "tool_call_id": msg.tool_call_id,
-                    "name": msg.name,
-                    "content": msg.content
-                })
+    @staticmethod
+    def _message_cache_key(msg: BaseMessage, keep_reasoning: bool) -> Optional[tuple]:
+        """
+        缓存键：消息类型 + id + 内容（AIMessage 再加上 reasoning_content、是否保留它和工具调用 id）
+        字符串的哈希值由 Python 缓存在字符串对象上，所以计算键是 O(1) 的；
+        同一 id 的消息被替换（例如摘要中间件复用 id）后内容不同，自然不会命中旧结果。
+        没有 id 或内容不是纯文本（多模态）的消息不缓存
+        """
+        if msg.id is None or not isinstance(msg.content, str):
+            return None
+        if isinstance(msg, AIMessage):
+            return (msg.type, msg.id, msg.content, msg.additional_kwargs.get('reasoning_content'), keep_reasoning,
+                    tuple(tc.get("id") for tc in msg.tool_calls))
+        return (msg.type, msg.id, msg.content)
+
+    def _reasoning_keep_flags(self, messages: List[BaseMessage]) -> List[bool]:
+        """按 reasoning_retention 策略决定每条消息是否带回 reasoning_content（只对 AIMessage 有意义）"""
+        policy = self.reasoning_retention
+        if policy == "all":
+            return [True] * len(messages)
+        if policy == "none":
+            return [False] * len(messages)
+        if policy == "current_turn":
+            # 最后一条用户消息之后的 assistant 消息属于当前工具调用循环
+            start = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), -1)
+            return [i > start for i in range(len(messages))]
+        # last_n
+        flags = [False] * len(messages)
+        remaining = self.reasoning_keep_last
+        for i in range(len(messages) - 1, -1, -1):
+            if remaining <= 0:
+                break
+            msg = messages[i]
+            if isinstance(msg, AIMessage) and msg.additional_kwargs.get('reasoning_content'):
+                flags[i] = True
+                remaining -= 1
+        return flags
+
+    def _convert_messages_to_openai_format(self, messages: List[BaseMessage], stats: Optional[Dict] = None) -> List[Dict]:
+        """
+        将 LangChain 消息转换为 OpenAI 格式
+
+        关键：从 additional_kwargs 中恢复 reasoning_content（按 reasoning_retention 策略决定带回哪些）
 
+        转换结果按 _message_cache_key 缓存在进程级 LRU 中，工具调用循环里每一步只需要转换新增的消息，
+        历史消息直接复用（包括 tool_calls 参数的 json.dumps）。缓存中的字典是共享的，调用方不要原地修改
+
+        stats：传入字典时写入本次请求因丢弃 reasoning_content 节省的消息数、UTF-8 字节数和估算 token 数
+        """
+        flags = self._reasoning_keep_flags(messages)
+        keys = [self._message_cache_key(msg, keep) for msg, keep in zip(messages, flags)]
+        cached = _MESSAGE_CACHE.get_many(keys)
+        openai_messages = []
+        dropped = bytes_saved = tokens_saved = 0
+
+        for msg, keep, key, entry in zip(messages, flags, keys, cached):
+            if entry is None:
+                msg_dict = self._convert_message(msg)
+                if msg_dict is None:
+                    continue
+                saved = None
+                reasoning = msg.additional_kwargs.get('reasoning_content') if isinstance(msg, AIMessage) else None
+                if reasoning:
+                    if keep:
+                        # 【关键】恢复 reasoning_content
+                        msg_dict["reasoning_content"] = reasoning
+                    else:
+                        saved = (len(reasoning.encode("utf-8")), estimate_tokens(reasoning))
+                entry = (msg_dict, saved)
+                if key is not None:
+                    _MESSAGE_CACHE.put(key, entry)
+            msg_dict, saved = entry
+            if saved is not None:
+                dropped += 1
+                bytes_saved += saved[0]
+                tokens_saved += saved[1]
+            openai_messages.append(msg_dict)
+
+        if stats is not None:
+            stats.update(policy=self.reasoning_retention, dropped_messages=dropped,
+                         bytes_saved=bytes_saved, tokens_saved=tokens_saved)
         return openai_messages
 
     def _create_ai_message_from_response(self, response) -> AIMessage:
@@ -161,41 +496,228 @@ class DeepSeekReasonerChatModel(BaseChatModel):
         if tool_calls:
             ai_message_kwargs["tool_calls"] = tool_calls
 
+        # token 用量（含缓存命中和推理 token）与响应信息
+        if response.usage is not None:
+            ai_message_kwargs["usage_metadata"] = usage_to_metadata(response.usage)
+        ai_message_kwargs["response_metadata"] = self._response_metadata(
+            response.model, response.choices[0].finish_reason, response.usage, response.id,
+            getattr(response, "system_fingerprint", None))
+
         return AIMessage(**ai_message_kwargs)
 
-    def _generate(
-        self,
-        messages: List[BaseMessage],
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> ChatResult:
-        """
-        生成响应的核心方法
-        """
+    @staticmethod
+    def _response_metadata(model, finish_reason, usage, response_id, system_fingerprint) -> Dict[str, Any]:
+        """与 ChatOpenAI 相同的 response_metadata 字段，UsageMetadataCallbackHandler 等按 model_name 汇总"""
+        return {
+            "model_name": model,
+            "finish_reason": finish_reason,
+            "token_usage": usage.model_dump() if usage is not None else {},
+            "id": response_id,
+            "system_fingerprint": system_fingerprint,
+        }
+
+    @staticmethod
+    def _llm_output(ai_message: AIMessage) -> Dict[str, Any]:
+        """ChatResult.llm_output，回调的 on_llm_end 可以从 LLMResult.llm_output 读到用量和耗时"""
+        metadata = ai_message.response_metadata
+        return {"token_usage": metadata.get("token_usage", {}), "model_name": metadata.get("model_name"),
+                "timing": metadata.get("timing", {})}
+
+    def _build_request_params(self, messages: List[BaseMessage], stream: bool = False,
+                              stats: Optional[Dict] = None) -> Dict[str, Any]:
+        """构造 chat.completions.create 的参数，_generate 与 _stream 共用；stats 见 _convert_messages_to_openai_format"""
         # 转换消息
-        openai_messages = self._convert_messages_to_openai_format(messages)
+        openai_messages = self._convert_messages_to_openai_format(messages, stats)
 
         # 准备请求参数
         request_params = {
             "model": self.model_name,
             "messages": openai_messages,
             "temperature": self.temperature,
+            "timeout": self.timeout,
         }
 
         # 添加工具（如果有绑定）
         if self.bound_tools:
             request_params["tools"] = self.bound_tools
 
+        if stream:
+            # 最后一个分块带上 token 用量
+            request_params["stream"] = True
+            request_params["stream_options"] = {"include_usage": True}
+        return request_params
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        生成响应的核心方法
+        """
         # 调用 API
-        response = self._client.chat.completions.create(**request_params)
+        retention = {}
+        params = self._build_request_params(messages, stats=retention)
+        with _track_timing(RequestTiming()) as timing:
+            response = self._client.chat.completions.create(**params)
+        timing.mark("end")
 
         # 创建 AIMessage
         ai_message = self._create_ai_message_from_response(response)
+        ai_message.response_metadata["reasoning_retention"] = retention
+        ai_message.response_metadata["timing"] = timing.as_dict()
 
         # 返回 ChatResult
         generation = ChatGeneration(message=ai_message)
-        return ChatResult(generations=[generation])
+        return ChatResult(generations=[generation], llm_output=self._llm_output(ai_message))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        原生异步生成：直接 await 共享的 AsyncOpenAI 客户端，不再占用线程池
+        调用方取消任务（如超时、用户断开）时 CancelledError 会一路抛出，httpx 随之中断并释放这条连接
+        """
+        client = get_shared_async_client(self.base_url, self.api_key, self.max_connections, self.http2)
+        retention = {}
+        params = self._build_request_params(messages, stats=retention)
+        with _track_timing(RequestTiming()) as timing:
+            response = await client.chat.completions.create(**params)
+        timing.mark("end")
+        ai_message = self._create_ai_message_from_response(response)
+        ai_message.response_metadata["reasoning_retention"] = retention
+        ai_message.response_metadata["timing"] = timing.as_dict()
+        return ChatResult(generations=[ChatGeneration(message=ai_message)], llm_output=self._llm_output(ai_message))
+
+    def _create_chunk_from_stream(self, chunk) -> Optional[AIMessageChunk]:
+        """
+        把一个 SSE 分块转换为 AIMessageChunk
+
+        - content 增量 → chunk.content
+        - reasoning_content 增量 → chunk.additional_kwargs["reasoning_content"]
+          （AIMessageChunk 相加时字符串会拼接，最终消息里仍是完整的 reasoning_content）
+        - tool_calls 增量 → tool_call_chunks（按 index 合并，参数片段逐段拼接，拼完后解析为 tool_calls）
+        - 只含 usage 的最后一个分块 → usage_metadata（含缓存命中和推理 token）
+        """
+        usage_metadata = None
+        if getattr(chunk, "usage", None):
+            usage_metadata = usage_to_metadata(chunk.usage)
+
+        if not chunk.choices:
+            if usage_metadata is None:
+                return None
+            return AIMessageChunk(content="", usage_metadata=usage_metadata)
+
+        delta = chunk.choices[0].delta
+        additional_kwargs = {}
+        reasoning_content = getattr(delta, "reasoning_content", None)
+        if reasoning_content:
+            additional_kwargs["reasoning_content"] = reasoning_content
+
+        tool_call_chunks = []
+        for tc in delta.tool_calls or []:
+            tool_call_chunks.append({
+                "name": tc.function.name if tc.function else None,
+                "args": tc.function.arguments if tc.function else None,
+                "id": tc.id,
+                "index": tc.index,
+            })
+
+        chunk_kwargs = {
+            "content": delta.content or "",
+            "additional_kwargs": additional_kwargs,
+            "tool_call_chunks": tool_call_chunks,
+        }
+        if usage_metadata is not None:
+            chunk_kwargs["usage_metadata"] = usage_metadata
+        return AIMessageChunk(**chunk_kwargs)
+
+    def _stream_metadata_chunk(self, stream_info: Dict[str, Any], retention: Dict, timing: RequestTiming) -> ChatGenerationChunk:
+        """
+        流结束后补发一个空分块，带上 response_metadata（模型、结束原因、原始用量、节省统计、耗时）
+        这些字段只出现在这一个分块上，分块相加时不会被重复拼接
+        """
+        timing.mark("end")
+        response_metadata = self._response_metadata(
+            stream_info.get("model"), stream_info.get("finish_reason"), stream_info.get("usage"),
+            stream_info.get("id"), stream_info.get("system_fingerprint"))
+        response_metadata["reasoning_retention"] = retention
+        response_metadata["timing"] = timing.as_dict()
+        return ChatGenerationChunk(message=AIMessageChunk(content="", response_metadata=response_metadata))
+
+    @staticmethod
+    def _update_stream_info(stream_info: Dict[str, Any], chunk):
+        """记录流中分散出现的响应信息：id / 模型 / 结束原因 / 用量"""
+        stream_info.setdefault("id", chunk.id)
+        stream_info.setdefault("model", chunk.model)
+        stream_info.setdefault("system_fingerprint", getattr(chunk, "system_fingerprint", None))
+        if chunk.choices and chunk.choices[0].finish_reason:
+            stream_info["finish_reason"] = chunk.choices[0].finish_reason
+        if getattr(chunk, "usage", None):
+            stream_info["usage"] = chunk.usage
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        流式生成：推理过程（reasoning_content）和回答（content）边生成边返回
+        """
+        retention, stream_info = {}, {}
+        params = self._build_request_params(messages, stream=True, stats=retention)
+        with _track_timing(RequestTiming()) as timing:
+            stream = self._client.chat.completions.create(**params)
+        with stream:
+            for chunk in stream:
+                self._update_stream_info(stream_info, chunk)
+                message_chunk = self._create_chunk_from_stream(chunk)
+                if message_chunk is None:
+                    continue
+                if message_chunk.content or message_chunk.additional_kwargs or message_chunk.tool_call_chunks:
+                    timing.mark("first_token")
+                generation_chunk = ChatGenerationChunk(message=message_chunk)
+                if run_manager:
+                    run_manager.on_llm_new_token(message_chunk.content, chunk=generation_chunk)
+                yield generation_chunk
+        yield self._stream_metadata_chunk(stream_info, retention, timing)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        异步流式生成，使用共享的 AsyncOpenAI 客户端
+        """
+        client = get_shared_async_client(self.base_url, self.api_key, self.max_connections, self.http2)
+        retention, stream_info = {}, {}
+        params = self._build_request_params(messages, stream=True, stats=retention)
+        with _track_timing(RequestTiming()) as timing:
+            stream = await client.chat.completions.create(**params)
+        async with stream:
+            async for chunk in stream:
+                self._update_stream_info(stream_info, chunk)
+                message_chunk = self._create_chunk_from_stream(chunk)
+                if message_chunk is None:
+                    continue
+                if message_chunk.content or message_chunk.additional_kwargs or message_chunk.tool_call_chunks:
+                    timing.mark("first_token")
+                generation_chunk = ChatGenerationChunk(message=message_chunk)
+                if run_manager:
+                    await run_manager.on_llm_new_token(message_chunk.content, chunk=generation_chunk)
+                yield generation_chunk
+        yield self._stream_metadata_chunk(stream_info, retention, timing)
 
     def bind_tools(
         self,
@@ -204,29 +726,25 @@ class DeepSeekReasonerChatModel(BaseChatModel):
     ) -> "DeepSeekReasonerChatModel":
         """
         绑定工具到模型
-        """
-        # 转换 LangChain 工具为 OpenAI 格式
-        openai_tools = []
-        for tool in tools:
-            tool_def = {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                }
-            }
-
-            # 添加参数 schema
-            if hasattr(tool, 'args_schema') and tool.args_schema:
-                tool_def["function"]["parameters"] = tool.args_schema.model_json_schema()
-            else:
-                tool_def["function"]["parameters"] = {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
 
-            openai_tools.append(tool_def)
+        create_agent 在每次模型调用前都会执行 bind_tools；同一组工具（按对象身份）和绑定参数直接返回上次绑定的实例，
+        不再重新序列化 schema、新建模型
+        """
+        key = (tuple(id(tool) for tool in tools), repr(sorted(kwargs.items())))
+        if self._bind_cache is not None:
+            cached = self._bind_cache.get_many([key])[0]
+            # id 可能被回收后复用，核对工具对象本身
+            if cached is not None and len(cached[0]) == len(tools) and all(a is b for a, b in zip(cached[0], tools)):
+                return cached[1]
+
+        bound = self._bind(tools, **kwargs)
+        if self._bind_cache is not None:
+            self._bind_cache.put(key, (tuple(tools), bound))
+        return bound
+
+    def _bind(self, tools: List[BaseTool], **kwargs: Any) -> "DeepSeekReasonerChatModel":
+        # 转换 LangChain 工具为 OpenAI 格式（schema 按工具缓存）
+        openai_tools = [tool_to_openai_schema(tool) for tool in tools]
 
         # 创建新实例，绑定工具
         return self.__class__(
@@ -235,10 +753,102 @@ class DeepSeekReasonerChatModel(BaseChatModel):
             model_name=self.model_name,
             temperature=self.temperature,
             timeout=self.timeout,
+            max_connections=self.max_connections,
+            http2=self.http2,
+            reasoning_retention=self.reasoning_retention,
+            reasoning_keep_last=self.reasoning_keep_last,
             bound_tools=openai_tools,
             **kwargs
         )
 
 
+# 价格（元 / 百万 token）：缓存命中输入、缓存未命中输入、输出；价格调整时修改这里
+DEEPSEEK_PRICES = {
+    "deepseek-chat": (0.2, 2.0, 3.0),
+    "deepseek-reasoner": (0.2, 2.0, 3.0),
+}
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class DeepSeekUsageCallbackHandler(BaseCallbackHandler):
+    """
+    按模型汇总 token 用量、缓存命中、费用和耗时
+
+    用法：每次 agent.invoke 传一个新的实例即得到这一次运行的汇总，长期挂在同一个实例上则汇总全部运行
+        handler = DeepSeekUsageCallbackHandler()
+        agent.invoke(inputs, config={"callbacks": [handler]})
+        print(handler.summary())
+    """
+
+    run_inline = True   # 异步调用时也在事件循环里直接执行，不走线程池
+
+    def __init__(self, prices: Optional[Dict[str, tuple]] = None):
+        super().__init__()
+        self.prices = prices or DEEPSEEK_PRICES
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if isinstance(message, AIMessage):
+                    self._record(message)
+
+    def _record(self, message: AIMessage):
+        usage = message.usage_metadata or {}
+        metadata = message.response_metadata
+        name = metadata.get("model_name") or "unknown"
+        cache_read = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        reasoning = (usage.get("output_token_details") or {}).get("reasoning", 0)
+        input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        hit_price, miss_price, output_price = self.prices.get(name, (0.0, 0.0, 0.0))
+        cost = (cache_read * hit_price + (input_tokens - cache_read) * miss_price + output_tokens * output_price) / 1e6
+        timing = metadata.get("timing") or {}
+        with self._lock:
+            stats = self.models.setdefault(name, {
+                "calls": 0, "input_tokens": 0, "cache_read_tokens": 0, "output_tokens": 0, "reasoning_tokens": 0,
+                "cost": 0.0, "connect_ms": [], "time_to_first_token_ms": [], "total_ms": []})
+            stats["calls"] += 1
+            stats["input_tokens"] += input_tokens
+            stats["cache_read_tokens"] += cache_read
+            stats["output_tokens"] += output_tokens
+            stats["reasoning_tokens"] += reasoning
+            stats["cost"] += cost
+            for key in ("connect_ms", "time_to_first_token_ms", "total_ms"):
+                if key in timing:
+                    stats[key].append(timing[key])
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """每个模型：调用次数、token、缓存命中率、费用（元）、首 token / 总耗时的 p50 与 p95（毫秒）"""
+        result = {}
+        with self._lock:
+            for name, stats in self.models.items():
+                result[name] = {
+                    "calls": stats["calls"],
+                    "input_tokens": stats["input_tokens"],
+                    "cache_read_tokens": stats["cache_read_tokens"],
+                    "cache_hit_ratio": round(stats["cache_read_tokens"] / stats["input_tokens"], 4)
+                    if stats["input_tokens"] else 0.0,
+                    "output_tokens": stats["output_tokens"],
+                    "reasoning_tokens": stats["reasoning_tokens"],
+                    "cost": round(stats["cost"], 6),
+                    "connect_ms_total": round(sum(stats["connect_ms"]), 1),
+                    "ttft_ms_p50": _percentile(stats["time_to_first_token_ms"], 50),
+                    "ttft_ms_p95": _percentile(stats["time_to_first_token_ms"], 95),
+                    "total_ms_p50": _percentile(stats["total_ms"], 50),
+                    "total_ms_p95": _percentile(stats["total_ms"], 95),
+                }
+        return result
+
+
 # 方便导入
-__all__ = ["DeepSeekReasonerChatModel"]
+__all__ = ["DeepSeekReasonerChatModel", "DeepSeekUsageCallbackHandler", "RequestTiming", "DEEPSEEK_PRICES",
+           "get_shared_client", "get_shared_async_client", "tool_to_openai_schema", "usage_to_metadata",
+           "REASONING_RETENTION_POLICIES", "estimate_tokens"]
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+文件系统技能注册表：从技能目录发现技能，按需导入技能的工具模块
+
+目录结构（与 Claude Skills 一致，每个技能一个目录，SKILL.md 的 YAML 头部是清单）：
+
+    skills/
+      data_analysis/
+        SKILL.md        ---
+                        name: data_analysis
+                        description: 加载数据分析技能……
+                        tools:
+                          - tools:calculate_statistics     # 模块:属性，模块优先从技能目录下的 .py 文件加载
+                          - tools:generate_chart
+                        ---
+                        正文：加载技能后返回给模型的使用说明，{tools} 会替换为工具清单
+        tools.py
+
+启动时只读取每个 SKILL.md（不导入任何工具模块），为每个技能生成一个 skill_<name> Loader 工具；
+模型第一次调用某个 Loader 时才导入该技能的工具模块，所以技能数量增长到几百个时启动耗时和内存基本不变。
+技能工具不需要注册到 create_agent：SkillMiddleware 在 wrap_tool_call 中通过 find_tool 找到并执行它们。
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from langchain.tools import ToolRuntime
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.types import Command
+
+# 有 libyaml 时用 C 实现的解析器，几百个清单时比纯 Python 版快一个数量级
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+MANIFEST_NAME = "SKILL.md"
+LOADER_PREFIX = "skill_"
+TOOLS_PLACEHOLDER = "{tools}"
+
+
+@dataclass
+class SkillManifest:
+    name: str
+    description: str
+    tools: List[str] = field(default_factory=list)   # 工具入口 "模块:属性"
+    instructions: str = ""
+    path: Optional[Path] = None                      # 技能目录；代码注册的技能为 None
+
+
+def parse_manifest(path: Path) -> SkillManifest:
+    """解析 SKILL.md：--- 包围的 YAML 头部是清单，其余部分是使用说明"""
+    text = path.read_text(encoding="utf-8")
+    if not text.startswith("---"):
+        raise ValueError(f"{path} 缺少 YAML 头部")
+    _, header, body = text.split("---", 2)
+    meta = yaml.load(header, Loader=_YAML_LOADER) or {}
+    name = meta.get("name") or path.parent.name
+    if not meta.get("description"):
+        raise ValueError(f"{path} 缺少 description")
+    return SkillManifest(name=name, description=meta["description"].strip(), tools=list(meta.get("tools") or []),
+                         instructions=body.strip(), path=path.parent)
+
+
+_LOADER_ARGS_SCHEMA = None
+
+
+def _loader_args_schema():
+    """
+    所有 Loader 的参数相同（只有注入的 runtime），共用一个参数模型。
+    StructuredTool.from_function 每次都要用 pydantic 生成一遍模型（ToolRuntime 的 schema 很重），
+    几百个技能时这是启动耗时的大头
+    """
+    global _LOADER_ARGS_SCHEMA
+    if _LOADER_ARGS_SCHEMA is None:
+        def load_skill(runtime: ToolRuntime) -> Command:
+            """加载技能"""
+        _LOADER_ARGS_SCHEMA = StructuredTool.from_function(load_skill).args_schema
+    return _LOADER_ARGS_SCHEMA
+
+
+class SkillRegistry:
+    """
+    root：技能目录，每个子目录一个技能；为 None 时只使用 register() 注册的技能
+    loader_prefix：Loader 工具名前缀
+
+    version 在技能增删或工具列表变化时加 1，SkillMiddleware 据此让缓存失效
+    """
+
+    def __init__(self, root: Optional[Path] = None, loader_prefix: str = LOADER_PREFIX):
+        self.root = Path(root) if root is not None else None
+        self.loader_prefix = loader_prefix
+        self.version = 0
+        self.manifests: Dict[str, SkillManifest] = {}
+        self._mtimes: Dict[Path, tuple] = {}          # SKILL.md 路径 -> (mtime, 技能名)
+        self._loaders: Dict[str, BaseTool] = {}
+        self._tools: Dict[str, List[BaseTool]] = {}   # 已导入的技能 -> 工具列表
+        self._lock = threading.RLock()
+        if self.root is not None:
+            self.discover()
+
+    # ==================== 发现与注册 ====================
+
+    def discover(self) -> List[str]:
+        """
+        扫描技能目录，只读取 SKILL.md；清单没变（mtime 相同）的技能不重新解析。
+        返回新增或变化的技能名。可以在运行中再次调用以加载新放进目录的技能
+        """
+        if self.root is None or not self.root.is_dir():
+            return []
+        changed = []
+        with self._lock:
+            seen = set()
+            for manifest_path in sorted(self.root.glob(f"*/{MANIFEST_NAME}")):
+                mtime = manifest_path.stat().st_mtime
+                cached = self._mtimes.get(manifest_path)
+                if cached is not None and cached[0] == mtime:
+                    seen.add(cached[1])
+                    continue
+                manifest = parse_manifest(manifest_path)
+                self._mtimes[manifest_path] = (mtime, manifest.name)
+                self._add(manifest)
+                seen.add(manifest.name)
+                changed.append(manifest.name)
+            for name in [n for n, m in self.manifests.items() if m.path is not None and n not in seen]:
+                self._remove(name)
+                changed.append(name)
+        return changed
+
+    def register(self, name: str, tools: List[BaseTool], description: str = "", instructions: str = "") -> None:
+        """在代码中注册（或替换）一个技能，工具已经是对象，不需要导入"""
+        with self._lock:
+            self._add(SkillManifest(name=name, description=description or f"加载 {name} 技能。",
+                                    instructions=instructions))
+            self._tools[name] = list(tools)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            if name in self.manifests:
+                self._remove(name)
+
+    def _add(self, manifest: SkillManifest):
+        self.manifests[manifest.name] = manifest
+        self._loaders[manifest.name] = self._make_loader(manifest)
+        self._forget(manifest.name)   # 清单变化后重新导入
+        self.version += 1
+
+    def _remove(self, name: str):
+        manifest = self.manifests.pop(name)
+        if manifest.path is not None:
+            self._mtimes.pop(manifest.path / MANIFEST_NAME, None)
+        self._loaders.pop(name, None)
+        self._forget(name)
+        self.version += 1
+
+    def _forget(self, name: str):
+        """丢弃已导入的工具和对应的模块，下次使用时重新导入"""
+        self._tools.pop(name, None)
+        prefix = f"skills.{name}."
+        for module_name in [m for m in sys.modules if m.startswith(prefix)]:
+            del sys.modules[module_name]
+
+    # ==================== Loader 工具 ====================
+
+    def _make_loader(self, manifest: SkillManifest) -> BaseTool:
+        """
+        生成 skill_<name> Loader：被调用时导入技能工具，把使用说明返回给模型并更新 skills_loaded
+        """
+        registry = self
+
+        def load_skill(runtime: ToolRuntime) -> Command:
+            tools = registry.tools_for(manifest.name)
+            instructions = manifest.instructions or f"{manifest.name} 技能已成功加载！"
+            listing = "\n".join(f"• {t.name}: {t.description.strip().splitlines()[0]}" for t in tools if t.description)
+            # 说明正文里的 {tools} 替换为工具清单，没有占位符时把清单附在末尾
+            if TOOLS_PLACEHOLDER in instructions:
+                content = instructions.replace(TOOLS_PLACEHOLDER, listing)
+            else:
+                content = f"{instructions}\n\n现在你可以使用以下工具：\n{listing}" if listing else instructions
+            return Command(update={
+                "messages": [ToolMessage(content=content, tool_call_id=runtime.tool_call_id)],
+                "skills_loaded": [manifest.name],
+            })
+
+        return StructuredTool(name=f"{self.loader_prefix}{manifest.name}", description=manifest.description,
+                              func=load_skill, args_schema=_loader_args_schema())
+
+    @property
+    def loader_tools(self) -> List[BaseTool]:
+        """始终暴露给模型的 Loader 工具（不会导入任何技能模块）"""
+        return list(self._loaders.values())
+
+    # ==================== 按需导入技能工具 ====================
+
+    def tools_for(self, name: str) -> List[BaseTool]:
+        """技能的工具列表；第一次调用时导入工具模块，之后直接返回缓存"""
+        tools = self._tools.get(name)
+        if tools is not None:
+            return tools
+        with self._lock:
+            tools = self._tools.get(name)
+            if tools is None:
+                manifest = self.manifests.get(name)
+                if manifest is None:
+                    return []
+                tools = self._tools[name] = [self._resolve(manifest, entry) for entry in manifest.tools]
+        return tools
+
+    @staticmethod
+    def _resolve(manifest: SkillManifest, entry: str) -> BaseTool:
+        """解析 "模块:属性"：技能目录下存在 模块.py 时从文件加载，否则按普通模块导入"""
+        module_name, _, attr = entry.partition(":")
+        file_path = manifest.path / f"{module_name.replace('.', '/')}.py" if manifest.path is not None else None
+        if file_path is not None and file_path.exists():
+            qualified = f"skills.{manifest.name}.{module_name}"
+            module = sys.modules.get(qualified)
+            if module is None:
+                spec = importlib.util.spec_from_file_location(qualified, file_path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[qualified] = module
+                try:
+                    spec.loader.exec_module(module)
+                except BaseException:
+                    del sys.modules[qualified]
+                    raise
+        else:
+            module = importlib.import_module(module_name)
+        tool = getattr(module, attr or manifest.name)
+        if not isinstance(tool, BaseTool):
+            raise TypeError(f"{manifest.name} 的工具入口 {entry} 不是 BaseTool")
+        return tool
+
+    def get_tools_for_skills(self, skills_loaded: List[str]) -> List[BaseTool]:
+        """Loader 工具 + 已加载技能的工具"""
+        tools = self.loader_tools
+        for name in skills_loaded:
+            tools.extend(self.tools_for(name))
+        return tools
+
+    def find_tool(self, tool_name: str, skills_loaded: List[str]) -> Optional[BaseTool]:
+        """在已加载的技能中按名称查找工具（供 wrap_tool_call 执行未注册到 create_agent 的技能工具）"""
+        for name in skills_loaded:
+            for tool in self.tools_for(name):
+                if tool.name == tool_name:
+                    return tool
+        return None
+
+    @property
+    def imported_skills(self) -> List[str]:
+        return list(self._tools)
+
+
+__all__ = ["SkillRegistry", "SkillManifest", "parse_manifest"]
@@ -0,0 +1,277 @@
+# data_analysis 技能的工具：只有模型调用 skill_data_analysis 后才会导入本模块
+#
+# 数据可以直接写在参数里（少量数字），也可以传本地文件引用（CSV / NPY / Parquet），
+# 大数据集不需要模型把数字抄进工具参数。统计全部用 NumPy 分块完成，只返回紧凑的摘要：
+# - 第一遍：count / sum / mean / std / min / max（按块合并均值和二阶中心矩，数值稳定）
+# - 第二遍：在 [min, max] 上做细粒度直方图，分位数和输出的直方图都从它得到
+# .npy 以内存映射方式打开，分块遍历时常驻内存只有一个块；数据不超过 EXACT_QUANTILE_LIMIT 时分位数用精确值。
+import functools
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.tools import tool
+
+CHUNK_SIZE = 1 << 20
+EXACT_QUANTILE_LIMIT = 2_000_000
+FINE_BINS = 1 << 16
+MAX_BINS = 1000
+DEFAULT_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+# 设置后只允许读取该目录下的文件
+DATA_ROOT = os.getenv("SKILL_DATA_ROOT")
+# generate_chart 的图片只写到这个目录
+CHART_DIR = Path(os.getenv("SKILL_CHART_DIR", Path(tempfile.gettempdir()) / "skill_charts"))
+
+
+def _resolve_path(source: str) -> Path:
+    path = Path(source).expanduser().resolve()
+    if DATA_ROOT is not None and not path.is_relative_to(Path(DATA_ROOT).expanduser().resolve()):
+        raise ValueError(f"只允许读取 {DATA_ROOT} 下的文件")
+    if not path.is_file():
+        raise ValueError(f"文件不存在: {source}")
+    return path
+
+
+def _pick_column(frame, column: Optional[str]):
+    if column is not None:
+        if column not in frame.columns:
+            raise ValueError(f"列 {column} 不存在，可选列: {list(frame.columns)[:20]}")
+        return frame[column]
+    numeric = frame.select_dtypes("number")
+    if numeric.shape[1] == 0:
+        raise ValueError("文件中没有数值列，请用 column 指定")
+    return numeric.iloc[:, 0]
+
+
+@functools.lru_cache(maxsize=4)
+def _load_file(path: Path, mtime_ns: int, column: Optional[str]) -> np.ndarray:
+    """按文件读取一列数值（mtime 参与缓存键，文件变化后重新读取）"""
+    suffix = path.suffix.lower()
+    if suffix == ".npy":
+        array = np.load(path, mmap_mode="r")
+        if array.ndim == 2:
+            try:
+                index = int(column) if column is not None else 0
+            except ValueError:
+                raise ValueError(f".npy 二维数组的 column 应为列序号，收到 {column!r}") from None
+            if not 0 <= index < array.shape[1]:
+                raise ValueError(f"列序号 {index} 超出范围，数组形状为 {array.shape}")
+            return array[:, index]
+        return array.reshape(-1)
+    import pandas as pd
+
+    if suffix == ".parquet":
+        try:
+            frame = pd.read_parquet(path, columns=[column] if column is not None else None)
+        except ImportError as exc:
+            raise ValueError("读取 Parquet 需要安装 pyarrow") from exc
+    elif suffix in (".csv", ".tsv", ".txt"):
+        frame = pd.read_csv(path, sep="\t" if suffix == ".tsv" else ",",
+                            usecols=[column] if column is not None else None, engine="c")
+    else:
+        raise ValueError(f"不支持的文件类型 {suffix}，支持 .csv / .tsv / .npy / .parquet")
+    return _pick_column(frame, column).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def load_values(numbers: Optional[List[float]] = None, source: Optional[str] = None,
+                column: Optional[str] = None) -> np.ndarray:
+    """参数里的数字或文件引用 -> 一维数组（.npy 为内存映射，不会整体读入内存）"""
+    if source:
+        path = _resolve_path(source)
+        return _load_file(path, path.stat().st_mtime_ns, column)
+    if numbers:
+        return np.asarray(numbers, dtype=np.float64)
+    raise ValueError("请提供 numbers 或 source")
+
+
+def _chunks(values: np.ndarray, chunk_size: int = CHUNK_SIZE):
+    for start in range(0, len(values), chunk_size):
+        chunk = np.asarray(values[start:start + chunk_size], dtype=np.float64)
+        if not np.isfinite(chunk).all():
+            chunk = chunk[np.isfinite(chunk)]
+        yield chunk
+
+
+def _round(value: float, digits: int = 6) -> float:
+    return float(f"{value:.{digits}g}")
+
+
+def describe(values: np.ndarray, quantiles=DEFAULT_QUANTILES, bins: int = 10,
+             chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    分块计算统计摘要；NaN / inf 计入 missing，不参与统计。
+    超过 EXACT_QUANTILE_LIMIT 时分位数由细粒度直方图线性插值得到，误差不超过 quantile_error
+    """
+    qs = np.asarray(quantiles, dtype=np.float64).reshape(-1)
+    if not ((qs >= 0) & (qs <= 1)).all():
+        raise ValueError("分位数必须在 0~1 之间")
+    bins = int(bins)
+    if not 1 <= bins <= MAX_BINS:
+        raise ValueError(f"bins 必须在 1~{MAX_BINS} 之间")
+    count, mean, m2 = 0, 0.0, 0.0
+    total, low, high = 0.0, math.inf, -math.inf
+    for chunk in _chunks(values, chunk_size):
+        if not chunk.size:
+            continue
+        n = chunk.size
+        chunk_sum = float(chunk.sum())
+        chunk_mean = chunk_sum / n
+        chunk_m2 = float(np.square(chunk - chunk_mean).sum())
+        delta = chunk_mean - mean
+        merged = count + n
+        mean += delta * n / merged
+        m2 += chunk_m2 + delta * delta * count * n / merged
+        count, total = merged, total + chunk_sum
+        low, high = min(low, float(chunk.min())), max(high, float(chunk.max()))
+
+    summary = {"count": count, "missing": int(len(values) - count)}
+    if count == 0:
+        return summary
+    summary.update(sum=total, mean=mean, std=math.sqrt(m2 / (count - 1)) if count > 1 else 0.0, min=low, max=high)
+
+    fine_bins = bins * max(1, FINE_BINS // bins)   # 输出直方图的每个桶正好由整数个细桶合成
+    fine = np.zeros(fine_bins, dtype=np.int64)
+    width = (high - low) / fine_bins or 1.0
+    exact = count <= EXACT_QUANTILE_LIMIT
+    kept = []
+    for chunk in _chunks(values, chunk_size):
+        index = ((chunk - low) / width).astype(np.int64)
+        np.minimum(index, fine_bins - 1, out=index)
+        fine += np.bincount(index, minlength=fine_bins)
+        if exact:
+            kept.append(chunk)
+
+    if exact:
+        points = np.quantile(np.concatenate(kept), qs)
+    else:
+        # 目标秩落在哪个细桶，再在桶内按均匀分布插值
+        cumulative = np.cumsum(fine)
+        ranks = qs * (count - 1)
+        index = np.searchsorted(cumulative, ranks, side="right")
+        before = np.where(index > 0, cumulative[index - 1], 0)
+        inside = (ranks - before + 0.5) / np.maximum(fine[index], 1)
+        points = np.clip(low + (index + inside) * width, low, high)
+        summary["quantile_error"] = _round(width)
+    summary["quantiles"] = {f"p{q * 100:g}": float(p) for q, p in zip(qs, points)}
+
+    counts = fine.reshape(bins, -1).sum(axis=1)
+    summary["histogram"] = {"edges": [_round(e) for e in np.linspace(low, high, bins + 1)],
+                            "counts": counts.tolist()}
+    for key in ("sum", "mean", "std", "min", "max"):
+        summary[key] = _round(summary[key])
+    summary["quantiles"] = {k: _round(v) for k, v in summary["quantiles"].items()}
+    return summary
+
+
+@tool
+def calculate_statistics(numbers: Optional[List[float]] = None, source: Optional[str] = None,
+                         column: Optional[str] = None, quantiles: Optional[List[float]] = None,
+                         bins: int = 10) -> str:
+    """
+    计算数据的统计信息：数量、缺失值、总和、平均值、标准差、最小值、最大值、分位数和直方图。
+    数据量大时不要把数字写进参数，用 source 传本地文件路径。
+
+    Args:
+        numbers: 少量数字可以直接传列表
+        source: 本地数据文件路径（.csv / .tsv / .npy / .parquet），.npy 以内存映射方式读取
+        column: 文件中的列名（.npy 二维数组为列序号），默认取第一个数值列
+        quantiles: 要计算的分位数（0~1），默认 0.01/0.05/0.25/0.5/0.75/0.95/0.99
+        bins: 直方图桶数（1~1000）
+    """
+    try:
+        values = load_values(numbers, source, column)
+        summary = describe(values, quantiles or DEFAULT_QUANTILES, bins)
+    except ValueError as exc:
+        return f"错误: {exc}"
+    if summary["count"] == 0:
+        return "错误: 没有有效的数值"
+    return f"统计结果: {json.dumps(summary, ensure_ascii=False)}"
+
+
+def _decimate(values: np.ndarray, max_points: int):
+    """
+    折线图降采样：NaN / inf 不绘制，其余点均分成 max_points // 2 个桶（最后一个桶包含余下的点），
+    每个桶保留最小值和最大值，尖峰不会被抹掉
+    """
+    values = np.asarray(values, dtype=np.float64)
+    x = np.flatnonzero(np.isfinite(values))
+    if len(x) <= max_points:
+        return x, values[x]
+    y = values[x]
+    bounds = np.linspace(0, len(x), max_points // 2 + 1).astype(np.int64)
+    picks = []
+    for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        segment = y[start:stop]
+        lo, hi = start + int(segment.argmin()), start + int(segment.argmax())
+        picks += [min(lo, hi), max(lo, hi)]
+    picks = np.asarray(picks)
+    return x[picks], y[picks]
+
+
+@tool
+def generate_chart(data: Optional[List[float]] = None, chart_type: str = "bar", source: Optional[str] = None,
+                   column: Optional[str] = None, max_points: int = 2000) -> str:
+    """
+    根据数据生成 PNG 图表（保存在图表目录中），返回图片路径和绘制的点数。
+
+    Args:
+        data: 少量数字可以直接传列表
+        chart_type: 图表类型 (bar, line, pie, hist)；数据超过 max_points 时 bar 按直方图绘制
+        source: 本地数据文件路径（.csv / .tsv / .npy / .parquet）
+        column: 文件中的列名，默认取第一个数值列
+        max_points: 最多绘制的点数，折线图超过时按桶保留最小值和最大值
+    """
+    try:
+        values = load_values(data, source, column)
+    except ValueError as exc:
+        return f"错误: {exc}"
+    if chart_type not in ("bar", "line", "pie", "hist"):
+        return f"错误: 不支持的图表类型 {chart_type}"
+    max_points = max(2, max_points)
+    if chart_type == "pie" and len(values) > 50:
+        return "错误: 饼图最多 50 个数据点，请改用 hist"
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 4.5))
+    try:
+        if chart_type == "line":
+            x, y = _decimate(values, max_points)
+            if not len(x):
+                return "错误: 没有有效的数值"
+            ax.plot(x, y, linewidth=0.8)
+            plotted = len(x)
+        elif chart_type == "pie":
+            sizes = np.asarray(values, dtype=np.float64)
+            sizes = sizes[np.isfinite(sizes)]
+            if not sizes.size or (sizes < 0).any():
+                return "错误: 饼图需要非负的有效数值"
+            ax.pie(sizes)
+            plotted = len(sizes)
+        elif chart_type == "bar" and len(values) <= max_points:
+            ax.bar(np.arange(len(values)), np.asarray(values, dtype=np.float64))
+            plotted = len(values)
+        else:
+            summary = describe(values, quantiles=(), bins=max(1, min(100, max_points)))
+            if summary["count"] == 0:
+                return "错误: 没有有效的数值"
+            edges, counts = summary["histogram"]["edges"], summary["histogram"]["counts"]
+            ax.stairs(counts, edges, fill=True)
+            chart_type, plotted = "hist", len(counts)
+        ax.set_title(f"{Path(source).name if source else 'data'} (n={len(values)})")
+
+        # 图片只写到固定的图表目录，文件名随机生成，模型不能指定路径
+        CHART_DIR.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(prefix="chart_", suffix=".png", dir=CHART_DIR, delete=False) as f:
+            output_path = f.name
+            fig.savefig(f, format="png", dpi=100, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return (f"已生成 {chart_type} 图表: {output_path}，原始数据 {len(values)} 个点，"
+            f"绘制 {plotted} 个{'桶' if chart_type == 'hist' else '点'}")
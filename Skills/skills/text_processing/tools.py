@@ -0,0 +1,576 @@
+# text_processing 技能的工具：只有模型调用 skill_text_processing 后才会导入本模块
+#
+# 文本可以直接写在参数里，也可以传本地文件路径；文件按块流式读取（每块在句末切开），常驻内存与文件大小无关。
+# 分词不依赖词典：中文取连续汉字的 2 / 3 字 n-gram（常见虚字视为分隔符），英文取单词。
+# 所有运算都在块内用 NumPy 向量化完成：文本转成码点数组，n-gram 编码成整数键再哈希到固定数量的桶，
+# 词频、句子得分用 bincount 累加，整体是线性时间。
+#
+# 默认以文档内的句子为单位计算 IDF；仓库不附带 IDF 表，需要时用 build-idf 命令从领域语料离线构建（见文件末尾），
+# 它是一个按同样哈希桶排列的 float32 .npy，以内存映射方式打开。
+import functools
+import heapq
+import io
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+from langchain_core.tools import tool
+
+CHUNK_CHARS = 1 << 18
+DEFAULT_BITS = 21
+# 没有 IDF 表时按输入大小决定桶数，短文本不必分配 2^21 个桶
+MIN_BITS = 10
+MAX_KEYWORDS = 50
+MAX_POOL = 400
+MAX_TERM_CHARS = 16
+IDF_PATH = Path(os.getenv("TEXT_IDF_PATH", Path(__file__).with_name("idf.npy")))
+# 设置后只允许读取该目录下的文件
+DATA_ROOT = os.getenv("SKILL_DATA_ROOT")
+
+SENTENCE_ENDS = ("。", "！", "？", "；", "!", "?", ";", "\n", ". ")
+STOP_CHARS = "的了是在和与及或也就都很又这那我你他她它们吗呢吧啊着之其被把"
+STOP_WORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "all", "any", "can", "had", "her", "was", "one", "our", "out",
+    "has", "him", "his", "how", "its", "may", "new", "now", "see", "who", "did", "get", "she", "too", "use", "that",
+    "with", "have", "this", "will", "your", "from", "they", "been", "were", "which", "their", "there", "what",
+    "when", "would", "about", "into", "than", "then", "them", "these", "some", "could", "other", "also", "more",
+    "is", "of", "to", "in", "it", "on", "as", "at", "be", "by", "or", "an", "if", "we", "so", "do", "no", "up",
+}
+
+_WORD_FLAG = 1 << 60
+_HASH_MUL = np.uint64(0x9E3779B97F4A7C15)
+_POWERS = np.array([pow(131, i, 1 << 64) for i in range(64)], dtype=np.uint64)
+_STOP_TABLE = np.zeros(0x10000, dtype=bool)
+_STOP_TABLE[[ord(c) for c in STOP_CHARS]] = True
+
+
+def _word_key(word: str) -> int:
+    """与 _features 中向量化的单词哈希一致，用于停用词表"""
+    value = sum(ord(c) * int(_POWERS[min(i, 63)]) for i, c in enumerate(word.lower())) % (1 << 64)
+    return (value & (_WORD_FLAG - 1)) | _WORD_FLAG
+
+
+_STOP_WORD_KEYS = np.array(sorted(_word_key(w) for w in STOP_WORDS), dtype=np.int64)
+
+
+def _resolve_path(source: str) -> Path:
+    path = Path(source).expanduser().resolve()
+    if DATA_ROOT is not None and not path.is_relative_to(Path(DATA_ROOT).expanduser().resolve()):
+        raise ValueError(f"只允许读取 {DATA_ROOT} 下的文件")
+    if not path.is_file():
+        raise ValueError(f"文件不存在: {source}")
+    return path
+
+
+@functools.lru_cache(maxsize=1)
+def load_idf(path: Path = IDF_PATH) -> Optional[np.ndarray]:
+    """预先构建的 IDF 表（内存映射）；不存在时返回 None"""
+    if not path.is_file():
+        return None
+    table = np.load(path, mmap_mode="r")
+    if table.ndim != 1 or table.size & (table.size - 1):
+        raise ValueError(f"{path} 不是有效的 IDF 表")
+    return table
+
+
+def _bits(size: Optional[int] = None) -> int:
+    """
+    桶数的位数：有 IDF 表时必须与表一致；否则按输入大小（字符数或文件字节数）取，
+    每个字符最多产生 3 个特征，桶数取特征数的平方量级（上限 2^21），短文本里几乎不会有两个 n-gram 落进同一个桶
+    """
+    table = load_idf()
+    if table is not None:
+        return int(table.size).bit_length() - 1
+    if size is None:
+        return DEFAULT_BITS
+    return min(DEFAULT_BITS, max(MIN_BITS, 2 * (3 * size).bit_length()))
+
+
+# ==================== 分块与分词 ====================
+
+def _blocks(stream, chunk_chars: int = CHUNK_CHARS, ends=SENTENCE_ENDS):
+    """按块读取文本，每块在最后一个句末标点处切开，句子不会跨块"""
+    carry = ""
+    while True:
+        data = stream.read(chunk_chars)
+        if not data:
+            if carry:
+                yield carry
+            return
+        data = carry + data
+        cut = max(data.rfind(end) for end in ends)
+        if cut < 0 and len(data) < 4 * chunk_chars:
+            carry = data
+            continue
+        cut = cut + 1 if cut >= 0 else len(data)
+        yield data[:cut]
+        carry = data[cut:]
+
+
+def _codepoints(block: str) -> np.ndarray:
+    return np.frombuffer(block.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+
+def _sentence_ids(cp: np.ndarray, by_line: bool = False):
+    """每个字符所属句子的序号（句末标点归入本句），以及块内句子数"""
+    if by_line:
+        ends = cp == 10
+    else:
+        ends = np.isin(cp, [0x3002, 0xFF01, 0xFF1F, 0xFF1B, 33, 63, 59, 10])
+        ends[:-1] |= (cp[:-1] == 46) & np.isin(cp[1:], [32, 10])
+    total = np.cumsum(ends)
+    return total - ends, int(total[-1]) + (0 if ends[-1] else 1)
+
+
+def _features(cp: np.ndarray, words: Optional[Dict[int, str]] = None, block: str = ""):
+    """
+    块内所有特征的整数键和起始位置：
+    - 连续汉字（虚字除外）的 2-gram / 3-gram：码点直接拼成键，可以无损还原
+    - 英文单词（字母开头，长度 2~32，去掉停用词）：多项式哈希，原文记录在 words 中
+    """
+    cjk = (cp >= 0x4E00) & (cp <= 0x9FFF)
+    cjk[cjk] = ~_STOP_TABLE[cp[cjk]]
+    bigram = np.flatnonzero(cjk[:-1] & cjk[1:])
+    trigram = np.flatnonzero(cjk[:-2] & cjk[1:-1] & cjk[2:])
+    keys = [(cp[bigram] << 16) | cp[bigram + 1], (cp[trigram] << 32) | (cp[trigram + 1] << 16) | cp[trigram + 2]]
+    positions = [bigram, trigram]
+
+    lower = cp | 0x20
+    letter = (lower >= 97) & (lower <= 122)
+    alnum = letter | ((cp >= 48) & (cp <= 57))
+    inside = np.flatnonzero(alnum)
+    if inside.size:
+        new_word = np.ones(inside.size, dtype=bool)
+        new_word[1:] = np.diff(inside) > 1
+        starts = np.flatnonzero(new_word)
+        lengths = np.diff(np.append(starts, inside.size))
+        offset = np.arange(inside.size) - np.repeat(starts, lengths)
+        hashed = np.add.reduceat(lower[inside].astype(np.uint64) * _POWERS[np.minimum(offset, 63)], starts)
+        begin = inside[starts]
+        word_keys = (hashed & np.uint64(_WORD_FLAG - 1)).astype(np.int64) | _WORD_FLAG
+        keep = (lengths >= 2) & (lengths <= 32) & letter[begin] & ~np.isin(word_keys, _STOP_WORD_KEYS)
+        word_keys, begin, lengths = word_keys[keep], begin[keep], lengths[keep]
+        if words is not None and word_keys.size:
+            order = np.argsort(word_keys, kind="stable")
+            first = order[np.concatenate([[True], np.diff(word_keys[order]) != 0])]
+            for key, index in zip(word_keys[first].tolist(), first.tolist()):
+                if key not in words:
+                    words[key] = block[begin[index]:begin[index] + lengths[index]].lower()
+        keys.append(word_keys)
+        positions.append(begin)
+    return np.concatenate(keys), np.concatenate(positions)
+
+
+def _unique(values: np.ndarray) -> np.ndarray:
+    """排序去重（np.unique 在新版 NumPy 中对整数走哈希实现，这里的数据量下比排序慢很多）"""
+    values = np.sort(values)
+    keep = np.ones(values.size, dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+
+def _buckets(keys: np.ndarray, bits: int) -> np.ndarray:
+    return ((keys.astype(np.uint64) * _HASH_MUL) >> np.uint64(64 - bits)).astype(np.int64)
+
+
+def _decode(key: int, words: Dict[int, str]) -> str:
+    if key >= _WORD_FLAG:
+        return words.get(key, "")
+    if key >= 1 << 32:
+        return chr(key >> 32) + chr((key >> 16) & 0xFFFF) + chr(key & 0xFFFF)
+    return chr(key >> 16) + chr(key & 0xFFFF)
+
+
+# ==================== 第一遍：词频 ====================
+
+class TermStats:
+    """
+    一遍扫描得到的统计：每个桶的词频、代表键和句子总数。
+    document_frequency 为 True 时还统计每个桶出现过的句子数（没有 IDF 表或构建 IDF 表时需要）
+    """
+
+    def __init__(self, bits: int, document_frequency: bool = True):
+        self.bits = bits
+        self.document_frequency = document_frequency
+        self.tf = np.zeros(1 << bits, dtype=np.int64)
+        self.df = np.zeros(1 << bits if document_frequency else 0, dtype=np.int64)
+        self.rep = np.zeros(1 << bits, dtype=np.int64)
+        self.words: Dict[int, str] = {}
+        self.sentences = 0
+        self.chars = 0
+
+    def add(self, block: str, by_line: bool = False):
+        cp = _codepoints(block)
+        if not cp.size:
+            return
+        sid, count = _sentence_ids(cp, by_line)
+        keys, positions = _features(cp, self.words, block)
+        self.sentences += count
+        self.chars += len(block)
+        if not keys.size:
+            return
+        buckets = _buckets(keys, self.bits)
+        self.tf += np.bincount(buckets, minlength=self.tf.size)
+        # 哈希冲突时桶的代表键取块内出现次数最多的那个，避免低频词覆盖高频词
+        ordered = np.sort(keys)
+        first = np.flatnonzero(np.concatenate([[True], ordered[1:] != ordered[:-1]]))
+        unique, counts = ordered[first], np.diff(np.append(first, ordered.size))
+        owner = _buckets(unique, self.bits)
+        winner = np.lexsort((counts, owner))
+        self.rep[owner[winner]] = unique[winner]   # 同一个桶后写入的是次数最多的键
+        if self.document_frequency:
+            # 同一句子内重复出现只计一次
+            pairs = _unique((sid[positions] << self.bits) | buckets)
+            self.df += np.bincount(pairs & ((1 << self.bits) - 1), minlength=self.df.size)
+
+    def idf(self) -> np.ndarray:
+        table = load_idf()
+        if table is not None and table.size == self.tf.size:
+            return np.asarray(table, dtype=np.float32)
+        return (np.log((1.0 + self.sentences) / (1.0 + self.df)) + 1.0).astype(np.float32)
+
+    def weights(self) -> np.ndarray:
+        """每个桶的 TF-IDF 权重，词频取对数避免高频词压过一切"""
+        return np.log1p(self.tf).astype(np.float32) * self.idf()
+
+
+def _open(text: Optional[str], source: Optional[str], encoding: str):
+    if source:
+        return open(_resolve_path(source), encoding=encoding, errors="replace", newline="")
+    if text:
+        return io.StringIO(text)
+    raise ValueError("请提供 text 或 source")
+
+
+def _scan(text: Optional[str], source: Optional[str], encoding: str) -> TermStats:
+    if source:
+        path = _resolve_path(source)
+        stat = path.stat()
+        return _scan_file(path, stat.st_mtime_ns, encoding, _bits(stat.st_size))
+    if not text:
+        raise ValueError("请提供 text 或 source")
+    stats = TermStats(_bits(len(text)), document_frequency=load_idf() is None)
+    for block in _blocks(io.StringIO(text)):
+        stats.add(block)
+    return stats
+
+
+@functools.lru_cache(maxsize=2)
+def _scan_file(path: Path, mtime_ns: int, encoding: str, bits: int) -> TermStats:
+    """文件的第一遍统计按 (路径, mtime) 缓存，摘要和关键词可以共用"""
+    stats = TermStats(bits, document_frequency=load_idf() is None)
+    with open(path, encoding=encoding, errors="replace", newline="") as f:
+        for block in _blocks(f):
+            stats.add(block)
+    return stats
+
+
+# ==================== 关键词 ====================
+
+def _trigram_support(term: str, stats: TermStats) -> int:
+    """
+    中文词内每个相邻三字组的词频取最小值，是这个词在原文中出现次数的上限；
+    任何一个三字组没出现过，说明拼出来的词不在原文中
+    """
+    keys = np.array([(ord(a) << 32) | (ord(b) << 16) | ord(c) for a, b, c in zip(term, term[1:], term[2:])],
+                    dtype=np.int64)
+    return int(stats.tf[_buckets(keys, stats.bits)].min()) if keys.size else 0
+
+
+def _similar(a: int, b: int) -> bool:
+    """词频接近（不低于 80%）才合并，例如“智能”远比“人工智能”常见时两者都保留"""
+    return min(a, b) >= 0.8 * max(a, b)
+
+
+class _TermIndex:
+    """
+    已选词及其索引：完整文本、所有子串、前缀、后缀各一张表。
+    新词只需查表就能找到可以合并的已选词，不用和所有已选词两两比较；词长有上限，每个词的表项数是常数
+    """
+
+    def __init__(self, occurrences: Callable[[str], int]):
+        self.occurrences = occurrences   # 首尾重叠拼出的词在原文中的出现次数
+        self.items: Dict[int, List] = {}   # 序号 -> [文本, 词频]，序号即加入顺序（得分顺序）
+        self._texts: Dict[str, Set[int]] = {}
+        self._substrings: Dict[str, Set[int]] = {}
+        self._prefixes: Dict[str, Set[int]] = {}
+        self._suffixes: Dict[str, Set[int]] = {}
+        self._next = 0
+
+    def _tables(self, term: str):
+        yield self._texts, term
+        for i in range(len(term)):
+            for j in range(i + 1, len(term) + 1):
+                if j - i < len(term):
+                    yield self._substrings, term[i:j]
+        if not term.isascii():
+            for k in range(1, len(term)):
+                yield self._prefixes, term[:k]
+                yield self._suffixes, term[-k:]
+
+    def add(self, term: str, tf: int) -> int:
+        key, self._next = self._next, self._next + 1
+        self.items[key] = [term, tf]
+        for table, text in self._tables(term):
+            table.setdefault(text, set()).add(key)
+        return key
+
+    def remove(self, key: int):
+        term, _ = self.items.pop(key)
+        for table, text in self._tables(term):
+            table[text].discard(key)
+
+    def _related(self, term: str) -> Dict[int, tuple]:
+        """与 term 互相包含或首尾重叠的已选词：序号 -> (合并后的文本, 是否首尾重叠)"""
+        found = {}
+        for key in self._substrings.get(term, ()):
+            found[key] = (self.items[key][0], False)
+        for i in range(len(term)):
+            for j in range(i + 1, len(term) + 1):
+                for key in self._texts.get(term[i:j], ()):
+                    found.setdefault(key, (term, False))
+        if not term.isascii():
+            for k in range(len(term) - 1, 0, -1):
+                for key in self._prefixes.get(term[-k:], ()):
+                    found.setdefault(key, (term + self.items[key][0][k:], True))
+                for key in self._suffixes.get(term[:k], ()):
+                    found.setdefault(key, (self.items[key][0] + term[k:], True))
+        return found
+
+    def overlaps(self, term: str) -> bool:
+        return bool(self._related(term))
+
+    def partner(self, term: str, tf: int, exclude: int = -1):
+        """
+        序号最小的可合并已选词：(序号, 合并后的文本, 合并后的词频)，没有时返回 None。
+        一方包含另一方时保留较长的；中文首尾重叠时拼成更长的词（人工智 + 工智能 -> 人工智能，机器学 + 学习 -> 机器学习），
+        但只有拼出的词在原文中至少出现两次、并且和两部分出现得一样多时才接受
+        """
+        found = self._related(term)
+        for key in sorted(found):
+            other = self.items[key][1]
+            if key == exclude or not _similar(tf, other):
+                continue
+            merged, joined = found[key]
+            if not joined:
+                return key, merged, other
+            if len(merged) > MAX_TERM_CHARS:
+                continue
+            count = self.occurrences(merged)
+            if count >= 2 and _similar(count, max(tf, other)):
+                return key, merged, count
+        return None
+
+    def update(self, key: int, term: str, tf: int):
+        self.remove(key)
+        self.items[key] = [term, tf]
+        for table, text in self._tables(term):
+            table.setdefault(text, set()).add(key)
+
+
+def _select_terms(candidates: List[int], stats: TermStats, count: int,
+                  occurrences: Optional[Callable[[str], int]] = None) -> List[str]:
+    """
+    按得分从高到低挑选，词频接近的 n-gram 互相包含时保留较长的、首尾重叠时拼成更长的词
+    （如 人工智 + 工智能 -> 人工智能），直到凑够 count 个。
+    只出现一次的 n-gram 在原文里没有成词的依据（“器学习”“能制造”这类跨词片段大多如此），
+    只在重复出现的词不够时补位，先补二字词和英文单词，并且不能和已选词互相包含或首尾重叠。
+    occurrences 给出拼出的词在原文中的出现次数，默认用三字组词频的下限估计
+    """
+    index = _TermIndex(occurrences or functools.partial(_trigram_support, stats=stats))
+    singles = []
+    for bucket in candidates:
+        term = _decode(int(stats.rep[bucket]), stats.words)
+        if not term:
+            continue
+        tf = int(stats.tf[bucket])
+        if tf < 2:
+            singles.append(term)
+            continue
+        # 凑够 count 个以后，剩下的候选只用来把已选词补全成更长的词（如 机器学 + 器学习 -> 机器学习）
+        if len(index.items) >= count and index.partner(term, tf) is None:
+            continue
+        current = index.add(term, tf)
+        # 合并后的词可能又能和别的已选词合并，较早（得分较高）的一项保留位置
+        while True:
+            text, tf = index.items[current]
+            match = index.partner(text, tf, exclude=current)
+            if match is None:
+                break
+            other, merged, merged_tf = match
+            keep, drop = min(current, other), max(current, other)
+            index.remove(drop)
+            index.update(keep, merged, merged_tf if keep == other else tf)
+            current = keep
+    for term in sorted(singles, key=lambda term: len(term) > 2 and not term.isascii()):
+        if len(index.items) >= count:
+            break
+        if not index.overlaps(term):
+            index.add(term, 1)
+    return [term for _, (term, _) in sorted(index.items.items())[:count]]
+
+
+def _textrank(stream, stats: TermStats, candidates: np.ndarray, prior: np.ndarray, damping: float = 0.5,
+              iterations: int = 30):
+    """
+    第二遍：候选词在同一句子中共现构成无向加权图，PageRank 得分作为关键词得分。
+    随机跳转按 prior（候选词的 TF-IDF 权重）分布，damping 取 0.5 让先验和共现结构各占一半；
+    取经典的 0.85 时，和大量候选词都共现的 n-gram（多是跨词边界的片段）会排到最前
+    """
+    index = np.full(stats.tf.size, -1, dtype=np.int64)
+    index[candidates] = np.arange(candidates.size)
+    cooccurrence = np.zeros((candidates.size, candidates.size), dtype=np.float32)
+    for block in _blocks(stream):
+        cp = _codepoints(block)
+        if not cp.size:
+            continue
+        sid, count = _sentence_ids(cp)
+        keys, positions = _features(cp)
+        hit = index[_buckets(keys, stats.bits)]
+        mask = hit >= 0
+        pairs = _unique((sid[positions[mask]] << 20) | hit[mask])
+        presence = np.zeros((count, candidates.size), dtype=np.float32)
+        presence[pairs >> 20, pairs & ((1 << 20) - 1)] = 1.0
+        cooccurrence += presence.T @ presence
+    np.fill_diagonal(cooccurrence, 0.0)
+    out_weight = cooccurrence.sum(axis=1)
+    transition = cooccurrence / np.where(out_weight == 0, 1.0, out_weight)[:, None]
+    prior = np.maximum(prior, 0).astype(np.float32)
+    prior = prior / prior.sum() if prior.sum() > 0 else np.full(candidates.size, 1.0 / candidates.size, dtype=np.float32)
+    rank = prior.copy()
+    for _ in range(iterations):
+        rank = (1 - damping) * prior + damping * (transition.T @ rank)
+    return rank
+
+
+@tool
+def extract_keywords(text: Optional[str] = None, source: Optional[str] = None, num_keywords: int = 5,
+                     method: str = "tfidf", encoding: str = "utf-8") -> str:
+    """
+    从文本中提取关键词，支持中文（汉字 n-gram）和英文。长文档用 source 传文件路径，不要把全文写进参数。
+
+    Args:
+        text: 要分析的文本
+        source: 本地文本文件路径，按块流式读取
+        num_keywords: 要提取的关键词数量（最多 50 个）
+        method: tfidf（一遍扫描，最快）或 textrank（再扫描一遍，按候选词共现图排序）
+        encoding: 文件编码
+    """
+    if method not in ("tfidf", "textrank"):
+        return f"错误: 不支持的方法 {method}"
+    num_keywords = min(max(num_keywords, 1), MAX_KEYWORDS)
+    try:
+        stats = _scan(text, source, encoding)
+        scores = stats.weights()
+        pool = min(max(num_keywords * 20, 100), MAX_POOL, int(np.count_nonzero(stats.tf)))
+        if pool == 0:
+            return "关键词: "
+        candidates = np.argpartition(-scores, pool - 1)[:pool]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        if method == "textrank":
+            with _open(text, source, encoding) as stream:
+                rank = _textrank(stream, stats, candidates, scores[candidates])
+            candidates = candidates[np.argsort(-rank, kind="stable")]
+    except ValueError as exc:
+        return f"错误: {exc}"
+    except LookupError:
+        return f"错误: 不支持的编码 {encoding}"
+    # 直接传入的文本可以精确统计拼出的词；文件只做一遍统计，用三字组词频估计
+    occurrences = None if source else text.count
+    return f"关键词: {', '.join(_select_terms(candidates.tolist(), stats, num_keywords, occurrences))}"
+
+
+# ==================== 摘要 ====================
+
+@tool
+def summarize_text(text: Optional[str] = None, source: Optional[str] = None, max_length: int = 200,
+                   max_sentences: int = 5, encoding: str = "utf-8") -> str:
+    """
+    生成抽取式摘要：按句子包含的关键词权重给句子打分，挑选得分最高的句子并按原文顺序输出。
+    长文档用 source 传文件路径，不要把全文写进参数。
+
+    Args:
+        text: 要摘要的文本
+        source: 本地文本文件路径，按块流式读取
+        max_length: 摘要最大长度（字符）
+        max_sentences: 摘要最多包含的句子数
+        encoding: 文件编码
+    """
+    try:
+        stats = _scan(text, source, encoding)
+        weights = stats.weights()
+        keep = max_sentences * 4
+        heap: List[tuple] = []   # (得分, -句子序号, 句子)，保留得分最高的 keep 句
+        base = 0
+        with _open(text, source, encoding) as stream:
+            for block in _blocks(stream):
+                cp = _codepoints(block)
+                if not cp.size:
+                    continue
+                sid, count = _sentence_ids(cp)
+                keys, positions = _features(cp)
+                owner = sid[positions]
+                score = np.bincount(owner, weights=weights[_buckets(keys, stats.bits)], minlength=count)
+                terms = np.bincount(owner, minlength=count)
+                score = score / np.sqrt(np.maximum(terms, 1))
+                ends = np.flatnonzero(np.diff(sid)) + 1
+                starts, stops = np.concatenate([[0], ends]), np.concatenate([ends, [cp.size]])
+                for i in np.argsort(-score)[:keep].tolist():
+                    item = (float(score[i]), -(base + i))
+                    if item[0] <= 0 or (len(heap) >= keep and item <= heap[0][:2]):
+                        break
+                    entry = item + (block[starts[i]:stops[i]].strip(),)
+                    if len(heap) < keep:
+                        heapq.heappush(heap, entry)
+                    else:
+                        heapq.heapreplace(heap, entry)
+                base += count
+    except ValueError as exc:
+        return f"错误: {exc}"
+    except LookupError:
+        return f"错误: 不支持的编码 {encoding}"
+
+    chosen, length, seen = [], 0, set()
+    for score, order, sentence in sorted(heap, reverse=True):
+        if not sentence or sentence in seen:
+            continue
+        if length + len(sentence) > max_length and chosen:
+            continue
+        chosen.append((-order, sentence[:max_length]))
+        seen.add(sentence)
+        length += len(sentence)
+        if len(chosen) >= max_sentences or length >= max_length:
+            break
+    if not chosen:
+        content = text if text else ""
+        return f"摘要: {content[:max_length]}"
+    return f"摘要: {''.join(s if s[-1] in '。！？!?' else s + ' ' for _, s in sorted(chosen)).strip()}"
+
+
+def build_idf(paths: List[Path], output: Path, bits: int = DEFAULT_BITS, encoding: str = "utf-8") -> int:
+    """从语料构建 IDF 表：每行是一篇文档。返回文档数"""
+    stats = TermStats(bits)
+    for path in paths:
+        with open(path, encoding=encoding, errors="replace", newline="") as f:
+            for block in _blocks(f, ends=("\n",)):
+                stats.add(block, by_line=True)
+    idf = np.log((1.0 + stats.sentences) / (1.0 + stats.df)) + 1.0
+    np.save(output, idf.astype(np.float32))
+    return stats.sentences
+
+
+if __name__ == "__main__":
+    #   python tools.py build-idf corpus1.txt corpus2.txt -o idf.npy
+    import argparse
+
+    parser = argparse.ArgumentParser(description="text_processing 技能工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build-idf", help="从语料构建内存映射 IDF 表（每行一篇文档）")
+    build.add_argument("corpus", nargs="+", type=Path)
+    build.add_argument("-o", "--output", type=Path, default=IDF_PATH)
+    build.add_argument("--bits", type=int, default=DEFAULT_BITS)
+    build.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args()
+    documents = build_idf(args.corpus, args.output, args.bits, args.encoding)
+    print(f"已从 {documents} 篇文档构建 IDF 表: {args.output}（{1 << args.bits} 个桶）")
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+基于向量检索的工具筛选：技能和工具很多时，只把与当前对话最相关的 top-k 个工具 schema 发给模型
+
+- 每个工具的 名称 + 描述 + 参数说明 预先向量化，可以离线构建并保存为 .npz（见文件末尾的命令行）
+- 每次模型调用时，用最近一轮对话（最后一条用户消息及其后的 assistant / 工具消息）作为查询，按余弦相似度给候选工具排序
+- 在 top_k 和 token_budget（工具 schema 的估算 token 数）两个限制内从高到低选取
+- 统计每次调用全部候选工具与实际发送工具的 schema token 数，得到节省的 prompt token
+
+默认的 HashingEmbedder 不依赖任何模型：中文按单字 + 双字、英文按单词哈希到固定维度，再按候选工具集合计算 IDF 权重。
+有条件时可以传入 embed_fn（例如 DashScopeEmbeddings().embed_documents）换成语义向量。
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.tools import BaseTool
+
+from deepseek_reasoner_chat_model import estimate_tokens, tool_to_openai_schema
+from skill_registry import LOADER_PREFIX
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RUN_RE = re.compile(r"[一-鿿]+")
+
+
+def tool_text(tool: BaseTool) -> str:
+    """参与向量化的文本：名称（下划线拆成单词）+ 描述 + 参数名和参数说明"""
+    parts = [tool.name.replace("_", " "), tool.description or ""]
+    schema = tool_to_openai_schema(tool)["function"].get("parameters") or {}
+    for name, prop in (schema.get("properties") or {}).items():
+        parts.append(f"{name} {prop.get('description', '')}")
+    return "\n".join(parts)
+
+
+def schema_tokens(tool: BaseTool) -> int:
+    """工具 schema 序列化后的估算 token 数"""
+    return estimate_tokens(json.dumps(tool_to_openai_schema(tool), ensure_ascii=False))
+
+
+class HashingEmbedder:
+    """
+    特征哈希向量：中文连续片段取单字和相邻双字，英文取单词；词频取 1 + log(tf)
+    用 crc32 而不是内置 hash，保证不同进程里的向量一致（预先构建的索引才能复用）
+    """
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def features(self, text: str) -> List[str]:
+        text = text.lower()
+        features = _WORD_RE.findall(text)
+        for run in _CJK_RUN_RE.findall(text):
+            features.extend(run)
+            features.extend(run[i:i + 2] for i in range(len(run) - 1))
+        return features
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[int, int] = {}
+            for feature in self.features(text):
+                index = zlib.crc32(feature.encode("utf-8")) % self.dim
+                counts[index] = counts.get(index, 0) + 1
+            for index, count in counts.items():
+                matrix[row, index] = 1.0 + math.log(count)
+        return matrix
+
+
+class ToolRetriever:
+    """
+    top_k：按相关度最多选出的工具数（不含始终暴露的工具）
+    token_budget：暴露的工具 schema 估算 token 总数上限（None 表示不限）
+    pinned：始终暴露的工具名
+    pinned_prefixes：名称以这些前缀开头的工具始终暴露，默认是技能 Loader（skill_*），否则模型可能再也加载不了新技能
+    embed_fn：文本列表 -> 向量矩阵；默认 HashingEmbedder（此时按候选集合计算 IDF）
+    index_path：预先构建的向量索引（.npz），文本没变的工具直接复用其中的向量
+    """
+
+    def __init__(self, top_k: int = 8, token_budget: Optional[int] = 2000, pinned: Iterable[str] = (),
+                 pinned_prefixes: Iterable[str] = (LOADER_PREFIX,),
+                 embed_fn: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+                 index_path: Optional[Path] = None, max_query_chars: int = 2000):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.pinned = set(pinned)
+        self.pinned_prefixes = tuple(pinned_prefixes)
+        self.embed_fn = embed_fn or HashingEmbedder()
+        self.use_idf = embed_fn is None
+        self.max_query_chars = max_query_chars
+        self._vectors: Dict[str, np.ndarray] = {}   # 文本摘要 -> 向量
+        self._entries: Dict[int, tuple] = {}        # id(tool) -> (tool, 文本摘要, schema token 数, 文本)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "candidate_tokens": 0, "selected_tokens": 0, "candidate_tools": 0,
+                      "selected_tools": 0}
+        if index_path is not None and Path(index_path).exists():
+            self.load(index_path)
+
+    # ==================== 索引 ====================
+
+    def _entry(self, tool: BaseTool) -> tuple:
+        entry = self._entries.get(id(tool))
+        if entry is None or entry[0] is not tool:
+            text = tool_text(tool)
+            entry = self._entries[id(tool)] = (tool, hashlib.sha1(text.encode("utf-8")).hexdigest(),
+                                               schema_tokens(tool), text)
+        return entry
+
+    def index(self, tools: Sequence[BaseTool]) -> np.ndarray:
+        """返回 tools 对应的向量矩阵；还没有向量的工具批量向量化后缓存"""
+        entries = [self._entry(t) for t in tools]
+        missing = [e for e in entries if e[1] not in self._vectors]
+        if missing:
+            vectors = np.asarray(self.embed_fn([e[3] for e in missing]), dtype=np.float32)
+            with self._lock:
+                for entry, vector in zip(missing, vectors):
+                    self._vectors[entry[1]] = vector
+        if not entries:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([self._vectors[e[1]] for e in entries])
+
+    def save(self, path: Path):
+        digests = list(self._vectors)
+        np.savez(path, digests=np.array(digests), vectors=np.stack([self._vectors[d] for d in digests]))
+
+    def load(self, path: Path):
+        data = np.load(path)
+        self._vectors.update(zip(data["digests"].tolist(), data["vectors"]))
+
+    # ==================== 检索 ====================
+
+    def query_text(self, messages: Sequence[BaseMessage]) -> str:
+        """最近一轮对话：最后一条用户消息及其之后的 assistant 内容、工具调用名和工具返回"""
+        start = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), 0)
+        parts = []
+        for msg in messages[start:]:
+            if isinstance(msg.content, str) and msg.content:
+                parts.append(msg.content)
+            if isinstance(msg, AIMessage):
+                parts.extend(tc["name"].replace("_", " ") for tc in msg.tool_calls)
+        return "\n".join(parts)[-self.max_query_chars:]
+
+    def rank(self, query: str, tools: Sequence[BaseTool]) -> np.ndarray:
+        """每个候选工具与查询的余弦相似度"""
+        matrix = self.index(tools)
+        query_vector = np.asarray(self.embed_fn([query]), dtype=np.float32)[0]
+        if self.use_idf:
+            # IDF 按当前候选集合计算：所有工具都有的词（如“工具”“查询”）权重低
+            df = np.count_nonzero(matrix, axis=0)
+            idf = np.log((1 + len(tools)) / (1 + df)) + 1.0
+            matrix = matrix * idf
+            query_vector = query_vector * idf
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+        return (matrix @ query_vector) / np.where(norms == 0, 1.0, norms)
+
+    def select(self, messages: Sequence[BaseMessage], tools: Sequence[BaseTool]) -> List[BaseTool]:
+        """
+        从候选工具中选出要暴露的工具，保持原有顺序（便于下游缓存和前缀稳定）
+        候选数不超过 top_k 且总 token 不超过预算时原样返回
+        """
+        tools = list(tools)
+        entries = [self._entry(t) for t in tools]
+        total = sum(e[2] for e in entries)
+        pinned = {i for i, tool in enumerate(tools) if self.is_pinned(tool)}
+        if len(tools) - len(pinned) <= self.top_k and (self.token_budget is None or total <= self.token_budget):
+            self._record(total, total, len(tools), len(tools))
+            return tools
+
+        scores = self.rank(self.query_text(messages), tools)
+        chosen, used = set(pinned), sum(entries[i][2] for i in pinned)
+        for i in np.argsort(-scores, kind="stable"):
+            if len(chosen) - len(pinned) >= self.top_k:
+                break
+            if i in chosen:
+                continue
+            cost = entries[i][2]
+            if self.token_budget is not None and used + cost > self.token_budget and chosen:
+                continue
+            chosen.add(int(i))
+            used += cost
+        selected = [tool for i, tool in enumerate(tools) if i in chosen]
+        self._record(total, used, len(tools), len(selected))
+        return selected
+
+    def is_pinned(self, tool: BaseTool) -> bool:
+        return tool.name in self.pinned or (bool(self.pinned_prefixes) and tool.name.startswith(self.pinned_prefixes))
+
+    def _record(self, candidate_tokens: int, selected_tokens: int, candidate_tools: int, selected_tools: int):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["candidate_tokens"] += candidate_tokens
+            self.stats["selected_tokens"] += selected_tokens
+            self.stats["candidate_tools"] += candidate_tools
+            self.stats["selected_tools"] += selected_tools
+
+    def report(self) -> dict:
+        """累计的工具 schema token：候选全部发送时 / 实际发送 / 节省"""
+        stats = dict(self.stats)
+        stats["saved_tokens"] = stats["candidate_tokens"] - stats["selected_tokens"]
+        stats["saved_ratio"] = round(stats["saved_tokens"] / stats["candidate_tokens"], 4) if stats["candidate_tokens"] else 0.0
+        return stats
+
+
+__all__ = ["ToolRetriever", "HashingEmbedder", "tool_text", "schema_tokens"]
+
+
+if __name__ == "__main__":
+    # 离线构建索引：导入技能目录下的全部技能工具并向量化
+    #   python tool_retrieval.py skills skills/tool_index.npz
+    import sys
+
+    from skill_registry import SkillRegistry
+
+    root, output = Path(sys.argv[1]), Path(sys.argv[2])
+    registry = SkillRegistry(root)
+    retriever = ToolRetriever()
+    all_tools = registry.loader_tools + [t for name in registry.manifests for t in registry.tools_for(name)]
+    retriever.index(all_tools)
+    retriever.save(output)
+    print(f"已写入 {len(all_tools)} 个工具的向量到 {output}")
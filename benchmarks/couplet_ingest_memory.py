@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+CoupletLoader 流水线峰值内存（RSS）随文件大小的变化
+
+每个 (行数, 模式) 在独立子进程里运行，向量化用假的 embedder、写入为空操作，
+只衡量 读取 → 解码 → 校验拆分 → 分批 → 向量化 → 写入 这条流水线本身的内存占用。
+
+模式：
+- import：只导入 CoupletLoader，作为基线
+- streaming：CoupletLoader.run_pipeline（当前实现）
+- list：旧实现的做法，先把所有行攒进列表、全部向量化后再写入
+
+用法：
+    python benchmarks/couplet_ingest_memory.py --rows 10000 100000 1000000 --write
+"""
+
+import argparse
+import gzip
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "couplet_ingest_memory.md"
+DIM = 64  # 假向量维度：取小一些，避免 list 模式在大文件上直接耗尽内存
+
+CHILD = r"""
+import os, sys, time, resource
+os.environ.setdefault("DASHSCOPE_API_KEY", "bench")
+os.environ.setdefault("DashScopeEmbeddingModel", "text-embedding-v1")
+sys.path.insert(0, os.path.join(sys.argv[1], "MulitAgent"))
+import CoupletLoader as L
+
+path, mode, dim = sys.argv[2], sys.argv[3], int(sys.argv[4])
+
+class FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[0.1] * dim for _ in texts]
+
+start = time.perf_counter()
+rows = 0
+if mode == "streaming":
+    def write(rows, vectors, end_offset, end_line):
+        pass
+    rows = L.run_pipeline(L.iter_couplets(path), FakeEmbeddings(), write)
+elif mode == "list":
+    docs = [doc for _, _, doc in L.iter_couplets(path)]
+    vectors = FakeEmbeddings().embed_documents([doc[1] for doc in docs])
+    rows = len(docs)
+elapsed = time.perf_counter() - start
+print(rows, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+CHARS = "春夏秋冬山水风月花鸟天地日星云雨江河湖海松竹梅兰福寿喜财安康吉祥人家门户新旧年岁"
+
+
+def make_corpus(path: str, rows: int, gz: bool) -> None:
+    rng = random.Random(rows)
+    opener = gzip.open if gz else open
+    with opener(path, "wb") as f:
+        for _ in range(rows):
+            upper = "".join(rng.choice(CHARS) for _ in range(7))
+            lower = "".join(rng.choice(CHARS) for _ in range(7))
+            f.write(f"{upper} {lower}\n".encode("gbk"))
+
+
+def measure(path: str, mode: str) -> tuple[int, float, float]:
+    """返回 (行数, 耗时秒, 峰值 RSS MB)"""
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, str(ROOT), path, mode, str(DIM)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    rows, elapsed, maxrss_kb = int(out[0]), float(out[1]), int(out[2])
+    return rows, elapsed, maxrss_kb / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CoupletLoader 流水线峰值内存基准")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--gzip", action="store_true", help="输入文件使用 gzip 压缩")
+    parser.add_argument("--skip-list", action="store_true", help="不跑 list 模式（大文件时很占内存）")
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/couplet_ingest_memory.md")
+    args = parser.parse_args()
+
+    lines = [
+        "# CoupletLoader 峰值内存",
+        "",
+        f"假向量维度 {DIM}，写入为空操作；RSS 为子进程峰值（MB），包含导入依赖的基线开销。",
+        "",
+        "| 行数 | 文件大小 (MB) | 模式 | 峰值 RSS (MB) | 相对基线 (MB) | 耗时 (s) | rows/s |",
+        "|------|--------------|------|--------------|--------------|---------|--------|",
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            path = os.path.join(tmp, f"couplet_{n}.csv" + (".gz" if args.gzip else ""))
+            make_corpus(path, n, args.gzip)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            _, _, base_rss = measure(path, "import")
+            modes = ["streaming"] if args.skip_list else ["streaming", "list"]
+            for mode in modes:
+                rows, elapsed, rss = measure(path, mode)
+                line = (f"| {n} | {size_mb:.1f} | {mode} | {rss:.0f} | {rss - base_rss:.0f} | "
+                        f"{elapsed:.1f} | {rows / elapsed:.0f} |")
+                print(line)
+                lines.append(line)
+
+    report = "\n".join(lines) + "\n"
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
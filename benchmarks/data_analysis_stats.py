@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+data_analysis 技能在 10⁷ 行数据上的统计耗时与内存
+
+每种模式在独立子进程里运行，耗时只计统计本身（legacy 的列表构造不计入），内存为峰值 RSS（VmHWM，仅 Linux）相对导入后的增量：
+- legacy：旧实现，数字以 List[float] 写在工具参数里，用 statistics 模块多遍计算
+- npy：calculate_statistics(source=*.npy)，内存映射 + 分块 NumPy
+- csv：calculate_statistics(source=*.csv)，包含 pandas 解析 CSV 的时间
+另外给出 legacy 方式下工具参数的 JSON 字节数与估算 token 数（模型需要把这些数字原样写进工具调用），
+以及分位数近似值相对精确值的最大误差（以数据标准差为单位）。
+
+用法：
+    python benchmarks/data_analysis_stats.py --rows 10000000 --write
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "data_analysis_stats.md"
+
+CHILD = r"""
+import importlib.util, json, statistics, sys, time
+import numpy as np
+
+def rss():
+    # 峰值 RSS 用 VmHWM：ru_maxrss 会继承父进程 fork 时的峰值，父进程生成数据后本身就很大
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+
+spec = importlib.util.spec_from_file_location("tools", sys.argv[1])
+tools = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tools)
+import pandas
+mode, path = sys.argv[2], sys.argv[3]
+
+if mode == "legacy":
+    numbers = np.load(path).tolist()
+    base = rss()
+    start = time.perf_counter()
+    result = {"count": len(numbers), "sum": sum(numbers), "mean": statistics.mean(numbers),
+              "median": statistics.median(numbers), "min": min(numbers), "max": max(numbers),
+              "stdev": statistics.stdev(numbers)}
+    elapsed = time.perf_counter() - start
+    quantiles = {}
+else:
+    base = rss()
+    start = time.perf_counter()
+    output = tools.calculate_statistics.invoke({"source": path})
+    elapsed = time.perf_counter() - start
+    result = json.loads(output.split(": ", 1)[1])
+    quantiles = result["quantiles"]
+print(json.dumps({"elapsed": elapsed, "rss": rss() - base, "quantiles": quantiles}))
+"""
+
+
+def measure(mode: str, path: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD, str(ROOT / "Skills" / "skills" / "data_analysis" / "tools.py"),
+                          mode, path], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="data_analysis 技能统计耗时基准")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/data_analysis_stats.md")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT / "Skills"))
+    from deepseek_reasoner_chat_model import estimate_tokens
+
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(3.0, 0.8, args.rows).round(4)
+    with tempfile.TemporaryDirectory() as tmp:
+        npy, csv = os.path.join(tmp, "values.npy"), os.path.join(tmp, "values.csv")
+        np.save(npy, values)
+        np.savetxt(csv, values, fmt="%.4f", header="value", comments="")
+
+        sample = json.dumps({"numbers": values[:100_000].tolist()})
+        arg_bytes = len(sample) * args.rows / 100_000
+        arg_tokens = estimate_tokens(sample) * args.rows / 100_000
+        ref_tokens = estimate_tokens(json.dumps({"source": npy}))
+
+        exact = np.quantile(values, [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
+        results = {mode: measure(mode, npy if mode != "csv" else csv) for mode in ("legacy", "npy", "csv")}
+        npy_bytes, csv_bytes = os.path.getsize(npy), os.path.getsize(csv)
+
+    std = values.std()
+    lines = [
+        "# data_analysis 统计耗时",
+        "",
+        f"{args.rows:,} 行对数正态分布数据（.npy {npy_bytes / 2**20:.0f} MB，.csv {csv_bytes / 2**20:.0f} MB）。"
+        f"每种模式在独立子进程中运行，内存为峰值 RSS 相对导入后的增量。",
+        "",
+        "| 模式 | 统计耗时 (s) | 峰值内存增量 (MB) | 分位数最大误差 (σ) |",
+        "|------|-------------|------------------|-------------------|",
+    ]
+    names = {"legacy": "legacy：List[float] + statistics（旧）", "npy": "npy 文件引用（内存映射）",
+             "csv": "csv 文件引用（含解析）"}
+    for mode, r in results.items():
+        if r["quantiles"]:
+            error = max(abs(v - e) for v, e in zip(r["quantiles"].values(), exact)) / std
+            error_text = f"{error:.1e}"
+        else:
+            error_text = "—（只有中位数）"
+        lines.append(f"| {names[mode]} | {r['elapsed']:.2f} | {r['rss']:.0f} | {error_text} |")
+    lines += [
+        "",
+        f"legacy 方式下模型需要把全部数字写进工具参数：约 {arg_bytes / 2**20:.0f} MB JSON、"
+        f"{arg_tokens / 1e6:.0f}M token（估算）；文件引用的参数只有约 {ref_tokens} token。",
+        "legacy 的内存增量不含参数列表本身（Python float 列表约为 .npy 的 4 倍）；"
+        "npy 的增量主要是内存映射读入的文件页，属于页缓存，内存紧张时可直接回收。",
+    ]
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
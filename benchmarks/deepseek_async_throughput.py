@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+DeepSeekReasonerChatModel 异步吞吐量：原生 _agenerate 与线程池回退的对比
+
+没有 _agenerate 时，BaseChatModel.ainvoke 会把同步的 _generate 丢进事件循环默认的线程池，
+线程池大小为 min(32, CPU 数 + 4)，并发超过这个数后请求只能排队。
+这里在进程内启动 mock_openai_server（固定首 token 延迟），以 64 并发发起 ainvoke，统计吞吐量与延迟。
+另外验证取消：发起一批请求后立即取消，确认任务及时结束、服务端连接被释放。
+
+用法：
+    python benchmarks/deepseek_async_throughput.py --concurrency 64 --requests 256 --latency 0.5 --write
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Skills"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import deepseek_reasoner_chat_model as dsr  # noqa: E402
+from deepseek_connections import free_port  # noqa: E402
+from load_gradio import percentile  # noqa: E402
+from mock_openai_server import MockConfig, create_app  # noqa: E402
+
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "deepseek_async_throughput.md"
+
+
+class ExecutorFallbackModel(dsr.DeepSeekReasonerChatModel):
+    """去掉原生异步实现，退回 BaseChatModel 默认的 run_in_executor"""
+    _agenerate = BaseChatModel._agenerate
+
+
+async def run(model_cls, base_url: str, concurrency: int, requests: int) -> dict:
+    model = model_cls(api_key="bench", base_url=base_url, max_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await model.ainvoke([HumanMessage(content=f"第 {i} 个问题")])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"mode": model_cls.__name__, "elapsed": elapsed, "rps": requests / elapsed,
+            "p50": percentile(latencies, 50), "p95": percentile(latencies, 95)}
+
+
+async def cancellation(base_url: str, n: int = 16) -> float:
+    """发起 n 个请求后立即取消，返回全部任务结束所用的秒数"""
+    model = dsr.DeepSeekReasonerChatModel(api_key="bench", base_url=base_url)
+    tasks = [asyncio.create_task(model.ainvoke([HumanMessage(content="取消测试")])) for _ in range(n)]
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return time.perf_counter() - start
+
+
+async def main(args) -> str:
+    import uvicorn
+
+    port = free_port()
+    config = MockConfig(latency=args.latency, token_rate=0.0, completion_tokens=16, reasoning_tokens=16)
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    base_url = f"http://127.0.0.1:{port}"
+
+    results = [await run(ExecutorFallbackModel, base_url, args.concurrency, args.requests),
+               await run(dsr.DeepSeekReasonerChatModel, base_url, args.concurrency, args.requests)]
+    cancel_seconds = await cancellation(base_url)
+    server.should_exit = True
+    await serve
+
+    names = {"ExecutorFallbackModel": "线程池回退（旧）", "DeepSeekReasonerChatModel": "原生 _agenerate（当前）"}
+    lines = [
+        "# DeepSeekReasonerChatModel 异步吞吐量",
+        "",
+        f"本地 mock 服务，首 token 延迟 {args.latency}s；{args.requests} 次 ainvoke，并发 {args.concurrency}；"
+        f"CPU {os.cpu_count()} 核，默认线程池 {min(32, (os.cpu_count() or 1) + 4)} 线程。",
+        "",
+        "| 实现 | 耗时 (s) | 请求/s | p50 (s) | p95 (s) |",
+        "|------|---------|--------|---------|---------|",
+    ]
+    for r in results:
+        lines.append(f"| {names[r['mode']]} | {r['elapsed']:.2f} | {r['rps']:.1f} | {r['p50']:.2f} | {r['p95']:.2f} |")
+    lines += ["", f"取消 16 个进行中的请求，全部任务结束耗时 {cancel_seconds * 1000:.1f} ms。"]
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DeepSeekReasonerChatModel 异步吞吐量基准")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/deepseek_async_throughput.md")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+DeepSeekReasonerChatModel 每 1000 次调用新建的 TCP 连接数
+
+在进程内启动 mock_openai_server（不限速、无延迟），模拟 create_agent 的调用方式：
+每次模型调用前先 bind_tools，再 invoke。对比两种客户端：
+- per_bind：旧实现，每个模型实例（即每次 bind_tools）新建一个 OpenAI 客户端
+- shared：当前实现，同一 (base_url, api_key) 共用一个连接池
+连接数取自 mock 服务端 /mock/stats 的 connections（不同客户端端口数）。
+
+用法：
+    python benchmarks/deepseek_connections.py --calls 1000 --concurrency 8 --write
+"""
+
+import argparse
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import uvicorn
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from openai import OpenAI
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Skills"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import deepseek_reasoner_chat_model as dsr  # noqa: E402
+from mock_openai_server import MockConfig, create_app  # noqa: E402
+
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "deepseek_connections.md"
+
+
+@tool
+def get_weather(city: str) -> str:
+    """查询城市天气"""
+    return f"{city} 晴"
+
+
+class PerBindClientModel(dsr.DeepSeekReasonerChatModel):
+    """旧实现的客户端策略：每个实例自己新建 OpenAI 客户端"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(port: int) -> uvicorn.Server:
+    config = MockConfig(latency=0.0, token_rate=0.0, completion_tokens=8, reasoning_tokens=8)
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def connections(base_url: str) -> int:
+    return httpx.get(f"{base_url}/mock/stats").json()["connections"]
+
+
+def run(model_cls, base_url: str, calls: int, concurrency: int) -> dict:
+    model = model_cls(api_key="bench", base_url=base_url)
+    before = connections(base_url)
+
+    def one(i: int):
+        model.bind_tools([get_weather]).invoke([HumanMessage(content=f"第 {i} 次调用")])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - start
+    opened = connections(base_url) - before
+    return {"mode": model_cls.__name__, "calls": calls, "connections": opened,
+            "per_1000": opened * 1000 / calls, "elapsed": elapsed, "calls_per_s": calls / elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DeepSeekReasonerChatModel 连接复用基准")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/deepseek_connections.md")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_mock(port)
+    base_url = f"http://127.0.0.1:{port}"
+    results = [run(PerBindClientModel, base_url, args.calls, args.concurrency),
+               run(dsr.DeepSeekReasonerChatModel, base_url, args.calls, args.concurrency)]
+    server.should_exit = True
+
+    names = {"PerBindClientModel": "per_bind（旧）", "DeepSeekReasonerChatModel": "shared（当前）"}
+    lines = [
+        "# DeepSeekReasonerChatModel 连接复用",
+        "",
+        f"本地 mock 服务（无延迟），{args.calls} 次 bind_tools + invoke，并发 {args.concurrency}，"
+        f"HTTP/2 {'可用' if dsr.HTTP2_AVAILABLE else '不可用（未安装 h2，使用 HTTP/1.1 keep-alive）'}。",
+        "",
+        "| 客户端 | 新建连接数 | 每 1000 次调用 | 耗时 (s) | 调用/s |",
+        "|--------|-----------|---------------|---------|--------|",
+    ]
+    for r in results:
+        lines.append(f"| {names[r['mode']]} | {r['connections']} | {r['per_1000']:.0f} | {r['elapsed']:.2f} | {r['calls_per_s']:.0f} |")
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
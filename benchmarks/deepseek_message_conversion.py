@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+DeepSeekReasonerChatModel 消息转换开销：增量缓存与每次全量转换的对比
+
+工具调用循环中每一步都会把完整历史重新转换成 OpenAI 格式，n 步循环的总转换量是 O(n²)。
+这里构造一个 n 轮的工具调用循环（每轮：带 reasoning_content 与 tool_call 的 AIMessage + ToolMessage），
+按 agent 的调用方式在第 1..n 步分别转换当前历史，统计累计耗时，并校验两种方式的输出完全一致。
+
+用法：
+    python benchmarks/deepseek_message_conversion.py --turns 200 --write
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Skills"))
+
+import deepseek_reasoner_chat_model as dsr  # noqa: E402
+
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "deepseek_message_conversion.md"
+
+
+class UncachedModel(dsr.DeepSeekReasonerChatModel):
+    """旧实现：每次调用都逐条重新转换全部历史"""
+
+    def _convert_messages_to_openai_format(self, messages, stats=None):
+        openai_messages = []
+        for msg in messages:
+            msg_dict = self._convert_message(msg)
+            if msg_dict is None:
+                continue
+            if isinstance(msg, AIMessage) and msg.additional_kwargs.get('reasoning_content'):
+                msg_dict["reasoning_content"] = msg.additional_kwargs['reasoning_content']
+            openai_messages.append(msg_dict)
+        return openai_messages
+
+
+def build_history(turns: int) -> list:
+    """与 add_messages 一致：每条消息都带 id"""
+    messages = [SystemMessage(content="你是一个会调用工具的助手。" * 20, id=str(uuid.uuid4())),
+                HumanMessage(content="帮我查一下这些城市的天气并汇总", id=str(uuid.uuid4()))]
+    for i in range(turns):
+        call_id = f"call_{i}"
+        messages.append(AIMessage(
+            content="",
+            id=str(uuid.uuid4()),
+            tool_calls=[{"id": call_id, "name": "get_weather",
+                         "args": {"city": f"城市{i}", "days": 3, "fields": ["温度", "湿度", "风力"]}}],
+            additional_kwargs={"reasoning_content": f"第 {i} 步：还需要查询城市{i}的天气。" * 10},
+        ))
+        messages.append(ToolMessage(content=f"城市{i}：晴，25℃，湿度 40%，东风 3 级。" * 5,
+                                    tool_call_id=call_id, name="get_weather", id=str(uuid.uuid4())))
+    return messages
+
+
+def run(model, history: list, turns: int) -> tuple[float, list]:
+    """第 k 步转换前 2 + 2k 条消息（系统 + 用户 + k 轮工具调用），返回累计耗时和最后一次的结果"""
+    start = time.perf_counter()
+    for k in range(1, turns + 1):
+        payload = model._convert_messages_to_openai_format(history[:2 + 2 * k])
+    return time.perf_counter() - start, payload
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DeepSeekReasonerChatModel 消息转换开销基准")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/deepseek_message_conversion.md")
+    args = parser.parse_args()
+
+    history = build_history(args.turns)
+    kwargs = {"api_key": "bench", "base_url": "http://127.0.0.1:1", "reasoning_retention": "all"}
+    dsr._MESSAGE_CACHE.clear()
+    uncached_seconds, uncached_payload = run(UncachedModel(**kwargs), history, args.turns)
+    cached_seconds, cached_payload = run(dsr.DeepSeekReasonerChatModel(**kwargs), history, args.turns)
+    assert cached_payload == uncached_payload, "缓存结果与全量转换不一致"
+    converted = args.turns * (args.turns + 1) + 2 * args.turns
+
+    lines = [
+        "# DeepSeekReasonerChatModel 消息转换开销",
+        "",
+        f"{args.turns} 轮工具调用循环（每轮 AIMessage + ToolMessage），在第 1..{args.turns} 步分别转换当前历史，"
+        f"共转换 {converted} 条消息；两种方式的输出逐项相同。",
+        "",
+        "| 实现 | 累计耗时 (ms) | 每步平均 (µs) | 缓存命中 / 未命中 |",
+        "|------|--------------|--------------|------------------|",
+        f"| 全量转换（旧） | {uncached_seconds * 1000:.1f} | {uncached_seconds * 1e6 / args.turns:.0f} | — |",
+        f"| 增量缓存（当前） | {cached_seconds * 1000:.1f} | {cached_seconds * 1e6 / args.turns:.0f} | "
+        f"{dsr._MESSAGE_CACHE.hits} / {dsr._MESSAGE_CACHE.misses} |",
+        "",
+        f"加速 {uncached_seconds / cached_seconds:.1f}×。剩余开销是每步为每条消息计算缓存键，仍与历史长度成正比，"
+        "但不再重复构造字典和 json.dumps 工具参数。",
+    ]
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+DeepSeekReasonerChatModel 的 reasoning_content 保留策略对请求体大小的影响
+
+模拟一个多轮会话：每轮用户提问后模型调用 steps 次工具再给出回答，每条 assistant 消息都带一段较长的推理过程。
+按 agent 的调用方式在每次模型调用前构造请求参数，统计各保留策略下的请求体字节数、估算输入 token，
+以及 response_metadata["reasoning_retention"] 中报告的节省量。
+
+用法：
+    python benchmarks/deepseek_reasoning_retention.py --turns 30 --steps 3 --write
+"""
+
+import argparse
+import json
+import sys
+import uuid
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Skills"))
+
+import deepseek_reasoner_chat_model as dsr  # noqa: E402
+
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "deepseek_reasoning_retention.md"
+
+
+def reasoning(turn: int, step: int) -> str:
+    return f"第 {turn} 轮第 {step} 步：先确认用户的问题，再决定需要调用哪个工具、参数怎么填，最后检查结果是否足够回答。" * 12
+
+
+def session_calls(turns: int, steps: int):
+    """按顺序产出每次模型调用时的消息历史（与 add_messages 一致，每条消息都带 id）"""
+    history = [SystemMessage(content="你是一个会调用工具的助手。", id=str(uuid.uuid4()))]
+    for turn in range(turns):
+        history.append(HumanMessage(content=f"第 {turn} 个问题：帮我查一下城市{turn}的天气", id=str(uuid.uuid4())))
+        for step in range(steps):
+            yield list(history)
+            call_id = f"call_{turn}_{step}"
+            history.append(AIMessage(content="", id=str(uuid.uuid4()),
+                                     tool_calls=[{"id": call_id, "name": "get_weather", "args": {"city": f"城市{turn}"}}],
+                                     additional_kwargs={"reasoning_content": reasoning(turn, step)}))
+            history.append(ToolMessage(content=f"城市{turn}：晴，25℃", tool_call_id=call_id, name="get_weather",
+                                       id=str(uuid.uuid4())))
+        yield list(history)
+        history.append(AIMessage(content=f"城市{turn}今天晴，25℃。", id=str(uuid.uuid4()),
+                                 additional_kwargs={"reasoning_content": reasoning(turn, steps)}))
+
+
+def run(policy: str, turns: int, steps: int, keep_last: int) -> dict:
+    model = dsr.DeepSeekReasonerChatModel(api_key="bench", base_url="http://127.0.0.1:1",
+                                          reasoning_retention=policy, reasoning_keep_last=keep_last)
+    calls = total_bytes = total_tokens = saved_bytes = saved_tokens = last_bytes = 0
+    for messages in session_calls(turns, steps):
+        stats = {}
+        params = model._build_request_params(messages, stats=stats)
+        body = json.dumps(params["messages"], ensure_ascii=False)
+        last_bytes = len(body.encode("utf-8"))
+        calls += 1
+        total_bytes += last_bytes
+        total_tokens += dsr.estimate_tokens(body)
+        saved_bytes += stats["bytes_saved"]
+        saved_tokens += stats["tokens_saved"]
+    return {"policy": policy, "calls": calls, "total_bytes": total_bytes, "last_bytes": last_bytes,
+            "total_tokens": total_tokens, "saved_bytes": saved_bytes, "saved_tokens": saved_tokens}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="reasoning_content 保留策略基准")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--steps", type=int, default=3, help="每轮的工具调用次数")
+    parser.add_argument("--keep-last", type=int, default=2, help="last_n 策略保留的条数")
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/deepseek_reasoning_retention.md")
+    args = parser.parse_args()
+
+    results = [run(policy, args.turns, args.steps, args.keep_last) for policy in dsr.REASONING_RETENTION_POLICIES]
+    baseline = results[0]
+    lines = [
+        "# reasoning_content 保留策略",
+        "",
+        f"{args.turns} 轮会话，每轮 {args.steps} 次工具调用 + 1 次回答，共 {baseline['calls']} 次模型调用；"
+        f"每条 assistant 消息带约 {len(reasoning(0, 0))} 字的推理过程。last_n 保留最近 {args.keep_last} 条。",
+        "请求体为 messages 的 JSON（UTF-8）；token 按 estimate_tokens 估算。报告节省为每次请求的节省统计之和"
+        "（与返回消息 response_metadata[\"reasoning_retention\"] 中的值相同）。",
+        "",
+        "| 策略 | 请求体合计 (KB) | 最后一次请求 (KB) | 输入 token 合计 | 报告节省 (KB) | 报告节省 token | 相对 all |",
+        "|------|----------------|------------------|----------------|--------------|---------------|---------|",
+    ]
+    for r in results:
+        lines.append(f"| {r['policy']} | {r['total_bytes'] / 1024:.0f} | {r['last_bytes'] / 1024:.1f} | "
+                     f"{r['total_tokens']} | {r['saved_bytes'] / 1024:.0f} | {r['saved_tokens']} | "
+                     f"{r['total_bytes'] / baseline['total_bytes']:.0%} |")
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
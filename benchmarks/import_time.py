@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+导入耗时分析（python -X importtime）
+
+对比两种启动方式：
+1. lazy：只 import MultiAgent（DirectorServer 打开端口前的实际开销）
+2. eager：import MultiAgent 后再导入全部重量级依赖（相当于改造前的启动开销，也是 warmup 的导入部分）
+
+用法：
+    python benchmarks/import_time.py            # 打印报告
+    python benchmarks/import_time.py --write    # 同时写入 benchmarks/reports/import_time.md
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+AGENT_DIR = ROOT / "MulitAgent"
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "import_time.md"
+
+TARGETS = {
+    "lazy": "import MultiAgent",
+    "eager": "import MultiAgent\nfrom importlib import import_module\nfor m in MultiAgent.HEAVY_MODULES: import_module(m)",
+}
+
+
+def run_importtime(stmt: str) -> tuple[float, list[tuple[int, int, str]]]:
+    """在子进程里执行 stmt，返回 (墙钟耗时秒, [(self_us, cumulative_us, module), ...])"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(AGENT_DIR) + os.pathsep + env.get("PYTHONPATH", "")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        cwd=AGENT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(errors[-1] if errors else "子进程执行失败")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return wall, rows
+
+
+def depth(name: str) -> int:
+    """importtime 用缩进表示导入层级：顶层为 0"""
+    return (len(name) - len(name.lstrip()) - 1) // 2
+
+
+def top_level_total(rows: list[tuple[int, int, str]]) -> int:
+    """顶层模块的 cumulative 之和即总导入耗时"""
+    return sum(cumulative for _, cumulative, name in rows if depth(name) == 0)
+
+
+def render(results: dict, top: int = 15) -> str:
+    lines = ["# MultiAgent 导入耗时报告", ""]
+    lines.append(f"Python {sys.version.split()[0]}，`python -X importtime`，单位毫秒。")
+    lines.append("")
+    lines.append("| 模式 | 墙钟耗时 | 导入总耗时 | 模块数 |")
+    lines.append("|------|---------|-----------|-------|")
+    for mode, (wall, rows) in results.items():
+        lines.append(f"| {mode} | {wall * 1000:.0f} | {top_level_total(rows) / 1000:.0f} | {len(rows)} |")
+    for mode, (wall, rows) in results.items():
+        lines.append("")
+        lines.append(f"## {mode}：cumulative 最高的 {top} 个模块（前两层）")
+        lines.append("")
+        lines.append("| cumulative | self | 模块 |")
+        lines.append("|-----------|------|------|")
+        top_rows = [r for r in rows if depth(r[2]) <= 1]
+        for self_us, cumulative_us, name in sorted(top_rows, key=lambda r: -r[1])[:top]:
+            lines.append(f"| {cumulative_us / 1000:.1f} | {self_us / 1000:.1f} | `{name.strip()}` |")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    results = {mode: run_importtime(stmt) for mode, stmt in TARGETS.items()}
+    report = render(results)
+    print(report)
+    if "--write" in sys.argv:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
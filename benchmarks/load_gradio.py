@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+DirectorServer 压测：并发调用 Gradio 接口，统计吞吐量与延迟分位数
+
+配合 mock_openai_server.py 使用即可不消耗真实模型额度：
+    python benchmarks/mock_openai_server.py --latency 0.3 --token-rate 60 &
+    ModelUrl=http://127.0.0.1:8900/v1 python MulitAgent/DirectorServer.py &
+    python benchmarks/load_gradio.py --url http://127.0.0.1:7999 --concurrency 16 --requests 200
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gradio_client import Client
+
+DEFAULT_QUESTIONS = [
+    "请给我讲一个郭德纲的笑话",
+    "春回大地千山秀的下联是什么",
+    "你好啊",
+]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """线性插值分位数，sorted_values 需已排序"""
+    if not sorted_values:
+        return float("nan")
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_load(url: str, api_name: str, questions: list[str], concurrency: int,
+             total_requests: int, duration: float | None = None) -> dict:
+    """
+    用 concurrency 个线程（每个线程一个 Client）发请求。
+    指定 duration 时按时长压测，否则发满 total_requests 个请求。
+    """
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    lock = threading.Lock()
+    issued = 0
+    deadline = None
+
+    def next_ticket() -> bool:
+        nonlocal issued
+        with lock:
+            if deadline is not None:
+                return time.perf_counter() < deadline
+            if issued >= total_requests:
+                return False
+            issued += 1
+            return True
+
+    def worker():
+        client = Client(url, verbose=False)
+        while next_ticket():
+            question = random.choice(questions)
+            start = time.perf_counter()
+            try:
+                client.predict(question, api_name=api_name)
+            except Exception as e:
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    if duration:
+        deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "completed": len(latencies),
+        "errors": errors,
+        "error_rate": sum(errors.values()) / max(1, len(latencies) + sum(errors.values())),
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "latency_seconds": {
+            "mean": sum(latencies) / len(latencies) if latencies else float("nan"),
+            **{f"p{p}": percentile(latencies, p) for p in (50, 90, 95, 99)},
+            "max": latencies[-1] if latencies else float("nan"),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DirectorServer Gradio 接口压测")
+    parser.add_argument("--url", default="http://127.0.0.1:7999")
+    parser.add_argument("--api-name", default="/process_input")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="请求总数（未指定 --duration 时生效）")
+    parser.add_argument("--duration", type=float, default=None, help="按时长压测（秒）")
+    parser.add_argument("--question", action="append", help="自定义问题，可重复指定")
+    parser.add_argument("--output", help="把结果写成 JSON 文件")
+    args = parser.parse_args()
+
+    result = run_load(args.url, args.api_name, args.question or DEFAULT_QUESTIONS,
+                      args.concurrency, args.requests, args.duration)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
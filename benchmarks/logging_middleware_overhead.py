@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+LoggingMiddleware 每次模型调用给调用线程增加的耗时，随对话历史长度的变化
+
+handler 直接返回预先构造的 ModelResponse（不发请求），只衡量中间件本身：
+- print（旧）：每次 print 工具名和整个 request.state，stdout 重定向到 /dev/null（真实终端 / notebook 只会更慢）
+- json：当前实现，全部记录（sample_rate=1.0）
+- json 采样：sample_rate=0.1
+新实现的耗时只算调用线程，JSON 序列化和写文件在后台线程完成；同时统计写入的日志行数和因队列满而丢弃的条数。
+
+Skills/LoggingMiddleware.py 是 notebook 单元格片段（AgentMiddleware 等来自 ClaudeSkills.py 的全局变量），
+这里在准备好的命名空间里执行。
+
+用法：
+    python benchmarks/logging_middleware_overhead.py --history 10 100 1000 --calls 2000 --print-calls 50 --write
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Skills"))
+
+from deepseek_reasoner_chat_model import DeepSeekReasonerChatModel  # noqa: E402
+
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "logging_middleware_overhead.md"
+
+
+class PrintLoggingMiddleware(AgentMiddleware):
+    """旧实现：每次调用 print 工具名和整个 request.state"""
+
+    def __init__(self):
+        super().__init__()
+        self.call_count = 0
+
+    def wrap_model_call(self, request, handler):
+        self.call_count += 1
+        print(f"\n{'=' * 60}")
+        print(f"[Logger] 第 {self.call_count} 次模型调用")
+        print(f"{'=' * 60}")
+        if request.tools:
+            tool_names = [t.name for t in request.tools]
+            print(f"可用工具 ({len(tool_names)}个): {tool_names}")
+        if request.state:
+            print(f"当前状态: {request.state}")
+        response = handler(request)
+        print("模型调用完成")
+        print(f"{'=' * 60}\n")
+        return response
+
+
+def load_logging_middleware() -> type:
+    namespace = {"AgentMiddleware": AgentMiddleware, "ModelRequest": ModelRequest, "ModelResponse": ModelResponse,
+                 "Callable": Callable}
+    source = (ROOT / "Skills" / "LoggingMiddleware.py").read_text(encoding="utf-8")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        exec(compile(source, "LoggingMiddleware.py", "exec"), namespace)
+    return namespace["LoggingMiddleware"]
+
+
+def make_history(turns: int) -> list:
+    """模拟工具调用循环：每轮 AI 发起工具调用 + 工具返回一段较长的结果"""
+    messages = [HumanMessage(content="帮我分析一下这份销售数据，并给出结论。")]
+    for i in range(turns):
+        messages.append(AIMessage(content="", tool_calls=[{"name": "calculate_statistics", "id": f"call_{i}",
+                                                           "args": {"source": "data/sales.csv", "column": "amount"}}],
+                                  additional_kwargs={"reasoning_content": "需要先计算统计量。" * 20}))
+        messages.append(ToolMessage(content="统计结果: " + "{'count': 1000, 'mean': 12.5} " * 20, tool_call_id=f"call_{i}"))
+    return messages[:turns]
+
+
+def run(middleware, history: int, calls: int, tools: list) -> float:
+    """返回每次调用的平均耗时（µs）"""
+    model = DeepSeekReasonerChatModel(api_key="bench", base_url="http://127.0.0.1:1")
+    messages = make_history(history)
+    state = {"messages": messages, "skills_loaded": ["data_analysis"]}
+    request = ModelRequest(model=model, messages=messages, tools=tools, state=state)
+    response = ModelResponse(result=[AIMessage(content="完成", usage_metadata={
+        "input_tokens": 1200, "output_tokens": 80, "total_tokens": 1280})])
+
+    def handler(_):
+        return response
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        start = time.perf_counter()
+        for _ in range(calls):
+            middleware.wrap_model_call(request, handler)
+        elapsed = time.perf_counter() - start
+    return elapsed / calls * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LoggingMiddleware 每次调用开销基准")
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 100, 1000], help="消息条数")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--print-calls", type=int, default=50, help="旧实现的调用次数（长历史下单次就要数十毫秒）")
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/logging_middleware_overhead.md")
+    args = parser.parse_args()
+
+    LoggingMiddleware = load_logging_middleware()
+    tools = [StructuredTool.from_function(lambda text: text, name=f"tool_{i}", description="模拟工具") for i in range(12)]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for history in args.history:
+            row = {"history": history, "print": run(PrintLoggingMiddleware(), history, args.print_calls, tools)}
+            for key, rate in (("json", 1.0), ("sampled", 0.1)):
+                path = os.path.join(tmp, f"{key}_{history}.jsonl")
+                middleware = LoggingMiddleware(log_path=path, sample_rate=rate, max_bytes=0)
+                row[key] = run(middleware, history, args.calls, tools)
+                middleware.close()
+                with open(path, encoding="utf-8") as f:
+                    row[f"{key}_lines"] = sum(1 for _ in f)
+                row[f"{key}_dropped"] = middleware.dropped
+            rows.append(row)
+
+    lines = [
+        "# LoggingMiddleware 每次调用开销",
+        "",
+        f"12 个工具，每种历史长度 json 调用 {args.calls} 次、print 调用 {args.print_calls} 次；handler 直接返回结果，耗时只含中间件本身（调用线程）。",
+        "print 的输出重定向到 /dev/null；json 的序列化和写文件在后台线程完成，日志行数在 close() 之后统计。",
+        "",
+        "| 消息数 | print（旧，µs） | json（µs） | json 采样 0.1（µs） | 写入行数 | 丢弃 |",
+        "|--------|----------------|-----------|--------------------|---------|------|",
+    ]
+    for r in rows:
+        lines.append(f"| {r['history']} | {r['print']:.0f} | {r['json']:.1f} | {r['sampled']:.1f} | "
+                     f"{r['json_lines']} / {r['sampled_lines']} | {r['json_dropped']} / {r['sampled_dropped']} |")
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+本地模拟服务：OpenAI Chat Completions（含 SSE 流式与 reasoning_content）+ DashScope 文本向量
+
+用于压测 DirectorServer / Skills Agent，不消耗 DeepSeek、DashScope 额度。
+首 token 延迟、生成速率、错误率都可以配置。
+
+启动：
+    python benchmarks/mock_openai_server.py --port 8900 --latency 0.3 --token-rate 60 --error-rate 0.02
+
+让各模型指向模拟服务（写到 .env 或导出到环境变量，必须在导入对应 SDK 之前生效）：
+    ModelUrl=http://127.0.0.1:8900/v1                          # ChatOpenAI（MultiAgent.get_llm）
+    DEEPSEEK_API_BASE=http://127.0.0.1:8900                    # ChatDeepSeek
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8900                    # DeepSeekReasonerChatModel
+    DASHSCOPE_HTTP_BASE_URL=http://127.0.0.1:8900/api/v1       # DashScopeEmbeddings
+API Key 随便填一个非空字符串即可。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, asdict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class MockConfig:
+    latency: float = 0.2            # 首 token 延迟（秒）
+    token_rate: float = 50.0        # 每秒生成的 token 数，<=0 表示不限速
+    error_rate: float = 0.0         # 注入错误的概率 0~1
+    error_status: int = 500         # 注入错误时返回的状态码（500 / 429 / 503 ...）
+    completion_tokens: int = 64     # 每次回复的 content token 数
+    reasoning_tokens: int = 128     # reasoner 模型额外输出的 reasoning_content token 数
+    embedding_dim: int = 1536       # 向量维度（text-embedding-v1/v2 为 1536）
+    embedding_latency: float = 0.05
+    tool_calls: bool = False        # 请求带 tools 且最后一条是用户消息时，返回对第一个工具的调用
+
+
+def parse_config_value(current, value):
+    """按字段当前值的类型转换；bool("false") 为 True，布尔字段单独解析"""
+    if isinstance(current, bool):
+        if isinstance(value, str):
+            if value.strip().lower() not in ("1", "true", "yes", "on", "0", "false", "no", "off"):
+                raise ValueError(value)
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    return type(current)(value)
+
+
+# MultiAgent.supervisor_node 需要模型返回固定的分类结果，这里按关键词模拟
+SUPERVISOR_RULES = [
+    (("笑话",), "joke"),
+    ("对联 上联 下联".split(), "couplet"),
+    ("旅游 规划 出行 路线".split(), "travel"),
+]
+
+
+def mock_tool_call(tools: list[dict]) -> dict:
+    """按第一个工具的参数 schema 给必填参数填上占位值"""
+    function = tools[0].get("function", {})
+    placeholders = {"string": "mock", "integer": 1, "number": 1.0, "boolean": True, "array": [], "object": {}}
+    schema = function.get("parameters") or {}
+    properties = schema.get("properties") or {}
+    args = {name: placeholders.get(properties.get(name, {}).get("type"), None) for name in schema.get("required", [])}
+    return {"id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+            "function": {"name": function.get("name", ""), "arguments": json.dumps(args, ensure_ascii=False)}}
+
+
+def count_tokens(text: str) -> int:
+    """粗略估算：中文按字、英文按 4 字符一个 token"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + math.ceil(ascii_chars / 4)
+
+
+def message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def mock_reply(messages: list[dict], config: MockConfig) -> str:
+    system = "".join(message_text(m) for m in messages if m.get("role") == "system")
+    user = next((message_text(m) for m in reversed(messages) if m.get("role") == "user"), "")
+    if "返回 joke" in system:
+        for keywords, label in SUPERVISOR_RULES:
+            if any(kw in user for kw in keywords):
+                return label
+        return "other"
+    prefix = f"这是模拟回复：{user[:20]}。"
+    return (prefix + "好" * config.completion_tokens)[:max(config.completion_tokens, len(prefix))]
+
+
+def split_tokens(text: str) -> list[str]:
+    """按估算的 token 粒度切分，用于流式输出"""
+    pieces, buf = [], ""
+    for ch in text:
+        buf += ch
+        if ord(ch) >= 128 or len(buf) >= 4:
+            pieces.append(buf)
+            buf = ""
+    if buf:
+        pieces.append(buf)
+    return pieces
+
+
+def mock_embedding(text: str, dim: int) -> list[float]:
+    """同一段文本总是得到同一个单位向量，保证相似度检索结果稳定"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock OpenAI / DashScope")
+    stats = {"chat": 0, "chat_stream": 0, "embedding_requests": 0, "embedding_texts": 0, "errors": 0}
+    clients: set[tuple] = set()   # (host, port)：每个不同的客户端端口对应一次新建的 TCP 连接
+
+    @app.middleware("http")
+    async def track_connections(request: Request, call_next):
+        if request.client is not None and not request.url.path.startswith("/mock/"):
+            clients.add((request.client.host, request.client.port))
+        return await call_next(request)
+
+    def inject_error():
+        if config.error_rate > 0 and random.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=config.error_status,
+                content={"error": {"message": "mock injected error", "type": "server_error", "code": config.error_status}},
+            )
+        return None
+
+    async def generate(pieces: list[str]):
+        """按 token_rate 节奏逐个吐出 token"""
+        delay = 1.0 / config.token_rate if config.token_rate > 0 else 0.0
+        for piece in pieces:
+            if delay:
+                await asyncio.sleep(delay)
+            yield piece
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = inject_error()
+        if error is not None:
+            return error
+
+        model = body.get("model", "mock-model")
+        messages = body.get("messages", [])
+        content = mock_reply(messages, config)
+        tools = body.get("tools") or []
+        tool_call = mock_tool_call(tools) if config.tool_calls and tools and messages and messages[-1].get("role") == "user" else None
+        if tool_call is not None:
+            content = ""
+        reasoning = ("嗯，让我想想。" * config.reasoning_tokens)[:config.reasoning_tokens] if "reasoner" in model else ""
+        prompt_tokens = sum(count_tokens(message_text(m)) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": count_tokens(content) + count_tokens(reasoning),
+            "total_tokens": prompt_tokens + count_tokens(content) + count_tokens(reasoning),
+            "prompt_cache_hit_tokens": 0,
+            "prompt_cache_miss_tokens": prompt_tokens,
+            "completion_tokens_details": {"reasoning_tokens": count_tokens(reasoning)},
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        await asyncio.sleep(config.latency)
+
+        if not body.get("stream"):
+            stats["chat"] += 1
+            async for _ in generate(split_tokens(reasoning + content)):
+                pass
+            message = {"role": "assistant", "content": content}
+            if reasoning:
+                message["reasoning_content"] = reasoning
+            if tool_call is not None:
+                message["tool_calls"] = [tool_call]
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop",
+                             "logprobs": None}],
+                "usage": usage,
+            }
+
+        stats["chat_stream"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: dict, finish_reason=None, **extra) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def event_stream():
+            yield chunk({"role": "assistant", "content": ""})
+            async for piece in generate(split_tokens(reasoning)):
+                yield chunk({"reasoning_content": piece, "content": None})
+            async for piece in generate(split_tokens(content)):
+                yield chunk({"content": piece})
+            if tool_call is not None:
+                # 与真实接口一致：第一个分块带 id 和函数名，之后参数按片段陆续到达
+                function = tool_call["function"]
+                yield chunk({"tool_calls": [{"index": 0, "id": tool_call["id"], "type": "function",
+                                             "function": {"name": function["name"], "arguments": ""}}]})
+                arguments = function["arguments"]
+                for start in range(0, len(arguments), 4):
+                    yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": arguments[start:start + 4]}}]})
+            yield chunk({}, finish_reason="tool_calls" if tool_call else "stop")
+            if include_usage:
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": model, "choices": [], "usage": usage}
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    # DeepSeek 的 base_url 不带 /v1，OpenAI 风格的带 /v1，两个路径都注册
+    app.post("/chat/completions")(chat_completions)
+    app.post("/v1/chat/completions")(chat_completions)
+
+    @app.get("/v1/models")
+    @app.get("/models")
+    async def models():
+        return {"object": "list", "data": [{"id": m, "object": "model", "owned_by": "mock"}
+                                           for m in ("deepseek-chat", "deepseek-reasoner")]}
+
+    @app.post("/api/v1/services/embeddings/text-embedding/text-embedding")
+    async def dashscope_embeddings(request: Request):
+        body = await request.json()
+        error = inject_error()
+        if error is not None:
+            return JSONResponse(status_code=error.status_code,
+                                content={"code": "InternalError", "message": "mock injected error",
+                                         "request_id": uuid.uuid4().hex})
+        texts = (body.get("input") or {}).get("texts") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        stats["embedding_requests"] += 1
+        stats["embedding_texts"] += len(texts)
+        await asyncio.sleep(config.embedding_latency)
+        return {
+            "output": {"embeddings": [{"text_index": i, "embedding": mock_embedding(t, config.embedding_dim)}
+                                      for i, t in enumerate(texts)]},
+            "usage": {"total_tokens": sum(count_tokens(t) for t in texts)},
+            "request_id": uuid.uuid4().hex,
+        }
+
+    @app.post("/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        body = await request.json()
+        error = inject_error()
+        if error is not None:
+            return error
+        texts = body.get("input") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        stats["embedding_requests"] += 1
+        stats["embedding_texts"] += len(texts)
+        await asyncio.sleep(config.embedding_latency)
+        return {
+            "object": "list",
+            "model": body.get("model", "mock-embedding"),
+            "data": [{"object": "embedding", "index": i, "embedding": mock_embedding(t, config.embedding_dim)}
+                     for i, t in enumerate(texts)],
+            "usage": {"prompt_tokens": sum(count_tokens(t) for t in texts),
+                      "total_tokens": sum(count_tokens(t) for t in texts)},
+        }
+
+    @app.get("/mock/stats")
+    async def get_stats():
+        return {"config": asdict(config), **stats, "connections": len(clients)}
+
+    @app.post("/mock/config")
+    async def update_config(request: Request):
+        """
+        运行中调整参数，例如压测时逐步提高 error_rate；JSON 中的值可以是对应类型，也可以是字符串。
+        先校验全部字段再一起生效，有一个值无效时整个请求返回 400，配置保持不变
+        """
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return JSONResponse(status_code=400, content={"error": "请求体必须是 JSON 对象"})
+        updates = {}
+        for key, value in body.items():
+            if hasattr(config, key):
+                try:
+                    updates[key] = parse_config_value(getattr(config, key), value)
+                except (TypeError, ValueError):
+                    return JSONResponse(status_code=400, content={"error": f"{key} 的值无效: {value!r}"})
+        for key, value in updates.items():
+            setattr(config, key, value)
+        return asdict(config)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="本地 OpenAI / DashScope 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=MockConfig.latency, help="首 token 延迟（秒）")
+    parser.add_argument("--token-rate", type=float, default=MockConfig.token_rate, help="每秒 token 数，0 为不限速")
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate, help="错误注入概率 0~1")
+    parser.add_argument("--error-status", type=int, default=MockConfig.error_status)
+    parser.add_argument("--completion-tokens", type=int, default=MockConfig.completion_tokens)
+    parser.add_argument("--reasoning-tokens", type=int, default=MockConfig.reasoning_tokens)
+    parser.add_argument("--embedding-dim", type=int, default=MockConfig.embedding_dim)
+    parser.add_argument("--tool-calls", action="store_true", help="带 tools 的请求返回工具调用")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency,
+        token_rate=args.token_rate,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        completion_tokens=args.completion_tokens,
+        reasoning_tokens=args.reasoning_tokens,
+        embedding_dim=args.embedding_dim,
+        tool_calls=args.tool_calls,
+    )
+    print(f"模拟服务启动：http://{args.host}:{args.port}  配置：{asdict(config)}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+SkillMiddleware 每次模型调用的额外开销：工具过滤 + 下游 bind_tools
+
+create_agent 在每次模型调用前都会对 request.model 执行 bind_tools，
+这里的 handler 只做这一步（不发请求），对比关闭 / 开启缓存时每次调用的耗时：
+- 关：SkillMiddleware(cache=False) + DeepSeekReasonerChatModel(bind_cache_size=0)，每次重新过滤、重新绑定
+- 开：过滤结果按技能组合缓存，模型的 bind_tools 按工具身份命中自己的缓存
+
+Skills/SkillMiddleware.py 是 notebook 单元格拼出来的片段（依赖 ClaudeSkills.py 中的全局变量 SKILL_REGISTRY 等），
+不能直接导入；这里用 ast 只取出其中的类定义，在准备好的命名空间里执行。
+
+用法：
+    python benchmarks/skill_middleware_overhead.py --skills 12 --tools-per-skill 10 --write
+"""
+
+import argparse
+import ast
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.tools import StructuredTool
+from pydantic import Field, create_model
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Skills"))
+
+from deepseek_reasoner_chat_model import DeepSeekReasonerChatModel  # noqa: E402
+from skill_registry import SkillRegistry  # noqa: E402
+
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "skill_middleware_overhead.md"
+
+
+def make_tool(name: str) -> StructuredTool:
+    """带 4 个参数 schema 的模拟工具"""
+    schema = create_model(
+        f"{name}_args",
+        text=(str, Field(description="输入文本")),
+        limit=(int, Field(default=10, description="最多返回条数")),
+        ratio=(float, Field(default=0.5, description="比例")),
+        tags=(List[str], Field(default_factory=list, description="标签")),
+    )
+    return StructuredTool.from_function(lambda **kwargs: name, name=name, description=f"模拟工具 {name}", args_schema=schema)
+
+
+def load_skill_middleware(namespace: dict) -> type:
+    source = (ROOT / "Skills" / "SkillMiddleware.py").read_text(encoding="utf-8")
+    classes = [node for node in ast.parse(source).body if isinstance(node, ast.ClassDef)]
+    exec(compile(ast.Module(body=classes, type_ignores=[]), "SkillMiddleware.py", "exec"), namespace)
+    return namespace["SkillMiddleware"]
+
+
+def run(skills: int, tools_per_skill: int, calls: int, seed: int = 0) -> list[dict]:
+    registry = SkillRegistry()
+    mapping = {f"s{i}": [make_tool(f"s{i}_tool{j}") for j in range(tools_per_skill)] for i in range(skills)}
+    for name, tools in mapping.items():
+        registry.register(name, tools)
+    all_tools = registry.loader_tools + [t for tools in mapping.values() for t in tools]
+
+    namespace = {"AgentMiddleware": AgentMiddleware, "ModelRequest": ModelRequest, "ModelResponse": ModelResponse,
+                 "List": List, "Callable": Callable, "get_tools_for_skills": registry.get_tools_for_skills,
+                 "SKILL_REGISTRY": registry}
+    SkillMiddleware = load_skill_middleware(namespace)
+
+    # 模拟一次会话中逐步加载技能：技能组合在少数几种之间切换
+    rng = random.Random(seed)
+    names = list(mapping)
+    combos = [names[:n] for n in range(0, min(4, skills) + 1)]
+    sequence = [rng.choice(combos) for _ in range(calls)]
+
+    def handler(request):
+        # 与 create_agent 的 _get_bound_model 一致：每次都对 request.model 调用 bind_tools
+        return request.model.bind_tools(list(request.tools), tool_choice=request.tool_choice)
+
+    results = []
+    for cache in (False, True):
+        middleware = SkillMiddleware(verbose=False, cache=cache)
+        model = DeepSeekReasonerChatModel(api_key="bench", base_url="http://127.0.0.1:1",
+                                          bind_cache_size=32 if cache else 0)
+        latencies = []
+        for skills_loaded in sequence:
+            request = ModelRequest(model=model, messages=[], tools=all_tools, state={"skills_loaded": skills_loaded})
+            start = time.perf_counter()
+            middleware.wrap_model_call(request, handler)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        results.append({
+            "cache": cache,
+            "mean_us": 1e6 * sum(latencies) / len(latencies),
+            "p50_us": 1e6 * latencies[len(latencies) // 2],
+            "p99_us": 1e6 * latencies[int(0.99 * (len(latencies) - 1))],
+            "hits": middleware.cache_hits,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SkillMiddleware 每次调用开销基准")
+    parser.add_argument("--skills", type=int, default=12)
+    parser.add_argument("--tools-per-skill", type=int, default=10)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/skill_middleware_overhead.md")
+    args = parser.parse_args()
+
+    total = args.skills * (args.tools_per_skill + 1)
+    results = run(args.skills, args.tools_per_skill, args.calls)
+    lines = [
+        "# SkillMiddleware 每次调用开销",
+        "",
+        f"{args.skills} 个技能 × {args.tools_per_skill} 个工具 + {args.skills} 个 Loader，共 {total} 个注册工具；"
+        f"{args.calls} 次调用，已加载技能在 0~4 个之间随机切换。",
+        "耗时包含 SkillMiddleware 过滤工具和下游 DeepSeekReasonerChatModel.bind_tools，不含模型请求本身；"
+        "“开”同时开启过滤缓存和模型自身的 bind_tools 缓存。",
+        "",
+        "| 缓存 | 平均 (µs) | p50 (µs) | p99 (µs) | 缓存命中 |",
+        "|------|----------|---------|---------|---------|",
+    ]
+    for r in results:
+        lines.append(f"| {'开' if r['cache'] else '关'} | {r['mean_us']:.0f} | {r['p50_us']:.0f} | {r['p99_us']:.0f} | "
+                     f"{r['hits']}/{args.calls} |")
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
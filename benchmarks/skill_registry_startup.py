@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+SkillRegistry 启动耗时与内存随技能数量的变化：按需导入与启动时全部导入的对比
+
+在临时目录生成 N 个模拟技能（每个 SKILL.md + tools.py，tools.py 定义若干带参数 schema 的 @tool 工具），
+每种情况在新的 Python 进程里测量：
+- lazy：SkillRegistry 只读清单、生成 Loader 工具（当前做法）
+- eager：启动时导入全部技能的工具模块（相当于旧的 ClaudeSkills.py 把所有工具写死并在启动时定义）
+耗时不含 langchain 等公共依赖的导入；内存为进程峰值 RSS 相对导入公共依赖后的增量。
+
+用法：
+    python benchmarks/skill_registry_startup.py --skills 10 100 500 --write
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "skill_registry_startup.md"
+
+TOOL_TEMPLATE = '''
+@tool
+def {name}(text: str, limit: int = 10, ratio: float = 0.5, tags: List[str] = []) -> str:
+    """
+    模拟工具 {name}。
+
+    Args:
+        text: 输入文本
+        limit: 最多返回条数
+        ratio: 比例
+        tags: 标签
+    """
+    return text[:limit]
+'''
+
+MEASURE = '''
+import json, resource, sys, time
+sys.path.insert(0, {skills_dir!r})
+from pathlib import Path
+import skill_registry
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+registry = skill_registry.SkillRegistry(Path({root!r}))
+loaders = registry.loader_tools
+if {eager}:
+    for name in registry.manifests:
+        registry.tools_for(name)
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+print(json.dumps({{"seconds": elapsed, "rss_kb": rss, "loaders": len(loaders), "imported": len(registry.imported_skills)}}))
+'''
+
+
+def make_skills(root: Path, count: int, tools_per_skill: int):
+    for i in range(count):
+        skill_dir = root / f"skill{i:04d}"
+        skill_dir.mkdir(parents=True)
+        names = [f"s{i:04d}_tool{j}" for j in range(tools_per_skill)]
+        (skill_dir / "SKILL.md").write_text(
+            "---\n"
+            f"name: skill{i:04d}\n"
+            f"description: 加载模拟技能 {i}。\n"
+            "tools:\n" + "".join(f"  - tools:{n}\n" for n in names) +
+            "---\n模拟技能已加载。\n{tools}\n", encoding="utf-8")
+        (skill_dir / "tools.py").write_text(
+            "from typing import List\n\nfrom langchain_core.tools import tool\n"
+            + "".join(TOOL_TEMPLATE.format(name=n) for n in names), encoding="utf-8")
+
+
+def measure(root: Path, eager: bool) -> dict:
+    code = MEASURE.format(skills_dir=str(ROOT / "Skills"), root=str(root), eager=eager)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SkillRegistry 启动开销基准")
+    parser.add_argument("--skills", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--tools-per-skill", type=int, default=5)
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/skill_registry_startup.md")
+    args = parser.parse_args()
+
+    lines = [
+        "# SkillRegistry 启动开销",
+        "",
+        f"每个技能 {args.tools_per_skill} 个工具（4 个参数）。每种情况在新进程中测量，耗时不含公共依赖导入，"
+        "内存为峰值 RSS 增量。",
+        "",
+        "| 技能数 | lazy 耗时 (ms) | lazy 内存 (MB) | eager 耗时 (ms) | eager 内存 (MB) |",
+        "|--------|---------------|---------------|----------------|----------------|",
+    ]
+    for count in args.skills:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            make_skills(root, count, args.tools_per_skill)
+            lazy, eager = measure(root, False), measure(root, True)
+        assert lazy["imported"] == 0 and eager["imported"] == count
+        lines.append(f"| {count} | {lazy['seconds'] * 1000:.0f} | {lazy['rss_kb'] / 1024:.1f} | "
+                     f"{eager['seconds'] * 1000:.0f} | {eager['rss_kb'] / 1024:.1f} |")
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")
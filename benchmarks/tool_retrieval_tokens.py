@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+ToolRetriever 节省的工具 schema token 与召回率
+
+构造一个大工具目录（领域 × 操作，每个工具带中文描述和 3 个参数），对每个工具写一条换了说法的用户请求，
+检查 ToolRetriever 选出的工具里是否包含目标工具（recall），并统计全部暴露与检索后暴露的 schema token 数、每次筛选耗时。
+
+用法：
+    python benchmarks/tool_retrieval_tokens.py --top-k 8 --budget 2000 --write
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import StructuredTool
+from pydantic import Field, create_model
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Skills"))
+
+from tool_retrieval import ToolRetriever  # noqa: E402
+
+REPORT_PATH = Path(__file__).resolve().parent / "reports" / "tool_retrieval_tokens.md"
+
+# (英文名, 工具描述里的对象, 用户请求里的说法)
+DOMAINS = [
+    ("weather", "城市天气预报", "明天北京会不会下雨"),
+    ("stock", "股票行情和股价", "看看腾讯今天的股价"),
+    ("email", "电子邮件", "给张经理发一封邮件"),
+    ("calendar", "日历日程和会议安排", "把周五下午的会议安排进日程"),
+    ("file", "本地文件和文件夹", "把报告文件移动到归档文件夹"),
+    ("database", "数据库表和 SQL 记录", "在订单数据库表里找出昨天的记录"),
+    ("image", "图片和照片", "把这张照片裁剪一下"),
+    ("translate", "多语言翻译文本", "把这段话翻译成英文"),
+    ("map", "地图路线和导航", "规划一条去机场的导航路线"),
+    ("music", "音乐歌曲和歌单", "把这首歌加到我的歌单"),
+    ("invoice", "发票和报销单", "帮我开一张报销发票"),
+    ("contact", "通讯录联系人", "在通讯录里找李雷的联系人电话"),
+    ("flight", "航班机票", "订一张去上海的机票航班"),
+    ("hotel", "酒店客房预订", "订一间杭州的酒店客房"),
+    ("news", "新闻资讯", "给我最新的科技新闻"),
+    ("todo", "待办事项清单", "把买牛奶加到待办清单"),
+    ("github", "代码仓库和拉取请求", "看看代码仓库里还没合并的拉取请求"),
+    ("shipment", "快递物流包裹", "查一下我的快递包裹到哪了"),
+    ("exchange", "外汇汇率换算", "一百美元能换多少人民币汇率"),
+    ("recipe", "菜谱和做菜步骤", "教我红烧肉的做菜步骤"),
+]
+ACTIONS = [
+    ("search", "查询", "查询"),
+    ("create", "创建新的", "新建"),
+    ("update", "修改已有的", "修改"),
+    ("delete", "删除", "删掉"),
+    ("export", "导出为表格的", "导出成表格"),
+]
+
+
+def make_tool(name: str, description: str) -> StructuredTool:
+    schema = create_model(
+        f"{name}_args",
+        query=(str, Field(description="查询条件或对象名称")),
+        limit=(int, Field(default=10, description="最多返回条数")),
+        options=(dict, Field(default_factory=dict, description="其他可选参数")),
+    )
+    return StructuredTool.from_function(lambda **kwargs: name, name=name, description=description, args_schema=schema)
+
+
+def build_catalog():
+    tools, queries = [], []
+    for domain, obj, request in DOMAINS:
+        for action, verb, user_verb in ACTIONS:
+            name = f"{domain}_{action}"
+            tools.append(make_tool(name, f"{verb}{obj}。"))
+            queries.append((name, f"{request}，需要{user_verb}"))
+    return tools, queries
+
+
+def run(top_k: int, budget: int) -> dict:
+    tools, queries = build_catalog()
+    retriever = ToolRetriever(top_k=top_k, token_budget=budget)
+    retriever.index(tools)   # 预先构建索引，不计入筛选耗时
+    hits, latencies = 0, []
+    for target, text in queries:
+        start = time.perf_counter()
+        selected = retriever.select([HumanMessage(content=text)], tools)
+        latencies.append(time.perf_counter() - start)
+        hits += any(t.name == target for t in selected)
+    latencies.sort()
+    report = retriever.report()
+    return {"tools": len(tools), "queries": len(queries), "recall": hits / len(queries),
+            "p50_ms": latencies[len(latencies) // 2] * 1000, **report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ToolRetriever 节省 token 与召回率基准")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--budget", type=int, default=2000, help="工具 schema token 预算")
+    parser.add_argument("--write", action="store_true", help="写入 benchmarks/reports/tool_retrieval_tokens.md")
+    args = parser.parse_args()
+
+    results = [run(k, args.budget) for k in args.top_k]
+    first = results[0]
+    lines = [
+        "# ToolRetriever：工具 schema token 与召回率",
+        "",
+        f"{first['tools']} 个工具（{len(DOMAINS)} 个领域 × {len(ACTIONS)} 种操作），每个工具一条换了说法的用户请求，"
+        f"共 {first['queries']} 次筛选；默认 HashingEmbedder，token 预算 {args.budget}。",
+        f"全部暴露时每次请求的工具 schema 约 {first['candidate_tokens'] // first['calls']} tokens。",
+        "",
+        "| top_k | recall@k | 每次暴露工具数 | 每次 schema tokens | 节省 | 筛选 p50 (ms) |",
+        "|-------|----------|---------------|-------------------|------|--------------|",
+    ]
+    for k, r in zip(args.top_k, results):
+        lines.append(f"| {k} | {r['recall']:.1%} | {r['selected_tools'] / r['calls']:.1f} | "
+                     f"{r['selected_tokens'] // r['calls']} | {r['saved_ratio']:.1%} | {r['p50_ms']:.2f} |")
+    report = "\n".join(lines) + "\n"
+    print(report)
+    if args.write:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(report, encoding="utf-8")
+        print(f"报告已写入 {REPORT_PATH}")